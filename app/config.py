@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import List, Literal, Optional
 
 from pydantic import BaseSettings, Field
 
@@ -12,7 +12,62 @@ class Settings(BaseSettings):
     allowed_origins: List[str] = Field(default_factory=lambda: ["*"], env="QR_CUT_ALLOWED_ORIGINS")
     database_path: Path = Field(default=Path("data/app.db"), env="QR_CUT_DATABASE_PATH")
     storage_root: Path = Field(default=Path("storage"), env="QR_CUT_STORAGE_ROOT")
+    persist_mode: Literal["off", "originals", "both"] = Field(default="both", env="QR_CUT_PERSIST_MODE")
     temp_retention_hours: int = Field(default=24, env="QR_CUT_RETENTION_HOURS")
+    retention_sweep_interval_seconds: float = Field(default=300.0, gt=0.0, env="QR_CUT_RETENTION_SWEEP_INTERVAL_SECONDS")
+    retention_batch_size: int = Field(default=500, ge=1, env="QR_CUT_RETENTION_BATCH_SIZE")
+    retention_batch_pause_seconds: float = Field(default=0.05, ge=0.0, env="QR_CUT_RETENTION_BATCH_PAUSE_SECONDS")
+    processing_backend: Literal["thread", "process"] = Field(default="thread", env="QR_CUT_PROCESSING_BACKEND")
+    processing_workers: int = Field(default=0, ge=0, env="QR_CUT_PROCESSING_WORKERS")
+    processing_max_in_flight: int = Field(default=0, ge=0, env="QR_CUT_PROCESSING_MAX_IN_FLIGHT")
+    processing_queue_size: int = Field(default=64, ge=0, env="QR_CUT_PROCESSING_QUEUE_SIZE")
+    warmup_mode: Literal["off", "blocking", "background"] = Field(default="background", env="QR_CUT_WARMUP_MODE")
+    batch_parallelism: int = Field(default=4, ge=1, env="QR_CUT_BATCH_PARALLELISM")
+    admission_enabled: bool = Field(default=True, env="QR_CUT_ADMISSION_ENABLED")
+    admission_max_requests: int = Field(default=32, ge=0, env="QR_CUT_ADMISSION_MAX_REQUESTS")
+    admission_max_cost: float = Field(default=400.0, ge=0.0, env="QR_CUT_ADMISSION_MAX_COST")
+    admission_client_max_requests: int = Field(default=8, ge=0, env="QR_CUT_ADMISSION_CLIENT_MAX_REQUESTS")
+    admission_client_max_cost: float = Field(default=200.0, ge=0.0, env="QR_CUT_ADMISSION_CLIENT_MAX_COST")
+    admission_client_header: Optional[str] = Field(default=None, env="QR_CUT_ADMISSION_CLIENT_HEADER")
+    admission_queue_size: int = Field(default=32, ge=0, env="QR_CUT_ADMISSION_QUEUE_SIZE")
+    admission_queue_timeout_seconds: float = Field(default=2.0, ge=0.0, env="QR_CUT_ADMISSION_QUEUE_TIMEOUT_SECONDS")
+    admission_retry_after_seconds: int = Field(default=2, ge=0, env="QR_CUT_ADMISSION_RETRY_AFTER_SECONDS")
+    job_workers: int = Field(default=1, ge=0, env="QR_CUT_JOB_WORKERS")
+    job_poll_interval_seconds: float = Field(default=2.0, gt=0.0, env="QR_CUT_JOB_POLL_INTERVAL_SECONDS")
+    job_lease_seconds: float = Field(default=60.0, gt=0.0, env="QR_CUT_JOB_LEASE_SECONDS")
+    job_saturated_retries: int = Field(default=5, ge=0, env="QR_CUT_JOB_SATURATED_RETRIES")
+    job_retry_backoff_seconds: float = Field(default=0.5, ge=0.0, env="QR_CUT_JOB_RETRY_BACKOFF_SECONDS")
+    max_upload_bytes: int = Field(default=50 * 1024 * 1024, ge=0, env="QR_CUT_MAX_UPLOAD_BYTES")
+    max_image_megapixels: float = Field(default=100.0, ge=0.0, env="QR_CUT_MAX_IMAGE_MEGAPIXELS")
+    keyframe_interval: int = Field(default=10, ge=1, env="QR_CUT_KEYFRAME_INTERVAL")
+    tracking_min_confidence: float = Field(default=0.6, gt=0.0, le=1.0, env="QR_CUT_TRACKING_MIN_CONFIDENCE")
+    max_frames: int = Field(default=3000, ge=0, env="QR_CUT_MAX_FRAMES")
+    encode_tier: Literal["fast", "balanced", "small"] = Field(default="balanced", env="QR_CUT_ENCODE_TIER")
+    encode_passthrough: bool = Field(default=True, env="QR_CUT_ENCODE_PASSTHROUGH")
+    log_batch_size: int = Field(default=100, ge=1, env="QR_CUT_LOG_BATCH_SIZE")
+    log_flush_interval_seconds: float = Field(default=1.0, gt=0.0, env="QR_CUT_LOG_FLUSH_INTERVAL_SECONDS")
+    sqlite_wal: bool = Field(default=True, env="QR_CUT_SQLITE_WAL")
+    profile_memory: bool = Field(default=False, env="QR_CUT_PROFILE_MEMORY")
+    payload_spool_bytes: int = Field(default=1024 * 1024, ge=0, env="QR_CUT_PAYLOAD_SPOOL_BYTES")
+    # Pyramid is faster on large images with large codes but can miss small codes next to them.
+    detection_mode: Literal["full", "pyramid"] = Field(default="full", env="QR_CUT_DETECTION_MODE")
+    detection_scales: List[float] = Field(default_factory=lambda: [0.25, 0.5, 1.0], env="QR_CUT_DETECTION_SCALES")
+    pyramid_min_side: int = Field(default=800, ge=1, env="QR_CUT_PYRAMID_MIN_SIDE")
+    pyramid_full_pass: bool = Field(default=False, env="QR_CUT_PYRAMID_FULL_PASS")
+    detector_backends: List[str] = Field(default_factory=lambda: ["pyzbar", "opencv"], env="QR_CUT_DETECTOR_BACKENDS")
+    detector_adaptive: bool = Field(default=True, env="QR_CUT_DETECTOR_ADAPTIVE")
+    hint_padding_ratio: float = Field(default=0.25, ge=0.0, env="QR_CUT_HINT_PADDING_RATIO")
+    hint_padding_min_pixels: int = Field(default=16, ge=0, env="QR_CUT_HINT_PADDING_MIN_PIXELS")
+    tiling_min_pixels: int = Field(default=24_000_000, ge=0, env="QR_CUT_TILING_MIN_PIXELS")
+    tile_size: int = Field(default=1024, ge=64, env="QR_CUT_TILE_SIZE")
+    tile_overlap: int = Field(default=256, ge=0, env="QR_CUT_TILE_OVERLAP")
+    tile_overview_side: int = Field(default=2048, ge=0, env="QR_CUT_TILE_OVERVIEW_SIDE")
+    tile_iou_threshold: float = Field(default=0.3, gt=0.0, le=1.0, env="QR_CUT_TILE_IOU_THRESHOLD")
+    tiling_workers: int = Field(default=0, ge=0, env="QR_CUT_TILING_WORKERS")
+    result_cache_memory_bytes: int = Field(default=64 * 1024 * 1024, ge=0, env="QR_CUT_RESULT_CACHE_MEMORY_BYTES")
+    result_cache_disk_bytes: int = Field(default=0, ge=0, env="QR_CUT_RESULT_CACHE_DISK_BYTES")
+    detection_cache_entries: int = Field(default=1024, ge=0, env="QR_CUT_DETECTION_CACHE_ENTRIES")
+    detection_cache_ttl_seconds: float = Field(default=3600.0, ge=0.0, env="QR_CUT_DETECTION_CACHE_TTL_SECONDS")
 
     class Config:
         env_file = ".env"
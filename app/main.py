@@ -7,22 +7,36 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings, ensure_directories
 from .database import init_db
-from .routers import health, logs, processing
-from .utils.file_ops import cleanup_storage
+from .routers import detection, health, jobs, logs, metrics, processing, stats
+from .services.executor import processing_pool
+from .services.ingestion import configure_decoder_limits
+from .services.jobs import job_queue
+from .services.log_writer import log_writer
+from .services.retention import retention_sweeper
+from .services.storage import storage
+from .services.warmup import warmup
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # pragma: no cover - startup side effects
     ensure_directories()
     init_db()
-    cleanup_storage(
-        directories=[
-            settings.storage_root / "uploads",
-            settings.storage_root / "processed",
-        ],
-        retention_hours=settings.temp_retention_hours,
-    )
-    yield
+    configure_decoder_limits()
+    processing_pool.start()
+    await warmup.start(processing_pool)
+    log_writer.start()
+    storage.start()
+    retention_sweeper.start()
+    job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await warmup.stop()
+        retention_sweeper.stop()
+        processing_pool.shutdown()
+        log_writer.stop()
+        storage.stop()
 
 
 app = FastAPI(
@@ -41,5 +55,9 @@ app.add_middleware(
 )
 
 app.include_router(health.router)
+app.include_router(metrics.router)
 app.include_router(processing.router)
+app.include_router(detection.router)
+app.include_router(jobs.router)
 app.include_router(logs.router)
+app.include_router(stats.router)
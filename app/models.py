@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, Float, Integer, String, func
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, func
 
 from .database import Base
 
 
 class ProcessLog(Base):
     __tablename__ = "process_logs"
+    __table_args__ = (Index("ix_process_logs_processed_at", "processed_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     original_filename = Column(String, nullable=False)
@@ -17,3 +18,60 @@ class ProcessLog(Base):
     opacity = Column(Float, nullable=False)
     output_format = Column(String, nullable=False)
     processed_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class StoredFile(Base):
+    __tablename__ = "stored_files"
+    __table_args__ = (
+        Index("ix_stored_files_digest", "kind", "digest"),
+        Index("ix_stored_files_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    digest = Column(String, nullable=False)
+    suffix = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class StorageObject(Base):
+    """One row per stored object with the time it was last stored, for retention."""
+
+    __tablename__ = "storage_objects"
+    __table_args__ = (Index("ix_storage_objects_last_stored_at", "last_stored_at", "kind", "digest", "suffix"),)
+
+    kind = Column(String, primary_key=True)
+    digest = Column(String, primary_key=True)
+    suffix = Column(String, primary_key=True)
+    size = Column(Integer, nullable=False)
+    last_stored_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)
+    status = Column(String, nullable=False, default="queued", index=True)
+    options = Column(Text, nullable=False)
+    total = Column(Integer, nullable=False)
+    result_filename = Column(String, nullable=True)
+    result_content_type = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime, nullable=True, index=True)
+    owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+
+class JobItem(Base):
+    __tablename__ = "job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    original_filename = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="queued")
+    record = Column(Text, nullable=True)
+    output_filename = Column(String, nullable=True)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import asdict
+from typing import List, Optional, Tuple, cast
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..schemas import (
+    BoundingBox,
+    DetectResponse,
+    DetectedImage,
+    DetectedRegion,
+    DetectionMode,
+    ProcessingOptions,
+    TileReport,
+)
+from ..services.executor import PoolSaturatedError, processing_pool
+from ..services.ingestion import IngestedUpload, UploadRejectedError, ingest_upload
+from ..services.qr_processor import DetectionReport, QRProcessingError, QRRegion, detect_image
+from ..utils.lazy import lazy_import
+from ..utils.metrics import ERRORS_TOTAL, IMAGES_TOTAL, STAGE_SECONDS
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["detection"])
+
+
+def parse_detection_options(
+    detection_mode: Optional[str] = Form(None),
+    detection_scales: Optional[str] = Form(None, description="Comma-separated downscale factors, e.g. 0.25,0.5."),
+    hint_regions: Optional[str] = Form(None, description="JSON list of polygons to search first."),
+) -> ProcessingOptions:
+    scale_values = [value.strip() for value in detection_scales.split(",") if value.strip()] if detection_scales else None
+    try:
+        return ProcessingOptions(
+            detection_mode=cast(Optional[DetectionMode], detection_mode.lower() if detection_mode else None),
+            detection_scales=scale_values,
+            hint_regions=hint_regions,
+        )
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors()) from exc
+
+
+def _region_payload(region: QRRegion, width: int, height: int) -> DetectedRegion:
+    points = np.asarray(region.points, dtype=np.float64).reshape(-1, 2)
+    x0, y0 = np.clip(points.min(axis=0), 0, [width, height])
+    x1, y1 = np.clip(points.max(axis=0), 0, [width, height])
+    return DetectedRegion(
+        points=[[round(float(x), 2), round(float(y), 2)] for x, y in points],
+        bbox=BoundingBox(
+            x=round(float(x0), 2),
+            y=round(float(y0), 2),
+            width=round(float(x1 - x0), 2),
+            height=round(float(y1 - y0), 2),
+        ),
+        data=region.data,
+    )
+
+
+def _report_payload(filename: str, report: DetectionReport) -> DetectedImage:
+    return DetectedImage(
+        original_filename=filename,
+        width=report.width,
+        height=report.height,
+        qr_count=len(report.regions),
+        regions=[_region_payload(region, report.width, report.height) for region in report.regions],
+        detection_strategy=report.detection_strategy,
+        detection_cached=report.detection_cached,
+        tiles=[TileReport(**asdict(tile)) for tile in report.tiles] or None,
+        timings_ms=report.timings_ms,
+    )
+
+
+def _failure(filename: str, error: str, status_code: int, reason: str) -> Tuple[DetectedImage, int]:
+    ERRORS_TOTAL.inc(reason=reason)
+    IMAGES_TOTAL.inc(outcome="failed")
+    return DetectedImage(original_filename=filename, error=error), status_code
+
+
+async def _detect_upload(
+    upload: IngestedUpload,
+    options: ProcessingOptions,
+    limiter: asyncio.Semaphore,
+) -> Tuple[DetectedImage, int]:
+    try:
+        return await _detect_one(upload, options, limiter)
+    except Exception as exc:  # noqa: BLE001 - reported per image
+        logger.exception("Detection on %r failed", upload.filename)
+        message = f"Internal error while scanning the image ({type(exc).__name__})."
+        return _failure(upload.filename or "image", message, 500, "internal")
+
+
+async def _detect_one(
+    upload: IngestedUpload,
+    options: ProcessingOptions,
+    limiter: asyncio.Semaphore,
+) -> Tuple[DetectedImage, int]:
+    filename = upload.filename or "image"
+    if not upload.size:
+        return _failure(filename, f"File '{upload.filename}' is empty.", 400, "empty")
+    if not upload.valid:
+        return _failure(filename, "Invalid image data", 422, "invalid")
+
+    async with limiter:
+        try:
+            report = await processing_pool.run(detect_image, upload.source, options, upload.digest)
+        except PoolSaturatedError as exc:
+            return _failure(filename, str(exc), 503, "saturated")
+        except QRProcessingError as exc:
+            return _failure(filename, str(exc), 422, "processing")
+
+    for stage, elapsed_ms in report.timings_ms.items():
+        STAGE_SECONDS.observe(elapsed_ms / 1000, stage=stage)
+    IMAGES_TOTAL.inc(outcome="detected")
+    return _report_payload(filename, report), 200
+
+
+@router.post("/detect", response_model=DetectResponse, summary="Locate and decode QR codes without masking")
+async def detect_images(
+    files: List[UploadFile] = File(..., description="Images to scan for QR codes."),
+    options: ProcessingOptions = Depends(parse_detection_options),
+) -> DetectResponse:
+    if not files:
+        raise HTTPException(status_code=400, detail="At least one image must be provided.")
+
+    try:
+        ingested = [await run_in_threadpool(ingest_upload, upload.filename, upload.file) for upload in files]
+    except UploadRejectedError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+
+    limiter = asyncio.Semaphore(settings.batch_parallelism)
+    outcomes = await asyncio.gather(*(_detect_upload(upload, options, limiter) for upload in ingested))
+
+    if len(outcomes) == 1 and outcomes[0][1] != 200:
+        record, status_code = outcomes[0]
+        raise HTTPException(status_code=status_code, detail=record.error)
+    if all(status_code != 200 for _, status_code in outcomes):
+        raise HTTPException(
+            status_code=422,
+            detail=[record.dict(include={"original_filename", "error"}) for record, _ in outcomes],
+        )
+    return DetectResponse(images=[record for record, _ in outcomes])
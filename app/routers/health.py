@@ -1,10 +1,21 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+
+from ..services.warmup import warmup
 
 router = APIRouter(tags=["health"])
 
 
-@router.get("/health", summary="Health check")
-def health_check() -> dict[str, str]:
+@router.get("/health", summary="Readiness check")
+def health_check(response: Response) -> dict[str, str]:
+    """Reports ready only once startup warm-up has finished."""
+    if not warmup.ready:
+        response.status_code = 503
+        return {"status": "starting"}
+    return {"status": "ok"}
+
+
+@router.get("/health/live", summary="Liveness check")
+def liveness_check() -> dict[str, str]:
     return {"status": "ok"}
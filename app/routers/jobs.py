@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..schemas import JobStatus, ProcessingOptions
+from ..services.ingestion import UploadRejectedError, ingest_upload
+from ..services.jobs import job_queue
+from .processing import parse_processing_options
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+
+@router.post("/jobs", response_model=JobStatus, status_code=202, summary="Queue images for background processing")
+async def create_job(
+    files: list[UploadFile] = File(..., description="Images containing QR codes."),
+    options: ProcessingOptions = Depends(parse_processing_options),
+) -> JobStatus:
+    if not files:
+        raise HTTPException(status_code=400, detail="At least one image must be provided.")
+
+    # Enforce the ingestion limits up front so over-limit batches are rejected synchronously.
+    try:
+        for upload in files:
+            await run_in_threadpool(ingest_upload, upload.filename, upload.file)
+    except UploadRejectedError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+
+    job_id = await run_in_threadpool(job_queue.submit, [(upload.filename, upload.file) for upload in files], options)
+    status = await run_in_threadpool(job_queue.status, job_id)
+    assert status is not None
+    return status
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus, summary="Report job progress per image")
+def get_job(job_id: str) -> JobStatus:
+    status = job_queue.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return status
+
+
+@router.get("/jobs/{job_id}/result", summary="Download the processed image or archive of a finished job")
+def get_job_result(job_id: str) -> FileResponse:
+    job = job_queue.result(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job.status == "failed":
+        raise HTTPException(status_code=422, detail=job.error or "Job failed.")
+    if job.status != "completed" or not job.result_filename:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}.")
+    path = job_queue.result_path(job)
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="Job result has expired.")
+    return FileResponse(path, media_type=job.result_content_type, filename=Path(job.result_filename).name)
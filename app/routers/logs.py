@@ -1,16 +1,129 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import String, case, func, select, type_coerce
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
 from ..database import get_db
 from ..models import ProcessLog
-from ..schemas import ProcessLogEntry
+from ..schemas import LogStatsBucket, ProcessLogEntry
 
 router = APIRouter(prefix="/api", tags=["logs"])
 
+# Reads never force a flush, so polling dashboards do not undo the write batching.
+LAG_NOTE = (
+    "Log rows are written in batches, so the newest entries can appear up to "
+    "QR_CUT_LOG_FLUSH_INTERVAL_SECONDS (or QR_CUT_LOG_BATCH_SIZE rows) late."
+)
+
+BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m",
+}
+
+
+def _stored_timestamp(value: datetime) -> str:
+    # processed_at is written by SQLite's CURRENT_TIMESTAMP, i.e. naive UTC text.
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 
-@router.get("/logs", response_model=list[ProcessLogEntry], summary="List recent processing logs")
-def list_logs(db: Session = Depends(get_db)) -> list[ProcessLogEntry]:
-    logs = db.query(ProcessLog).order_by(ProcessLog.processed_at.desc()).limit(50).all()
+def _apply_filters(
+    query: Select,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    output_format: Optional[str],
+    min_qr: Optional[int],
+    max_qr: Optional[int],
+    filename_prefix: Optional[str],
+) -> Select:
+    processed_at = type_coerce(ProcessLog.processed_at, String)
+    if since is not None:
+        query = query.where(processed_at >= _stored_timestamp(since))
+    if until is not None:
+        query = query.where(processed_at < _stored_timestamp(until))
+    if output_format:
+        query = query.where(ProcessLog.output_format == output_format.upper())
+    if min_qr is not None:
+        query = query.where(ProcessLog.qr_count >= min_qr)
+    if max_qr is not None:
+        query = query.where(ProcessLog.qr_count <= max_qr)
+    if filename_prefix:
+        query = query.where(ProcessLog.original_filename.like(f"{_escape_like(filename_prefix)}%", escape="\\"))
+    return query
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        return int(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+
+
+@router.get(
+    "/logs",
+    response_model=list[ProcessLogEntry],
+    summary="List recent processing logs",
+    description=LAG_NOTE,
+)
+def list_logs(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page."),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    output_format: Optional[str] = Query(None),
+    min_qr: Optional[int] = Query(None, ge=0),
+    max_qr: Optional[int] = Query(None, ge=0),
+    filename_prefix: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+) -> list[ProcessLogEntry]:
+    # Rows are inserted in processing order, so the primary key doubles as the keyset.
+    query = select(ProcessLog).order_by(ProcessLog.id.desc()).limit(limit + 1)
+    query = _apply_filters(query, since, until, output_format, min_qr, max_qr, filename_prefix)
+    before_id = _decode_cursor(cursor)
+    if before_id is not None:
+        query = query.where(ProcessLog.id < before_id)
+
+    logs = db.scalars(query).all()
+    if len(logs) > limit:
+        logs = logs[:limit]
+        response.headers["X-Next-Cursor"] = str(logs[-1].id)
     return [ProcessLogEntry.from_orm(log) for log in logs]
+
+
+@router.get(
+    "/logs/stats",
+    response_model=list[LogStatsBucket],
+    summary="Aggregate processing logs per time bucket",
+    description=LAG_NOTE,
+)
+def log_stats(
+    bucket: Literal["hour", "day", "month"] = Query("day"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    output_format: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+) -> list[LogStatsBucket]:
+    bucket_column = func.strftime(BUCKET_FORMATS[bucket], ProcessLog.processed_at).label("bucket")
+    query = select(
+        bucket_column,
+        func.count(ProcessLog.id).label("images"),
+        func.coalesce(func.sum(ProcessLog.qr_count), 0).label("qr_total"),
+        func.sum(case((ProcessLog.qr_count > 0, 1), else_=0)).label("images_with_qr"),
+    )
+    query = _apply_filters(query, since, until, output_format, None, None, None)
+    query = query.group_by(bucket_column).order_by(bucket_column)
+    return [LogStatsBucket(**row._mapping) for row in db.execute(query)]
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..services.admission import admission_controller
+from ..services.executor import processing_pool
+from ..services.log_writer import log_writer
+from ..utils.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+registry.gauge(
+    "qr_cut_in_flight",
+    "Images currently running in the processing pool.",
+    lambda: processing_pool.stats()["in_flight"],
+)
+registry.gauge(
+    "qr_cut_waiting",
+    "Images queued for a processing slot.",
+    lambda: processing_pool.stats()["waiting"],
+)
+registry.gauge(
+    "qr_cut_admission_queue_depth",
+    "Requests waiting for admission.",
+    lambda: admission_controller.queue_depth,
+)
+registry.gauge(
+    "qr_cut_admission_active_cost",
+    "Estimated megapixels of the requests currently admitted.",
+    lambda: admission_controller.stats()["active_cost"],
+)
+registry.gauge(
+    "qr_cut_log_rows_pending",
+    "Process log rows waiting for the next batch write.",
+    lambda: log_writer.stats()["pending"],
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics")
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,131 +1,149 @@
 from __future__ import annotations
 
-import io
-import zipfile
-from dataclasses import dataclass
-from pathlib import Path
-from typing import cast
-
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from fastapi.responses import Response
+import asyncio
+import time
+from typing import Optional, cast
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..config import settings
-from ..database import get_db
-from ..models import ProcessLog
-from ..schemas import OutputFormat, ProcessResponse, ProcessedImage, ProcessingOptions, Shape
-from ..services.qr_processor import QRProcessingError, process_image
-from ..utils.file_ops import build_metadata_header, make_storage_filename, persist_bytes
+from ..schemas import (
+    DetectionMode,
+    EncodeTier,
+    MaskStyle,
+    OutputFormat,
+    ProcessResponse,
+    ProcessingOptions,
+    Shape,
+)
+from ..services.admission import AdmissionRejectedError, admission_controller, estimate_cost
+from ..services.batch import close_payloads, log_rows, process_upload, stream_archive
+from ..services.ingestion import UploadRejectedError, ingest_upload
+from ..services.log_writer import log_writer
+from ..utils.file_ops import build_metadata_header, make_storage_filename
+from ..utils.metrics import BYTES_IN_TOTAL, STAGE_SECONDS
 
 router = APIRouter(prefix="/api", tags=["processing"])
 
 
-@dataclass
-class ProcessedPayload:
-    data: bytes
-    filename: str
-    content_type: str
+def response_headers(download_name: str, response_payload: ProcessResponse) -> dict[str, str]:
+    return {
+        "Content-Disposition": f"attachment; filename=\"{download_name}\"",
+        "X-QR-Cut-Metadata": build_metadata_header(response_payload.dict()),
+    }
 
 
-@router.post("/process", summary="Detect QR codes and mask them in uploaded images")
-async def process_images(
-    files: list[UploadFile] = File(..., description="Images containing QR codes."),
+def parse_processing_options(
     fill_color: str = Form("#000000"),
     opacity: float = Form(1.0),
     shape: str = Form("rectangle"),
+    style: str = Form("fill"),
+    blur_radius: Optional[int] = Form(None),
+    pixel_size: Optional[int] = Form(None),
     output_format: str = Form("PNG"),
-    db: Session = Depends(get_db),
-) -> Response:
-    if not files:
-        raise HTTPException(status_code=400, detail="At least one image must be provided.")
-
+    encode_tier: Optional[str] = Form(None),
+    detection_mode: Optional[str] = Form(None),
+    detection_scales: Optional[str] = Form(None, description="Comma-separated downscale factors, e.g. 0.25,0.5."),
+    hint_regions: Optional[str] = Form(None, description="JSON list of polygons, e.g. [[[10,10],[120,120]]]."),
+    trust_regions: bool = Form(False, description="Mask hint_regions directly without running detection."),
+) -> ProcessingOptions:
+    """Build :class:`ProcessingOptions` from the multipart form fields shared by the upload endpoints."""
     normalized_shape = cast(Shape, shape.lower())
+    normalized_style = cast(MaskStyle, style.lower())
     normalized_format = cast(OutputFormat, output_format.upper())
+    normalized_mode = cast(Optional[DetectionMode], detection_mode.lower() if detection_mode else None)
+    scale_values = [value.strip() for value in detection_scales.split(",") if value.strip()] if detection_scales else None
 
     try:
-        options = ProcessingOptions(
+        return ProcessingOptions(
             fill_color=fill_color,
             opacity=opacity,
             shape=normalized_shape,
+            style=normalized_style,
+            blur_radius=blur_radius,
+            pixel_size=pixel_size,
             output_format=normalized_format,
+            encode_tier=cast(Optional[EncodeTier], encode_tier.lower() if encode_tier else None),
+            detection_mode=normalized_mode,
+            detection_scales=scale_values,
+            hint_regions=hint_regions,
+            trust_regions=trust_regions,
         )
     except ValidationError as exc:
         raise HTTPException(status_code=422, detail=exc.errors()) from exc
 
-    processed_records: list[ProcessedImage] = []
-    payloads: list[ProcessedPayload] = []
-
-    for upload in files:
-        data = await upload.read()
-        if not data:
-            raise HTTPException(status_code=400, detail=f"File '{upload.filename}' is empty.")
-
-        base_name = Path(upload.filename or "image").stem or "image"
-        original_suffix = Path(upload.filename or "").suffix.lstrip(".")
-        original_storage_name = make_storage_filename(base_name, original_suffix)
-        processed_storage_name = make_storage_filename(base_name, options.output_format.lower())
-        source_filename = upload.filename or original_storage_name
-
-        try:
-            processed_bytes, qr_count = process_image(data, source_filename, options)
-        except QRProcessingError as exc:
-            raise HTTPException(status_code=422, detail=str(exc)) from exc
-
-        persist_bytes(settings.storage_root / "uploads", original_storage_name, data)
-        processed_path = persist_bytes(
-            settings.storage_root / "processed",
-            processed_storage_name,
-            processed_bytes,
-        )
 
-        log = ProcessLog(
-            original_filename=source_filename,
-            processed_filename=processed_path.name,
-            qr_count=qr_count,
-            fill_color=options.fill_color,
-            fill_shape=options.shape,
-            opacity=options.opacity,
-            output_format=options.output_format,
-        )
-        db.add(log)
-        db.commit()
-
-        processed_records.append(
-            ProcessedImage(
-                original_filename=source_filename,
-                processed_filename=processed_path.name,
-                qr_count=qr_count,
-            ),
-        )
-        payloads.append(
-            ProcessedPayload(
-                data=processed_bytes,
-                filename=processed_storage_name,
-                content_type="image/png" if options.output_format == "PNG" else "image/jpeg",
-            ),
+def client_key(request: Request) -> str:
+    """Identify the caller for per-client admission budgets."""
+    if settings.admission_client_header:
+        value = request.headers.get(settings.admission_client_header)
+        if value:
+            return value.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+@router.post("/process", summary="Detect QR codes and mask them in uploaded images")
+async def process_images(
+    request: Request,
+    files: list[UploadFile] = File(..., description="Images containing QR codes."),
+    options: ProcessingOptions = Depends(parse_processing_options),
+) -> Response:
+    if not files:
+        raise HTTPException(status_code=400, detail="At least one image must be provided.")
+
+    ingested = []
+    try:
+        for upload in files:
+            started = time.perf_counter()
+            ingested.append(await run_in_threadpool(ingest_upload, upload.filename, upload.file))
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="upload_read")
+    except UploadRejectedError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+
+    # Uploads are only header-probed so far, so shedding here avoids any decode work.
+    try:
+        async with admission_controller.admit(client_key(request), estimate_cost(ingested)):
+            BYTES_IN_TOTAL.inc(sum(upload.size for upload in ingested))
+            limiter = asyncio.Semaphore(settings.batch_parallelism)
+            outcomes = await asyncio.gather(*(process_upload(upload, options, limiter) for upload in ingested))
+    except AdmissionRejectedError as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+    if len(outcomes) == 1 and outcomes[0].payload is None:
+        failed = outcomes[0]
+        raise HTTPException(status_code=failed.status_code, detail=failed.record.error)
+    if all(outcome.payload is None for outcome in outcomes):
+        raise HTTPException(
+            status_code=422,
+            detail=[outcome.record.dict(include={"original_filename", "error"}) for outcome in outcomes],
         )
 
-    archive_name: str | None = None
-    if len(payloads) == 1:
+    processed_records = [outcome.record for outcome in outcomes]
+    payloads = [outcome.payload for outcome in outcomes if outcome.payload is not None]
+    log_writer.submit(log_rows(outcomes, options))
+
+    if len(outcomes) == 1:
         payload = payloads[0]
-        content = payload.data
-        media_type = payload.content_type
-        download_name = payload.filename
-    else:
-        archive_name = make_storage_filename("qr-cut", "zip")
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as archive:
-            for item in payloads:
-                archive.writestr(item.filename, item.data)
-        content = zip_buffer.getvalue()
-        media_type = "application/zip"
-        download_name = archive_name
+        content = payload.read()
+        close_payloads(payloads)
+        response_payload = ProcessResponse(images=processed_records)
+        return Response(
+            content=content,
+            media_type=payload.content_type,
+            headers=response_headers(payload.filename, response_payload),
+        )
 
+    archive_name = make_storage_filename("qr-cut", "zip")
     response_payload = ProcessResponse(images=processed_records, archive=archive_name)
-    headers = {
-        "Content-Disposition": f"attachment; filename=\"{download_name}\"",
-        "X-QR-Cut-Metadata": build_metadata_header(response_payload.dict()),
-    }
-
-    return Response(content=content, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        stream_archive(payloads),
+        media_type="application/zip",
+        headers=response_headers(archive_name, response_payload),
+    )
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter
+
+from ..services.admission import admission_controller
+from ..services.detection_cache import detection_cache
+from ..services.detectors import detector_chain
+from ..services.executor import processing_pool
+from ..services.jobs import job_queue
+from ..services.log_writer import log_writer
+from ..services.result_cache import result_cache
+from ..services.retention import retention_sweeper
+from ..services.storage import storage
+from ..services.warmup import warmup
+
+router = APIRouter(prefix="/api", tags=["stats"])
+
+
+@router.get("/stats", summary="Runtime counters for the processing subsystems")
+def get_stats() -> dict[str, Any]:
+    return {
+        "admission": admission_controller.stats(),
+        "processing_pool": processing_pool.stats(),
+        "result_cache": result_cache.stats(),
+        "detection_cache": detection_cache.stats(),
+        "detectors": detector_chain.stats(),
+        "log_writer": log_writer.stats(),
+        "storage": storage.stats(),
+        "retention": retention_sweeper.stats(),
+        "jobs": job_queue.stats(),
+        "warmup": warmup.stats(),
+    }
@@ -1,21 +1,62 @@
 from __future__ import annotations
 
+import json
+import math
 from datetime import datetime
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, validator
 
 
 ColorString = str
-Shape = Literal["rectangle", "ellipse"]
-OutputFormat = Literal["PNG", "JPEG"]
+# Far beyond any decodable image side; keeps hint geometry inside OpenCV's int32 range.
+MAX_HINT_COORDINATE = 1_000_000.0
+Shape = Literal["rectangle", "ellipse", "polygon"]
+MaskStyle = Literal["fill", "blur", "pixelate"]
+OutputFormat = Literal["PNG", "JPEG", "WEBP"]
+EncodeTier = Literal["fast", "balanced", "small"]
+DetectionMode = Literal["full", "pyramid"]
+Polygon = List[List[float]]
 
 
 class ProcessingOptions(BaseModel):
     fill_color: ColorString = Field("#000000", description="Color used to mask QR regions.")
     opacity: float = Field(1.0, ge=0.0, le=1.0, description="Mask opacity between 0 and 1.")
-    shape: Shape = Field("rectangle", description="Mask shape.")
+    shape: Shape = Field("rectangle", description="Mask shape; polygon follows the detected corners.")
+    style: MaskStyle = Field("fill", description="How the masked area is rendered.")
+    blur_radius: Optional[int] = Field(
+        None,
+        ge=1,
+        le=255,
+        description="Gaussian blur radius in pixels; derived from the region size when omitted.",
+    )
+    pixel_size: Optional[int] = Field(
+        None,
+        ge=2,
+        le=512,
+        description="Pixelation block size in pixels; derived from the region size when omitted.",
+    )
     output_format: OutputFormat = Field("PNG", description="Output image format.")
+    encode_tier: Optional[EncodeTier] = Field(
+        None,
+        description="Encoder speed/size trade-off; defaults to the server setting.",
+    )
+    detection_mode: Optional[DetectionMode] = Field(
+        None,
+        description="Detection strategy; defaults to the server setting.",
+    )
+    detection_scales: Optional[List[float]] = Field(
+        None,
+        description="Downscale factors tried in order by the pyramid detector before full resolution.",
+    )
+    hint_regions: Optional[List[Polygon]] = Field(
+        None,
+        description=(
+            "Polygons ([[x, y], ...], two points for a box) where QR codes are expected. Detection searches "
+            "the padded hints first and falls back to the whole image when nothing is found there."
+        ),
+    )
+    trust_regions: bool = Field(False, description="Mask hint_regions as given and skip detection entirely.")
 
     @validator("fill_color")
     def validate_fill_color(cls, value: str) -> str:  # noqa: N805
@@ -23,11 +64,114 @@ class ProcessingOptions(BaseModel):
             raise ValueError("fill_color must not be empty")
         return value
 
+    @validator("hint_regions", pre=True)
+    def parse_hint_regions(cls, value: object) -> object:  # noqa: N805
+        if isinstance(value, str):
+            try:
+                return json.loads(value) if value.strip() else None
+            except ValueError as exc:
+                raise ValueError("hint_regions must be a JSON list of polygons") from exc
+        return value
+
+    @validator("hint_regions")
+    def validate_hint_regions(cls, value: Optional[List[Polygon]]) -> Optional[List[Polygon]]:  # noqa: N805
+        if value is None:
+            return value
+        for polygon in value:
+            if len(polygon) < 2 or any(len(point) != 2 for point in polygon):
+                raise ValueError("each hint region needs at least two [x, y] points")
+            # JSON parsing accepts NaN and Infinity, which the geometry code cannot handle.
+            coordinates = [coordinate for point in polygon for coordinate in point]
+            if not all(math.isfinite(number) and abs(number) <= MAX_HINT_COORDINATE for number in coordinates):
+                raise ValueError(f"hint coordinates must be finite and within +/-{MAX_HINT_COORDINATE:g}")
+        return value
+
+    @validator("trust_regions")
+    def validate_trust_regions(cls, value: bool, values: dict) -> bool:  # noqa: N805
+        if value and not values.get("hint_regions"):
+            raise ValueError("trust_regions requires hint_regions")
+        return value
+
+    @validator("detection_scales")
+    def validate_detection_scales(cls, value: Optional[List[float]]) -> Optional[List[float]]:  # noqa: N805
+        if value is None:
+            return value
+        if not value:
+            raise ValueError("detection_scales must not be empty")
+        if any(scale <= 0.0 or scale > 1.0 for scale in value):
+            raise ValueError("detection_scales must be between 0 (exclusive) and 1")
+        return value
+
+
+class TileReport(BaseModel):
+    x: int
+    y: int
+    width: int
+    height: int
+    duration_ms: float
+    regions: int
+
+
+class TileSummary(BaseModel):
+    count: int
+    total_ms: float
+    max_ms: float
+
 
 class ProcessedImage(BaseModel):
     original_filename: str
-    processed_filename: str
-    qr_count: int
+    processed_filename: Optional[str] = None
+    qr_count: int = 0
+    detection_strategy: Optional[str] = None
+    cached: bool = Field(default=False, description="Whether the output was served from the result cache.")
+    detection_cached: bool = Field(default=False, description="Whether detection was reused from the detection cache.")
+    passthrough: bool = Field(default=False, description="Whether the original bytes were returned unchanged.")
+    frames: Optional[int] = Field(default=None, description="Frame count for animations, multi-page images and video.")
+    keyframes: Optional[int] = Field(default=None, description="Frames that ran full detection; the rest were tracked.")
+    audio_dropped: bool = Field(
+        default=False,
+        description="Whether the input video had an audio track; masked MP4 output is video only.",
+    )
+    tiles: Optional[TileSummary] = Field(
+        default=None,
+        description="Tile count and timings when tiled detection was used; per-tile timings are on /metrics.",
+    )
+    timings_ms: Optional[Dict[str, float]] = Field(default=None, description="Wall time per pipeline stage.")
+    peak_bytes: Optional[Dict[str, int]] = Field(
+        default=None,
+        description="Peak traced allocations per pipeline stage when memory profiling is enabled.",
+    )
+    error: Optional[str] = Field(default=None, description="Reason the image could not be processed.")
+
+
+class BoundingBox(BaseModel):
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class DetectedRegion(BaseModel):
+    points: List[List[float]] = Field(..., description="Polygon corners in image pixel coordinates.")
+    bbox: BoundingBox
+    data: Optional[str] = Field(default=None, description="Decoded payload when the code could be read.")
+
+
+class DetectedImage(BaseModel):
+    original_filename: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    qr_count: int = 0
+    regions: List[DetectedRegion] = Field(default_factory=list)
+    detection_strategy: Optional[str] = None
+    detection_cached: bool = False
+    tiles: Optional[List[TileReport]] = None
+    timings_ms: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+
+
+class DetectResponse(BaseModel):
+    images: List[DetectedImage]
 
 
 class ProcessResponse(BaseModel):
@@ -51,3 +195,33 @@ class ProcessLogEntry(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class LogStatsBucket(BaseModel):
+    bucket: str
+    images: int
+    qr_total: int
+    images_with_qr: int
+
+
+JobState = Literal["queued", "running", "completed", "failed"]
+
+
+class JobItemStatus(BaseModel):
+    position: int
+    original_filename: Optional[str] = None
+    status: JobState
+    result: Optional[ProcessedImage] = None
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: JobState
+    total: int
+    completed: int = 0
+    failed: int = 0
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result_url: Optional[str] = Field(default=None, description="Download location once the job has finished.")
+    items: List[JobItemStatus] = Field(default_factory=list)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Sequence
+
+from ..config import settings
+from ..utils.metrics import ADMISSION_REJECTIONS_TOTAL
+from .ingestion import IngestedUpload
+
+# Compressed images average roughly 0.25 bytes per pixel, which prices uploads
+# whose header gives no dimensions (video, unreadable files) by their size.
+_BYTES_PER_UNKNOWN_MEGAPIXEL = 250_000
+_MIN_FILE_COST = 0.1
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request does not fit the admission budgets."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def estimate_cost(uploads: Sequence[IngestedUpload]) -> float:
+    """Cost of a request in megapixels, from the header-probed dimensions."""
+    total = 0.0
+    for upload in uploads:
+        megapixels = upload.megapixels or upload.size / _BYTES_PER_UNKNOWN_MEGAPIXEL
+        total += max(_MIN_FILE_COST, megapixels)
+    return total
+
+
+@dataclass
+class _Usage:
+    requests: int = 0
+    cost: float = 0.0
+
+
+@dataclass
+class _Waiter:
+    cost: float
+    future: "asyncio.Future[None]"
+
+
+class AdmissionController:
+    """Bounds concurrent requests and their summed cost, globally and per client.
+
+    A request over its client's budget is rejected at once with 429. A request
+    over the global budget waits in a FIFO queue for up to ``queue_timeout``
+    seconds and is rejected with 503 when the queue is full or the wait expires.
+    A request is always admitted when nothing else is running, so one upload
+    larger than the budget still goes through on an idle server. A zero limit
+    disables that check.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        max_requests: int,
+        max_cost: float,
+        client_max_requests: int,
+        client_max_cost: float,
+        queue_size: int,
+        queue_timeout: float,
+        retry_after: int,
+    ) -> None:
+        self.enabled = enabled
+        self.max_requests = max_requests
+        self.max_cost = max_cost
+        self.client_max_requests = client_max_requests
+        self.client_max_cost = client_max_cost
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._active = _Usage()
+        self._clients: Dict[str, _Usage] = {}
+        self._waiters: Deque[_Waiter] = deque()
+        self._counters = {"admitted": 0, "queued": 0, "rejected_client": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            enabled=settings.admission_enabled,
+            max_requests=settings.admission_max_requests,
+            max_cost=settings.admission_max_cost,
+            client_max_requests=settings.admission_client_max_requests,
+            client_max_cost=settings.admission_client_max_cost,
+            queue_size=settings.admission_queue_size,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+            retry_after=settings.admission_retry_after_seconds,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._counters,
+            "enabled": self.enabled,
+            "active_requests": self._active.requests,
+            "active_cost": round(self._active.cost, 3),
+            "queue_depth": self.queue_depth,
+            "clients": len(self._clients),
+        }
+
+    @asynccontextmanager
+    async def admit(self, client: str, cost: float) -> AsyncIterator[None]:
+        if not self.enabled:
+            yield
+            return
+        await self.acquire(client, cost)
+        try:
+            yield
+        finally:
+            self.release(client, cost)
+
+    async def acquire(self, client: str, cost: float) -> None:
+        usage = self._clients.get(client, _Usage())
+        if not self._fits(usage, cost, self.client_max_requests, self.client_max_cost):
+            self._reject("rejected_client", "client", f"Client budget exceeded for '{client}', retry later.", 429)
+
+        if not self._waiters and self._fits(self._active, cost, self.max_requests, self.max_cost):
+            self._charge(client, cost)
+            self._start(cost)
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._reject("rejected_queue_full", "queue_full", "Server is at capacity, retry later.", 503)
+
+        # Waiting requests count against their client so one client cannot fill the queue.
+        self._charge(client, cost)
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._counters["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._waiters.remove(waiter)
+                waiter.future.cancel()
+                self._uncharge(client, cost)
+                self._reject("rejected_timeout", "timeout", "Timed out waiting for capacity, retry later.", 503)
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(client, cost)
+            else:
+                self._waiters.remove(waiter)
+                waiter.future.cancel()
+                self._uncharge(client, cost)
+            raise
+
+    def release(self, client: str, cost: float) -> None:
+        self._active.requests -= 1
+        self._active.cost = max(0.0, self._active.cost - cost)
+        self._uncharge(client, cost)
+        self._drain()
+
+    def _drain(self) -> None:
+        # Strict FIFO: a large request at the head is not starved by smaller ones behind it.
+        while self._waiters and self._fits(self._active, self._waiters[0].cost, self.max_requests, self.max_cost):
+            waiter = self._waiters.popleft()
+            self._start(waiter.cost)
+            waiter.future.set_result(None)
+
+    @staticmethod
+    def _fits(usage: _Usage, cost: float, max_requests: int, max_cost: float) -> bool:
+        if not usage.requests:
+            return True
+        if max_requests and usage.requests >= max_requests:
+            return False
+        return not max_cost or usage.cost + cost <= max_cost
+
+    def _start(self, cost: float) -> None:
+        self._active.requests += 1
+        self._active.cost += cost
+        self._counters["admitted"] += 1
+
+    def _charge(self, client: str, cost: float) -> None:
+        usage = self._clients.setdefault(client, _Usage())
+        usage.requests += 1
+        usage.cost += cost
+
+    def _uncharge(self, client: str, cost: float) -> None:
+        usage = self._clients.get(client)
+        if usage is None:
+            return
+        usage.requests -= 1
+        usage.cost = max(0.0, usage.cost - cost)
+        if usage.requests <= 0:
+            del self._clients[client]
+
+    def _reject(self, counter: str, reason: str, message: str, status_code: int) -> None:
+        self._counters[counter] += 1
+        ADMISSION_REJECTIONS_TOTAL.inc(reason=reason)
+        retry_after = self.retry_after
+        if status_code == 503 and self.queue_depth:
+            # Scale the hint with the backlog so rejected clients do not retry in lockstep.
+            retry_after = max(retry_after, math.ceil(self.queue_timeout * self.queue_depth / max(1, self.queue_size)))
+        raise AdmissionRejectedError(message, status_code, retry_after)
+
+
+admission_controller = AdmissionController.from_settings()
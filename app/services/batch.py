@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Sequence, cast
+
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..schemas import ProcessedImage, ProcessingOptions, TileSummary
+from ..utils.file_ops import make_storage_filename
+from ..utils.metrics import BYTES_OUT_TOTAL, ERRORS_TOTAL, IMAGES_TOTAL, REGIONS_TOTAL, STAGE_SECONDS, TILE_SECONDS
+from ..utils.zip_stream import ZipEntry, iter_zip
+from .encoders import CONTENT_TYPES, EXTENSIONS
+from .executor import PoolSaturatedError, processing_pool
+from .ingestion import IngestedUpload
+from .qr_processor import QRProcessingError, process_image
+from .result_cache import make_cache_key, result_cache
+from .storage import storage
+from .tiling import TileTiming
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProcessedPayload:
+    file: BinaryIO
+    size: int
+    filename: str
+    content_type: str
+
+    @classmethod
+    def spool(cls, data: bytes, filename: str, content_type: str) -> "ProcessedPayload":
+        buffer = tempfile.SpooledTemporaryFile(max_size=settings.payload_spool_bytes)
+        buffer.write(data)
+        return cls(file=cast(BinaryIO, buffer), size=len(data), filename=filename, content_type=content_type)
+
+    def read(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+
+
+@dataclass
+class UploadOutcome:
+    record: ProcessedImage
+    payload: Optional[ProcessedPayload] = None
+    status_code: int = 200
+
+
+def close_payloads(payloads: Iterable[ProcessedPayload]) -> None:
+    for payload in payloads:
+        payload.file.close()
+
+
+def timed_zip(entries: Iterable[ZipEntry]) -> Iterator[bytes]:
+    """Wrap :func:`iter_zip`, timing only the archive building and not the consumer."""
+    elapsed = 0.0
+    chunks = iter_zip(entries)
+    try:
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            elapsed += time.perf_counter() - started
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        STAGE_SECONDS.observe(elapsed, stage="zip")
+
+
+def stream_archive(payloads: List[ProcessedPayload]) -> Iterator[bytes]:
+    try:
+        yield from timed_zip(ZipEntry(item.filename, item.file, item.size) for item in payloads)
+    finally:
+        close_payloads(payloads)
+
+
+def _tile_summary(tiles: Sequence[TileTiming]) -> Optional[TileSummary]:
+    # Per-tile rows would make the metadata header grow with the image; they go to /metrics instead.
+    if not tiles:
+        return None
+    durations = [tile.duration_ms for tile in tiles]
+    return TileSummary(count=len(durations), total_ms=round(sum(durations), 3), max_ms=max(durations))
+
+
+def _failure(source_filename: str, error: str, status_code: int, reason: str) -> UploadOutcome:
+    ERRORS_TOTAL.inc(reason=reason)
+    IMAGES_TOTAL.inc(outcome="failed")
+    return UploadOutcome(
+        record=ProcessedImage(original_filename=source_filename, error=error),
+        status_code=status_code,
+    )
+
+
+def log_rows(outcomes: Iterable[UploadOutcome], options: ProcessingOptions) -> List[dict[str, Any]]:
+    return [
+        {
+            "original_filename": outcome.record.original_filename,
+            "processed_filename": outcome.record.processed_filename,
+            "qr_count": outcome.record.qr_count,
+            "fill_color": options.fill_color,
+            "fill_shape": options.shape,
+            "opacity": options.opacity,
+            "output_format": options.output_format,
+        }
+        for outcome in outcomes
+        if outcome.payload is not None
+    ]
+
+
+async def process_upload(
+    upload: IngestedUpload,
+    options: ProcessingOptions,
+    limiter: asyncio.Semaphore,
+) -> UploadOutcome:
+    """Process one ingested upload through the cache, worker pool and storage.
+
+    Every failure is reported on the returned outcome, so one bad image never
+    aborts the rest of a batch.
+    """
+    try:
+        return await _process_upload(upload, options, limiter)
+    except Exception as exc:  # noqa: BLE001 - reported per image
+        logger.exception("Processing %r failed", upload.filename)
+        message = f"Internal error while processing the image ({type(exc).__name__})."
+        return _failure(upload.filename or "image", message, 500, "internal")
+
+
+async def _process_upload(
+    upload: IngestedUpload,
+    options: ProcessingOptions,
+    limiter: asyncio.Semaphore,
+) -> UploadOutcome:
+    filename = upload.filename
+    base_name = Path(filename or "image").stem or "image"
+    original_suffix = Path(filename or "").suffix.lstrip(".")
+    original_storage_name = make_storage_filename(base_name, original_suffix)
+    source_filename = filename or original_storage_name
+
+    if not upload.size:
+        return _failure(source_filename, f"File '{filename}' is empty.", 400, "empty")
+    if not upload.valid:
+        return _failure(source_filename, "Invalid image data", 422, "invalid")
+
+    # The cache key also addresses the processed output in storage.
+    cache_key = make_cache_key(upload.digest, options)
+    result = None
+    if result_cache.enabled:
+        result = await run_in_threadpool(result_cache.get, cache_key)
+    cached = result is not None
+
+    async with limiter:
+        try:
+            if result is None:
+                result = await processing_pool.run(
+                    process_image,
+                    upload.source,
+                    source_filename,
+                    options,
+                    upload.digest,
+                )
+        except PoolSaturatedError as exc:
+            return _failure(source_filename, str(exc), 503, "saturated")
+        except QRProcessingError as exc:
+            return _failure(source_filename, str(exc), 422, "processing")
+    if result_cache.enabled and not cached:
+        await run_in_threadpool(result_cache.put, cache_key, result)
+    if not cached:
+        for stage, elapsed_ms in result.timings_ms.items():
+            STAGE_SECONDS.observe(elapsed_ms / 1000, stage=stage)
+        for tile in result.tiles:
+            TILE_SECONDS.observe(tile.duration_ms / 1000)
+
+    # Multi-frame inputs keep their container, so the output format comes from the result.
+    output_format = result.output_format or options.output_format
+    output_suffix = EXTENSIONS[output_format].lstrip(".") if result.output_format else output_format.lower()
+    processed_storage_name = make_storage_filename(base_name, output_suffix)
+
+    persist_started = time.perf_counter()
+    await asyncio.gather(
+        run_in_threadpool(
+            storage.store,
+            "uploads",
+            original_storage_name,
+            upload.digest,
+            original_suffix or (upload.format or "").lower(),
+            upload.source,
+        ),
+        run_in_threadpool(
+            storage.store,
+            "processed",
+            processed_storage_name,
+            cache_key,
+            output_suffix,
+            result.data,
+        ),
+    )
+    STAGE_SECONDS.observe(time.perf_counter() - persist_started, stage="persist")
+
+    payload = await run_in_threadpool(
+        ProcessedPayload.spool,
+        result.data,
+        processed_storage_name,
+        CONTENT_TYPES[output_format],
+    )
+    IMAGES_TOTAL.inc(outcome="cached" if cached else "processed")
+    REGIONS_TOTAL.inc(result.qr_count)
+    BYTES_OUT_TOTAL.inc(len(result.data))
+    return UploadOutcome(
+        record=ProcessedImage(
+            original_filename=source_filename,
+            processed_filename=processed_storage_name,
+            qr_count=result.qr_count,
+            detection_strategy=result.detection_strategy,
+            cached=cached,
+            detection_cached=result.detection_cached,
+            passthrough=result.passthrough,
+            frames=result.frames if result.output_format else None,
+            keyframes=result.keyframes if result.output_format else None,
+            audio_dropped=result.audio_dropped,
+            tiles=_tile_summary(result.tiles),
+            timings_ms=None if cached else result.timings_ms,
+            peak_bytes=None if cached else result.peak_bytes or None,
+        ),
+        payload=payload,
+    )
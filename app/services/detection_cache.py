@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from ..config import settings
+
+
+class DetectionCache:
+    """Bounded LRU cache with a TTL for detection results keyed by image content.
+
+    Entries are kept per worker process, so with the process pool backend each
+    worker warms its own cache.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0}
+
+    @classmethod
+    def from_settings(cls) -> "DetectionCache":
+        return cls(
+            max_entries=settings.detection_cache_entries,
+            ttl_seconds=settings.detection_cache_ttl_seconds,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def make_detection_key(content_digest: str, params: dict[str, Any]) -> str:
+    return f"{content_digest}:{json.dumps(params, sort_keys=True)}"
+
+
+detection_cache = DetectionCache.from_settings()
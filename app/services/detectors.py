@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ..config import settings
+from ..utils.lazy import lazy_import
+from ..utils.metrics import DETECTOR_SECONDS
+from .errors import QRProcessingError
+from .regions import QRRegion
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+
+@lru_cache(maxsize=None)
+def _pyzbar_decode() -> Optional[Callable[..., Any]]:
+    # pyzbar loads libzbar through ctypes on import, so it is only imported once a backend needs it.
+    try:
+        from pyzbar.pyzbar import decode
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return decode
+
+
+class Detector(ABC):
+    """A QR detection backend operating on grayscale images."""
+
+    name = "base"
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @abstractmethod
+    def detect(self, image: np.ndarray) -> List[QRRegion]:
+        ...
+
+
+class PyzbarDetector(Detector):
+    name = "pyzbar"
+
+    @classmethod
+    def available(cls) -> bool:
+        return _pyzbar_decode() is not None
+
+    def detect(self, image: np.ndarray) -> List[QRRegion]:
+        regions: List[QRRegion] = []
+        decode = _pyzbar_decode()
+        if decode is None:
+            return regions
+        try:
+            decoded = decode(image)
+        except Exception:  # pragma: no cover - pyzbar edge failures
+            return regions
+
+        for item in decoded:
+            polygon = getattr(item, "polygon", None)
+            if not polygon:
+                continue
+            points = np.array([(point.x, point.y) for point in polygon], dtype=np.float32)
+            if points.size:
+                payload = item.data.decode("utf-8", errors="replace") if item.data else None
+                regions.append(QRRegion(points=points, data=payload))
+        return regions
+
+
+class OpenCVDetector(Detector):
+    name = "opencv"
+
+    def __init__(self) -> None:
+        self._detector = self._create()
+
+    def _create(self) -> Any:
+        return cv2.QRCodeDetector()
+
+    def detect(self, image: np.ndarray) -> List[QRRegion]:
+        regions: List[QRRegion] = []
+        try:
+            ok, decoded, points, _ = self._detector.detectAndDecodeMulti(image)
+        except Exception as exc:  # pragma: no cover - OpenCV internal errors
+            raise QRProcessingError("Unable to run QR detection") from exc
+
+        if not ok or points is None:
+            return regions
+
+        payloads = list(decoded) if decoded is not None else []
+        for index, polygon in enumerate(points):
+            region = np.array(polygon, dtype=np.float32).reshape(-1, 2)
+            if region.size:
+                payload = payloads[index] if index < len(payloads) else None
+                regions.append(QRRegion(points=region, data=payload or None))
+        return regions
+
+
+class OpenCVArucoDetector(OpenCVDetector):
+    name = "opencv_aruco"
+
+    @classmethod
+    def available(cls) -> bool:
+        return hasattr(cv2, "QRCodeDetectorAruco")
+
+    def _create(self) -> Any:
+        return cv2.QRCodeDetectorAruco()
+
+
+DETECTORS: Dict[str, Callable[[], Detector]] = {
+    PyzbarDetector.name: PyzbarDetector,
+    OpenCVDetector.name: OpenCVDetector,
+    OpenCVArucoDetector.name: OpenCVArucoDetector,
+}
+
+
+def register_detector(name: str, factory: Callable[[], Detector]) -> None:
+    DETECTORS[name] = factory
+
+
+_local = threading.local()
+
+
+def get_detector(name: str) -> Detector:
+    """Return this thread's instance of a backend; OpenCV detectors are not thread-safe."""
+    instances: Optional[Dict[str, Detector]] = getattr(_local, "detectors", None)
+    if instances is None:
+        instances = _local.detectors = {}
+    detector = instances.get(name)
+    if detector is None:
+        detector = instances[name] = DETECTORS[name]()
+    return detector
+
+
+class BackendStats:
+    def __init__(self, smoothing: float) -> None:
+        self.smoothing = smoothing
+        self.calls = 0
+        self.hits = 0
+        self.total_ms = 0.0
+        self.recent_ms = 0.0
+        self.recent_hit_rate = 0.5
+
+    def record(self, elapsed_ms: float, found: bool) -> None:
+        self.calls += 1
+        self.hits += int(found)
+        self.total_ms += elapsed_ms
+        if self.calls == 1:
+            self.recent_ms = elapsed_ms
+        else:
+            self.recent_ms += self.smoothing * (elapsed_ms - self.recent_ms)
+        self.recent_hit_rate += self.smoothing * (float(found) - self.recent_hit_rate)
+
+    @property
+    def score(self) -> float:
+        """Expected hits per millisecond; higher runs earlier in the chain."""
+        return (self.recent_hit_rate + 0.01) / (self.recent_ms + 1.0)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.calls, 4) if self.calls else 0.0,
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "recent_ms": round(self.recent_ms, 3),
+            "recent_hit_rate": round(self.recent_hit_rate, 4),
+        }
+
+
+class DetectorChain:
+    """Runs named backends in order until one finds regions.
+
+    With ``adaptive`` enabled the order is re-ranked by each backend's recent
+    hit rate per millisecond once every backend has ``min_samples`` calls.
+    """
+
+    def __init__(self, names: Sequence[str], adaptive: bool, min_samples: int = 20, smoothing: float = 0.1) -> None:
+        unknown = [name for name in names if name not in DETECTORS]
+        if unknown:
+            raise ValueError(f"Unknown detector backends: {', '.join(unknown)}")
+        self.requested = list(names)
+        self.adaptive = adaptive
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+        self._names: Optional[List[str]] = None
+        self._stats: Dict[str, BackendStats] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def names(self) -> List[str]:
+        """Requested backends that are installed; probing imports them, so it waits for first use."""
+        if self._names is None:
+            available = [name for name in self.requested if getattr(DETECTORS[name], "available", lambda: True)()]
+            with self._lock:
+                if self._names is None:
+                    self._stats = {name: BackendStats(self.smoothing) for name in available}
+                    self._names = available
+        return self._names
+
+    @classmethod
+    def from_settings(cls) -> "DetectorChain":
+        return cls(names=settings.detector_backends, adaptive=settings.detector_adaptive)
+
+    def order(self) -> List[str]:
+        names = self.names
+        with self._lock:
+            if not self.adaptive or any(stats.calls < self.min_samples for stats in self._stats.values()):
+                return list(names)
+            return sorted(names, key=lambda name: self._stats[name].score, reverse=True)
+
+    def detect(self, image: np.ndarray) -> List[QRRegion]:
+        for name in self.order():
+            started = time.perf_counter()
+            regions = get_detector(name).detect(image)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            DETECTOR_SECONDS.observe(elapsed_ms / 1000, backend=name)
+            with self._lock:
+                self._stats[name].record(elapsed_ms, bool(regions))
+            if regions:
+                return regions
+        return []
+
+    def stats(self) -> dict[str, Any]:
+        order = self.order()
+        with self._lock:
+            backends = {name: stats.as_dict() for name, stats in self._stats.items()}
+        return {"order": order, "backends": backends}
+
+
+detector_chain = DetectorChain.from_settings()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from ..utils.lazy import lazy_import
+from .errors import QRProcessingError
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+CONTENT_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+    "TIFF": "image/tiff",
+    "MP4": "video/mp4",
+}
+EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp", "GIF": ".gif", "TIFF": ".tiff", "MP4": ".mp4"}
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    params: List[int] = field(default_factory=list)
+    # Pillow save options; when set the image is encoded through Pillow instead of OpenCV.
+    pillow: Optional[Dict[str, Any]] = None
+
+
+@lru_cache(maxsize=None)
+def encoder_profiles() -> Dict[str, Dict[str, EncoderProfile]]:
+    """Speed/size tiers per format; "balanced" matches the historical output settings.
+
+    WebP goes through Pillow, which exposes libwebp's ``method`` (0 fastest,
+    6 smallest); OpenCV only sets quality.
+    """
+    return {
+        "PNG": {
+            "fast": EncoderProfile([cv2.IMWRITE_PNG_COMPRESSION, 1]),
+            "balanced": EncoderProfile([cv2.IMWRITE_PNG_COMPRESSION, 6]),
+            "small": EncoderProfile([cv2.IMWRITE_PNG_COMPRESSION, 9]),
+        },
+        "JPEG": {
+            "fast": EncoderProfile([cv2.IMWRITE_JPEG_QUALITY, 85]),
+            "balanced": EncoderProfile(
+                [cv2.IMWRITE_JPEG_QUALITY, 95, cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420],
+            ),
+            "small": EncoderProfile(
+                [
+                    cv2.IMWRITE_JPEG_QUALITY,
+                    80,
+                    cv2.IMWRITE_JPEG_PROGRESSIVE,
+                    1,
+                    cv2.IMWRITE_JPEG_OPTIMIZE,
+                    1,
+                    cv2.IMWRITE_JPEG_SAMPLING_FACTOR,
+                    cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+                ],
+            ),
+        },
+        "WEBP": {
+            "fast": EncoderProfile(pillow={"quality": 80, "method": 0}),
+            "balanced": EncoderProfile(pillow={"quality": 90, "method": 4}),
+            "small": EncoderProfile(pillow={"quality": 75, "method": 6}),
+        },
+    }
+
+
+def sniff_format(raw: bytes) -> Optional[str]:
+    """Identify PNG, JPEG and WebP payloads from their magic bytes."""
+    if raw.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if raw.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if raw[:4] == b"RIFF" and raw[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+def encode_image(pixels: np.ndarray, output_format: str, tier: str = "balanced") -> bytes:
+    try:
+        profile = encoder_profiles()[output_format][tier]
+    except KeyError as exc:
+        raise QRProcessingError(f"Unsupported encoder settings: {output_format}/{tier}") from exc
+    if profile.pillow is not None:
+        return _encode_pillow(pixels, output_format, profile.pillow)
+    ok, encoded = cv2.imencode(EXTENSIONS[output_format], pixels, profile.params)
+    if not ok:
+        raise QRProcessingError(f"Unable to encode image as {output_format}")
+    return encoded.tobytes()
+
+
+def _encode_pillow(pixels: np.ndarray, output_format: str, options: Dict[str, Any]) -> bytes:
+    rgb = pixels if pixels.ndim == 2 else cv2.cvtColor(pixels, cv2.COLOR_BGR2RGB)
+    buffer = io.BytesIO()
+    try:
+        Image.fromarray(rgb).save(buffer, format=output_format, **options)
+    except (OSError, ValueError) as exc:
+        raise QRProcessingError(f"Unable to encode image as {output_format}") from exc
+    return buffer.getvalue()
+
+
+def content_type_for(filename: str) -> str:
+    suffix = "." + filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    for output_format, extension in EXTENSIONS.items():
+        if extension == suffix:
+            return CONTENT_TYPES[output_format]
+    return "application/octet-stream"
@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+
+class QRProcessingError(Exception):
+    """Raised when an image cannot be processed."""
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from ..config import settings
+
+T = TypeVar("T")
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the processing pool queue is full."""
+
+
+class ProcessingPool:
+    """Runs CPU-bound work off the event loop with bounded concurrency.
+
+    At most ``max_in_flight`` calls are submitted to the underlying executor at
+    once; up to ``queue_size`` further callers may wait for a slot before new
+    work is rejected with :class:`PoolSaturatedError`.
+    """
+
+    def __init__(self, backend: str, workers: int, max_in_flight: int, queue_size: int) -> None:
+        self.backend = backend
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_in_flight = max_in_flight or self.workers
+        self.queue_size = queue_size
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._waiting = 0
+
+    @classmethod
+    def from_settings(cls) -> "ProcessingPool":
+        return cls(
+            backend=settings.processing_backend,
+            workers=settings.processing_workers,
+            max_in_flight=settings.processing_max_in_flight,
+            queue_size=settings.processing_queue_size,
+        )
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.backend == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qr-cut-worker")
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    def shutdown(self, wait: bool = True) -> None:
+        executor, self._executor = self._executor, None
+        self._semaphore = None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "max_in_flight": self.max_in_flight,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+        }
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            self.start()
+        semaphore = self._semaphore
+        assert semaphore is not None and self._executor is not None
+
+        if semaphore.locked() and self._waiting >= self.queue_size:
+            raise PoolSaturatedError("Processing queue is full, retry later.")
+
+        self._waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._in_flight -= 1
+            semaphore.release()
+
+
+processing_pool = ProcessingPool.from_settings()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import warnings
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Union
+
+from ..config import settings
+from ..utils.lazy import lazy_import
+
+Image = lazy_import("PIL.Image")
+
+ImageSource = Union[bytes, BinaryIO]
+
+_DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadRejectedError(Exception):
+    """Raised when an upload exceeds the configured ingestion limits."""
+
+    def __init__(self, message: str, status_code: int = 413) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class IngestedUpload:
+    filename: Optional[str]
+    source: ImageSource
+    size: int
+    digest: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    format: Optional[str] = None
+
+    @property
+    def valid(self) -> bool:
+        return self.format is not None
+
+    @property
+    def megapixels(self) -> float:
+        return (self.width or 0) * (self.height or 0) / 1_000_000
+
+
+def _file_size(stream: BinaryIO) -> int:
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def _stream_digest(stream: BinaryIO) -> str:
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(_DIGEST_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _probe_header(stream: BinaryIO) -> tuple[Optional[int], Optional[int], Optional[str]]:
+    """Read dimensions and format from the image header without decoding pixels."""
+    stream.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            with Image.open(stream) as image:
+                width, height = image.size
+                image_format = image.format
+    except Image.DecompressionBombError as exc:
+        raise UploadRejectedError("Image dimensions exceed the decoder safety limit.") from exc
+    except Exception:
+        # Pillow cannot open video; accept ISO-BMFF (MP4) by its ftyp box and let the decoder check it.
+        head = stream.read(12)
+        return None, None, "MP4" if head[4:8] == b"ftyp" else None
+    finally:
+        stream.seek(0)
+    return width, height, image_format
+
+
+def ingest_upload(filename: Optional[str], stream: BinaryIO) -> IngestedUpload:
+    """Validate an uploaded file against size and pixel limits before any decoding.
+
+    Raises :class:`UploadRejectedError` for over-limit files. Files whose header
+    cannot be parsed are returned with ``valid`` set to ``False`` so the caller
+    can report them per image.
+    """
+    size = _file_size(stream)
+    if settings.max_upload_bytes and size > settings.max_upload_bytes:
+        raise UploadRejectedError(
+            f"File '{filename}' is {size} bytes, above the {settings.max_upload_bytes} byte limit.",
+        )
+
+    width, height, image_format = _probe_header(stream) if size else (None, None, None)
+    if width is not None and height is not None and settings.max_image_megapixels:
+        megapixels = width * height / 1_000_000
+        if megapixels > settings.max_image_megapixels:
+            raise UploadRejectedError(
+                f"File '{filename}' is {megapixels:.1f} MP, above the {settings.max_image_megapixels} MP limit.",
+            )
+
+    # Worker processes cannot share the spooled upload, so they get a bytes copy.
+    source: ImageSource = stream
+    if settings.processing_backend == "process":
+        source = stream.read()
+        stream.seek(0)
+
+    return IngestedUpload(
+        filename=filename,
+        source=source,
+        size=size,
+        digest=_stream_digest(stream),
+        width=width,
+        height=height,
+        format=image_format,
+    )
+
+
+def configure_decoder_limits() -> None:
+    """Align Pillow's decompression-bomb guard with the configured pixel limit."""
+    if settings.max_image_megapixels:
+        Image.MAX_IMAGE_PIXELS = int(settings.max_image_megapixels * 1_000_000)
@@ -0,0 +1,428 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Job, JobItem
+from ..schemas import JobItemStatus, JobStatus, ProcessedImage, ProcessingOptions
+from ..utils.file_ops import make_storage_filename
+from ..utils.zip_stream import ZipEntry
+from .batch import UploadOutcome, close_payloads, log_rows, process_upload, timed_zip
+from .encoders import content_type_for
+from .ingestion import ingest_upload
+from .log_writer import log_writer
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("completed", "failed")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobQueue:
+    """Durable batch queue stored in SQLite and drained by in-process asyncio workers.
+
+    Inputs are written under ``<root>/<job id>/inputs`` at submission and each
+    finished image under ``outputs``, so a restart resumes unfinished jobs from
+    the first unprocessed image.
+
+    A claimed job carries its worker's ``owner`` id and a lease that a
+    heartbeat renews while the job runs. Only jobs whose lease has expired are
+    taken over, so several processes can share one database without running
+    the same job twice.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        root: Path,
+        workers: int,
+        poll_interval: float,
+        lease_seconds: float = 60.0,
+        saturated_retries: int = 0,
+        retry_backoff: float = 0.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.root = root
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.saturated_retries = saturated_retries
+        self.retry_backoff = retry_backoff
+        self.owner = uuid.uuid4().hex
+        self._tasks: List[asyncio.Task[None]] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "purged": 0}
+
+    @classmethod
+    def from_settings(cls) -> "JobQueue":
+        return cls(
+            session_factory=SessionLocal,
+            root=settings.storage_root / "jobs",
+            workers=settings.job_workers,
+            poll_interval=settings.job_poll_interval_seconds,
+            lease_seconds=settings.job_lease_seconds,
+            saturated_retries=settings.job_saturated_retries,
+            retry_backoff=settings.job_retry_backoff_seconds,
+        )
+
+    def job_dir(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    def submit(self, uploads: Sequence[Tuple[Optional[str], BinaryIO]], options: ProcessingOptions) -> str:
+        """Persist the inputs and enqueue a job; returns the job id."""
+        job_id = uuid.uuid4().hex
+        inputs_dir = self.job_dir(job_id) / "inputs"
+        inputs_dir.mkdir(parents=True, exist_ok=True)
+        for position, (_, stream) in enumerate(uploads):
+            stream.seek(0)
+            with (inputs_dir / str(position)).open("wb") as target:
+                shutil.copyfileobj(stream, target)
+
+        session = self.session_factory()
+        try:
+            session.add(Job(id=job_id, status="queued", options=options.json(), total=len(uploads)))
+            session.add_all(
+                JobItem(job_id=job_id, position=position, original_filename=filename, status="queued")
+                for position, (filename, _) in enumerate(uploads)
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            raise
+        finally:
+            session.close()
+
+        self._counters["submitted"] += 1
+        self.notify()
+        return job_id
+
+    def notify(self) -> None:
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        session = self.session_factory()
+        try:
+            job = session.get(Job, job_id)
+            if job is None:
+                return None
+            items = session.scalars(
+                select(JobItem).where(JobItem.job_id == job_id).order_by(JobItem.position),
+            ).all()
+        finally:
+            session.close()
+
+        item_states = [
+            JobItemStatus(
+                position=item.position,
+                original_filename=item.original_filename,
+                status=item.status,
+                result=ProcessedImage.parse_raw(item.record) if item.record else None,
+            )
+            for item in items
+        ]
+        return JobStatus(
+            job_id=job.id,
+            status=job.status,
+            total=job.total,
+            completed=sum(item.status == "completed" for item in items),
+            failed=sum(item.status == "failed" for item in items),
+            created_at=job.created_at,
+            finished_at=job.finished_at,
+            error=job.error,
+            result_url=f"/api/jobs/{job.id}/result" if job.result_filename else None,
+            items=item_states,
+        )
+
+    def result(self, job_id: str) -> Optional[Job]:
+        session = self.session_factory()
+        try:
+            return session.get(Job, job_id)
+        finally:
+            session.close()
+
+    def result_path(self, job: Job) -> Path:
+        return self.job_dir(job.id) / str(job.result_filename)
+
+    def purge(self, finished_before: datetime) -> int:
+        """Delete finished jobs and their files; returns the number of jobs removed."""
+        cutoff = finished_before.astimezone(timezone.utc).replace(tzinfo=None)
+        session = self.session_factory()
+        try:
+            job_ids = session.scalars(
+                select(Job.id).where(Job.status.in_(FINISHED_STATES), Job.finished_at < cutoff),
+            ).all()
+            for job_id in job_ids:
+                shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            if job_ids:
+                session.execute(delete(JobItem).where(JobItem.job_id.in_(job_ids)))
+                session.execute(delete(Job).where(Job.id.in_(job_ids)))
+                session.commit()
+        finally:
+            session.close()
+        self._counters["purged"] += len(job_ids)
+        return len(job_ids)
+
+    def start(self) -> None:
+        """Start the workers on the running loop; interrupted jobs are resumed once their lease expires."""
+        if self._tasks or not self.workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"qr-cut-job-worker-{index}") for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+        self._wake = None
+        if tasks:
+            # Hand unfinished jobs back right away instead of leaving them to lease expiry.
+            await run_in_threadpool(self._release)
+
+    def stats(self) -> dict[str, Any]:
+        session = self.session_factory()
+        try:
+            queued = session.query(Job).filter(Job.status == "queued").count()
+            running = session.query(Job).filter(Job.status == "running").count()
+        finally:
+            session.close()
+        return {**self._counters, "queued": queued, "running": running, "workers": len(self._tasks)}
+
+    async def _worker(self) -> None:
+        assert self._wake is not None
+        while True:
+            job_id = await run_in_threadpool(self._claim)
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            heartbeat = asyncio.create_task(self._heartbeat(job_id), name=f"qr-cut-job-heartbeat-{job_id}")
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("Job %s failed", job_id)
+                await run_in_threadpool(self._finish, job_id, None, None, str(exc))
+            finally:
+                heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await run_in_threadpool(self._renew, job_id):
+                logger.warning("Lost the lease on job %s", job_id)
+                return
+
+    def _lease_expiry(self) -> datetime:
+        return _utcnow() + timedelta(seconds=self.lease_seconds)
+
+    def _claim(self) -> Optional[str]:
+        # Running jobs without a lease predate leases and were interrupted.
+        claimable = or_(
+            Job.status == "queued",
+            and_(
+                Job.status == "running",
+                or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < _utcnow()),
+            ),
+        )
+        session = self.session_factory()
+        try:
+            job_id = session.scalars(
+                select(Job.id).where(claimable).order_by(Job.created_at, Job.id).limit(1),
+            ).first()
+            if job_id is None:
+                return None
+            claimed = session.execute(
+                update(Job)
+                .where(Job.id == job_id, claimable)
+                .values(status="running", owner=self.owner, lease_expires_at=self._lease_expiry()),
+            )
+            session.commit()
+            return job_id if claimed.rowcount else None
+        finally:
+            session.close()
+
+    def _renew(self, job_id: str) -> bool:
+        session = self.session_factory()
+        try:
+            renewed = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "running", Job.owner == self.owner)
+                .values(lease_expires_at=self._lease_expiry()),
+            )
+            session.commit()
+            return bool(renewed.rowcount)
+        finally:
+            session.close()
+
+    def _release(self) -> None:
+        session = self.session_factory()
+        try:
+            session.execute(
+                update(Job)
+                .where(Job.status == "running", Job.owner == self.owner)
+                .values(status="queued", owner=None, lease_expires_at=None),
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    async def _run(self, job_id: str) -> None:
+        job, items = await run_in_threadpool(self._load, job_id)
+        options = ProcessingOptions.parse_raw(job.options)
+        limiter = asyncio.Semaphore(settings.batch_parallelism)
+        pending = [item for item in items if item.status not in FINISHED_STATES]
+        await asyncio.gather(*(self._run_item(job_id, item, options, limiter) for item in pending))
+
+        items = (await run_in_threadpool(self._load, job_id))[1]
+        outputs = [item for item in items if item.status == "completed" and item.output_filename]
+        if not outputs:
+            await run_in_threadpool(self._finish, job_id, None, None, "No image could be processed.")
+            return
+        if job.total == 1:
+            result_filename = f"outputs/{outputs[0].output_filename}"
+            content_type = content_type_for(str(outputs[0].output_filename))
+        else:
+            result_filename = await run_in_threadpool(self._write_archive, job_id, outputs)
+            content_type = "application/zip"
+        await run_in_threadpool(self._finish, job_id, result_filename, content_type, None)
+
+    async def _run_item(
+        self,
+        job_id: str,
+        item: JobItem,
+        options: ProcessingOptions,
+        limiter: asyncio.Semaphore,
+    ) -> None:
+        source = (self.job_dir(job_id) / "inputs" / str(item.position)).open("rb")
+        try:
+            upload = await run_in_threadpool(ingest_upload, item.original_filename, source)
+            outcome = await process_upload(upload, options, limiter)
+            # A saturated pool is transient: back off and retry rather than failing the image for good.
+            for attempt in range(self.saturated_retries):
+                if outcome.status_code != 503:
+                    break
+                await asyncio.sleep(self.retry_backoff * 2**attempt)
+                outcome = await process_upload(upload, options, limiter)
+        except Exception as exc:  # noqa: BLE001 - recorded per image
+            outcome = UploadOutcome(
+                record=ProcessedImage(original_filename=item.original_filename or str(item.position), error=str(exc)),
+                status_code=500,
+            )
+        finally:
+            source.close()
+        await run_in_threadpool(self._record_item, job_id, item.id, outcome)
+        log_writer.submit(log_rows([outcome], options))
+
+    def _record_item(self, job_id: str, item_id: int, outcome: UploadOutcome) -> None:
+        output_filename = None
+        if outcome.payload is not None:
+            output_filename = outcome.payload.filename
+            outputs_dir = self.job_dir(job_id) / "outputs"
+            outputs_dir.mkdir(parents=True, exist_ok=True)
+            outcome.payload.file.seek(0)
+            with (outputs_dir / output_filename).open("wb") as target:
+                shutil.copyfileobj(outcome.payload.file, target)
+            close_payloads([outcome.payload])
+
+        session = self.session_factory()
+        try:
+            session.execute(
+                update(JobItem)
+                .where(JobItem.id == item_id)
+                .values(
+                    status="completed" if output_filename else "failed",
+                    record=outcome.record.json(),
+                    output_filename=output_filename,
+                ),
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def _write_archive(self, job_id: str, outputs: Sequence[JobItem]) -> str:
+        outputs_dir = self.job_dir(job_id) / "outputs"
+        archive_name = make_storage_filename("qr-cut", "zip")
+        handles = [(outputs_dir / str(item.output_filename)).open("rb") for item in outputs]
+        try:
+            entries = (
+                ZipEntry(str(item.output_filename), handle, (outputs_dir / str(item.output_filename)).stat().st_size)
+                for item, handle in zip(outputs, handles)
+            )
+            with (self.job_dir(job_id) / archive_name).open("wb") as target:
+                for chunk in timed_zip(entries):
+                    target.write(chunk)
+        finally:
+            for handle in handles:
+                handle.close()
+        return archive_name
+
+    def _load(self, job_id: str) -> Tuple[Job, List[JobItem]]:
+        session = self.session_factory()
+        try:
+            job = session.get(Job, job_id)
+            items = session.scalars(
+                select(JobItem).where(JobItem.job_id == job_id).order_by(JobItem.position),
+            ).all()
+            session.expunge_all()
+            return job, list(items)
+        finally:
+            session.close()
+
+    def _finish(
+        self,
+        job_id: str,
+        result_filename: Optional[str],
+        content_type: Optional[str],
+        error: Optional[str],
+    ) -> None:
+        status = "completed" if result_filename else "failed"
+        session = self.session_factory()
+        try:
+            # A worker that lost its lease must not overwrite the result of the one that took over.
+            finished = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.owner == self.owner)
+                .values(
+                    status=status,
+                    result_filename=result_filename,
+                    result_content_type=content_type,
+                    error=error,
+                    finished_at=_utcnow(),
+                    owner=None,
+                    lease_expires_at=None,
+                ),
+            )
+            session.commit()
+        finally:
+            session.close()
+        if finished.rowcount:
+            self._counters[status] += 1
+
+
+job_queue = JobQueue.from_settings()
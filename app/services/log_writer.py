@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import Base, SessionLocal
+from ..models import ProcessLog
+from ..utils.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+Row = Dict[str, Any]
+WriteRows = Callable[[Session, List[Row]], None]
+
+
+class BatchedRowWriter:
+    """Queues rows for ``model`` and writes them in bulk from a background thread.
+
+    A flush happens when ``batch_size`` rows are pending or ``flush_interval``
+    seconds have passed since the oldest pending row was queued. ``write``
+    replaces the plain bulk insert when a batch needs more than one statement;
+    it runs inside the flush transaction.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int,
+        flush_interval: float,
+        model: Type[Base],
+        name: str = "row-writer",
+        write: Optional[WriteRows] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.model = model
+        self.name = name
+        self.write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Row] = []
+        self._oldest: Optional[float] = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._counters = {"queued": 0, "written": 0, "failed": 0, "flushes": 0}
+
+    @classmethod
+    def from_settings(
+        cls,
+        model: Type[Base],
+        name: str = "row-writer",
+        write: Optional[WriteRows] = None,
+    ) -> "BatchedRowWriter":
+        return cls(
+            session_factory=SessionLocal,
+            batch_size=settings.log_batch_size,
+            flush_interval=settings.log_flush_interval_seconds,
+            model=model,
+            name=name,
+            write=write,
+        )
+
+    def start(self) -> None:
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=f"qr-cut-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def submit(self, rows: Iterable[Row]) -> None:
+        rows = list(rows)
+        if not rows:
+            return
+        if self._thread is None:
+            self.start()
+        with self._condition:
+            first_pending = self._oldest is None
+            if first_pending:
+                self._oldest = time.monotonic()
+            self._pending.extend(rows)
+            self._counters["queued"] += len(rows)
+            # Wake the writer to arm its interval timer or to flush a full batch.
+            if first_pending or len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    def flush(self) -> int:
+        """Write every pending row now; returns the number of rows written."""
+        with self._flush_lock:
+            with self._condition:
+                rows, self._pending = self._pending, []
+                self._oldest = None
+            if not rows:
+                return 0
+            started = time.perf_counter()
+            session = self.session_factory()
+            try:
+                if self.write is not None:
+                    self.write(session, rows)
+                else:
+                    session.execute(insert(self.model), rows)
+                session.commit()
+            except Exception:
+                session.rollback()
+                logger.exception("Dropping %d %s rows after a failed flush", len(rows), self.model.__tablename__)
+                with self._condition:
+                    self._counters["failed"] += len(rows)
+                return 0
+            finally:
+                session.close()
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="db_write")
+            with self._condition:
+                self._counters["written"] += len(rows)
+                self._counters["flushes"] += 1
+            return len(rows)
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            return {**self._counters, "pending": len(self._pending)}
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.batch_size or self._stopping:
+            return True
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._due() and not self._stopping:
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(0.0, self.flush_interval - (time.monotonic() - self._oldest))
+                    self._condition.wait(timeout)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+
+log_writer = BatchedRowWriter.from_settings(ProcessLog, name="log-writer")
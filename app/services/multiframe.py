@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import io
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from ..config import settings
+from ..schemas import ProcessingOptions
+from ..utils.lazy import lazy_import
+from .errors import QRProcessingError
+from .masking import mask_regions
+from .regions import QRRegion
+from .tracking import RegionTracker
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+ImageSequence = lazy_import("PIL.ImageSequence")
+TiffImagePlugin = lazy_import("PIL.TiffImagePlugin")
+
+MULTIFRAME_FORMATS = ("GIF", "TIFF", "MP4")
+
+# An MP4 ``hdlr`` box: version/flags and pre_defined, then the handler type.
+_SOUND_HANDLER = re.compile(rb"hdlr.{8}soun", re.DOTALL)
+
+Detect = Callable[["np.ndarray"], List[QRRegion]]
+
+
+def sniff_container(raw: bytes) -> Optional[str]:
+    """Identify containers that may hold more than one frame from their magic bytes."""
+    if raw[:6] in (b"GIF87a", b"GIF89a"):
+        return "GIF"
+    if raw[:4] in (b"II*\x00", b"MM\x00*"):
+        return "TIFF"
+    if raw[4:8] == b"ftyp":
+        return "MP4"
+    return None
+
+
+def has_audio_track(raw: bytes) -> bool:
+    """Whether an MP4 declares a sound track; OpenCV cannot carry it into the output."""
+    return _SOUND_HANDLER.search(raw) is not None
+
+
+def multiframe_format(raw: bytes) -> Optional[str]:
+    """Return the container format when ``raw`` is a video or holds several image frames."""
+    container = sniff_container(raw)
+    if container in (None, "MP4"):
+        return container
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            return container if getattr(image, "n_frames", 1) > 1 else None
+    except Exception:
+        return None
+
+
+@dataclass
+class FrameStats:
+    frames: int = 0
+    keyframes: int = 0
+    max_regions: int = 0
+    audio_dropped: bool = False
+
+
+class KeyframeDetector:
+    """Runs full detection on keyframes and tracks regions on the frames in between.
+
+    A keyframe is taken every ``interval`` frames, and earlier whenever the
+    tracker loses confidence in any region. While no region is being tracked
+    every frame is a keyframe, so a code that appears mid-clip is found on the
+    frame it appears.
+    """
+
+    def __init__(self, detect: Detect, interval: int, min_confidence: float, max_frames: int = 0) -> None:
+        self.detect = detect
+        self.interval = max(1, interval)
+        self.max_frames = max_frames
+        self.tracker = RegionTracker(min_confidence=min_confidence)
+        self.stats = FrameStats()
+        self._last_keyframe: Optional[int] = None
+
+    def regions_for(self, pixels: np.ndarray) -> List[QRRegion]:
+        index = self.stats.frames
+        if self.max_frames and index >= self.max_frames:
+            raise QRProcessingError(f"Input has more than {self.max_frames} frames.")
+        gray = cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY)
+
+        regions: Optional[List[QRRegion]] = None
+        if self.tracker.active and self._last_keyframe is not None and index - self._last_keyframe < self.interval:
+            regions = self.tracker.track(gray)
+        if regions is None:
+            regions = self.detect(gray)
+            self.tracker.reset(gray, regions)
+            self._last_keyframe = index
+            self.stats.keyframes += 1
+
+        self.stats.frames += 1
+        self.stats.max_regions = max(self.stats.max_regions, len(regions))
+        return regions
+
+
+def _masked_frames(image: Image.Image, detector: KeyframeDetector, options: ProcessingOptions) -> Iterator[Image.Image]:
+    for frame in ImageSequence.Iterator(image):
+        pixels = cv2.cvtColor(np.asarray(frame.convert("RGB")), cv2.COLOR_RGB2BGR)
+        mask_regions(pixels, detector.regions_for(pixels), options)
+        masked = Image.fromarray(cv2.cvtColor(pixels, cv2.COLOR_BGR2RGB))
+        if "duration" in frame.info:
+            masked.info["duration"] = frame.info["duration"]
+        yield masked
+
+
+def _process_image_frames(raw: bytes, container: str, detector: KeyframeDetector, options: ProcessingOptions) -> bytes:
+    buffer = io.BytesIO()
+    with Image.open(io.BytesIO(raw)) as image:
+        frames = _masked_frames(image, detector, options)
+        if container == "TIFF":
+            # Pillow's save_all collects every page first; appending keeps one decoded page alive at a time.
+            with TiffImagePlugin.AppendingTiffWriter(buffer) as writer:
+                for frame in frames:
+                    frame.save(writer, format="TIFF", compression="tiff_deflate")
+                    writer.newFrame()
+        else:
+            first = next(frames)
+            # Frames are produced lazily; the GIF writer still keeps earlier frames for its delta encoding.
+            first.save(buffer, format=container, save_all=True, append_images=frames, loop=image.info.get("loop", 0))
+    return buffer.getvalue()
+
+
+def _process_video(raw: bytes, detector: KeyframeDetector, options: ProcessingOptions) -> bytes:
+    # OpenCV's video I/O only works on paths, so the clip round-trips through a scratch directory.
+    with tempfile.TemporaryDirectory(prefix="qr-cut-video-") as workdir:
+        source = Path(workdir) / "input.mp4"
+        target = Path(workdir) / "output.mp4"
+        source.write_bytes(raw)
+        capture = cv2.VideoCapture(str(source))
+        if not capture.isOpened():
+            raise QRProcessingError("Invalid video data")
+        writer = None
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+            size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            writer = cv2.VideoWriter(str(target), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+            if not writer.isOpened():
+                raise QRProcessingError("Unable to encode video")
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                mask_regions(frame, detector.regions_for(frame), options)
+                writer.write(frame)
+        finally:
+            capture.release()
+            if writer is not None:
+                writer.release()
+        if not detector.stats.frames:
+            raise QRProcessingError("Invalid video data")
+        detector.stats.audio_dropped = has_audio_track(raw)
+        return target.read_bytes()
+
+
+def process_frames(raw: bytes, container: str, options: ProcessingOptions, detect: Detect) -> tuple[bytes, FrameStats]:
+    """Mask every frame of a GIF, TIFF or MP4 and re-encode it in the same container."""
+    detector = KeyframeDetector(
+        detect,
+        interval=settings.keyframe_interval,
+        min_confidence=settings.tracking_min_confidence,
+        max_frames=settings.max_frames,
+    )
+    if container == "MP4":
+        encoded = _process_video(raw, detector, options)
+    else:
+        encoded = _process_image_frames(raw, container, detector, options)
+    return encoded, detector.stats
@@ -1,130 +1,365 @@
 from __future__ import annotations
 
 import io
-from dataclasses import dataclass
-from typing import Any, Iterable, List, Tuple
-
-import cv2
-import numpy as np
-from PIL import Image, ImageColor, ImageDraw
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from ..config import settings
 from ..schemas import ProcessingOptions
+from ..utils.file_ops import content_digest as compute_digest
+from ..utils.lazy import lazy_import
+from ..utils.profiling import StageProfiler
+from .detection_cache import detection_cache, make_detection_key
+from .detectors import detector_chain
+from .encoders import encode_image, sniff_format
+from .errors import QRProcessingError
+from .ingestion import ImageSource
+from .masking import mask_regions
+from .multiframe import multiframe_format, process_frames
+from .regions import QRRegion
+from .tiling import TileTiming, detect_tiled, merge_regions, should_tile
 
-try:
-    from pyzbar.pyzbar import decode as pyzbar_decode
-except ImportError:  # pragma: no cover - optional dependency
-    pyzbar_decode = None
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
 
 
 @dataclass
-class QRRegion:
-    points: np.ndarray
+class DetectionResult:
+    regions: List[QRRegion]
+    strategy: str
+    tiles: List[TileTiming] = field(default_factory=list)
 
 
-class QRProcessingError(Exception):
-    """Raised when an image cannot be processed."""
+@dataclass
+class ProcessingResult:
+    data: bytes
+    qr_count: int
+    detection_strategy: str
+    tiles: List[TileTiming] = field(default_factory=list)
+    detection_cached: bool = False
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    peak_bytes: Dict[str, int] = field(default_factory=dict)
+    passthrough: bool = False
+    output_format: Optional[str] = None
+    frames: int = 1
+    keyframes: int = 0
+    audio_dropped: bool = False
 
 
-def _detect_with_pyzbar(image: np.ndarray) -> List[QRRegion]:
-    regions: List[QRRegion] = []
-    if pyzbar_decode is None:
-        return regions
-    try:
-        decoded = pyzbar_decode(image)
-    except Exception:  # pragma: no cover - pyzbar edge failures
-        return regions
+@dataclass
+class DetectionReport:
+    regions: List[QRRegion]
+    width: int
+    height: int
+    detection_strategy: str
+    tiles: List[TileTiming] = field(default_factory=list)
+    detection_cached: bool = False
+    timings_ms: Dict[str, float] = field(default_factory=dict)
 
-    for item in decoded:
-        polygon = getattr(item, "polygon", None)
-        if not polygon:
-            continue
-        points = np.array([(point.x, point.y) for point in polygon], dtype=np.float32)
-        if points.size:
-            regions.append(QRRegion(points=points))
+
+def _detect_full(image: np.ndarray) -> List[QRRegion]:
+    return detector_chain.detect(image)
+
+
+def _detect_at_scale(image: np.ndarray, scale: float) -> List[QRRegion]:
+    if scale >= 1.0:
+        return _detect_full(image)
+    resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    regions = _detect_full(resized)
+    for region in regions:
+        region.points = region.points / scale
     return regions
 
 
-def _detect_with_opencv(image: np.ndarray) -> List[QRRegion]:
-    regions: List[QRRegion] = []
-    detector = cv2.QRCodeDetector()
-    try:
-        ok, decoded, points, _ = detector.detectAndDecodeMulti(image)
-    except Exception as exc:  # pragma: no cover - OpenCV internal errors
-        raise QRProcessingError("Unable to run QR detection") from exc
+def resolve_scale_ladder(shape: Sequence[int], scales: Sequence[float]) -> List[float]:
+    """Return the ascending scales worth trying for an image, ending at full resolution."""
+    longest = max(shape[0], shape[1])
+    ladder = sorted({scale for scale in scales if 0.0 < scale < 1.0 and longest * scale >= settings.pyramid_min_side})
+    ladder.append(1.0)
+    return ladder
 
-    if not ok or points is None:
-        return regions
 
-    for polygon in points:
-        region = np.array(polygon, dtype=np.float32).reshape(-1, 2)
-        if region.size:
-            regions.append(QRRegion(points=region))
-    return regions
+def _blank_regions(image: np.ndarray, regions: Sequence[QRRegion]) -> np.ndarray:
+    """Copy of ``image`` with each region's padded bounding box painted white."""
+    blanked = image.copy()
+    height, width = image.shape[:2]
+    for region in regions:
+        (min_x, min_y), (max_x, max_y) = region.points.min(axis=0), region.points.max(axis=0)
+        padding = settings.hint_padding_ratio * max(max_x - min_x, max_y - min_y)
+        x0, y0 = max(0, int(min_x - padding)), max(0, int(min_y - padding))
+        x1, y1 = min(width, int(max_x + padding) + 1), min(height, int(max_y + padding) + 1)
+        blanked[y0:y1, x0:x1] = 255
+    return blanked
+
+
+def detect_qr_regions(image: np.ndarray, scales: Optional[Sequence[float]] = None) -> List[QRRegion]:
+    """Detect QR codes, optionally searching downscaled copies first.
+
+    With ``scales`` the image is searched from the smallest scale upwards and the
+    first level where every region decodes is returned. Codes decoded at a
+    coarser level are blanked out before the next one, so finer levels only
+    search what is left. A code too small to resolve at the level that stopped
+    the search is missed unless ``pyramid_full_pass`` adds a full-resolution
+    pass over the rest of the image. Points are always in full-resolution
+    coordinates.
+    """
+    if not scales:
+        return _detect_full(image)
+
+    found: List[QRRegion] = []
+    for scale in resolve_scale_ladder(image.shape, scales):
+        decoded = [region for region in found if region.decoded]
+        search = _blank_regions(image, decoded) if decoded else image
+        # Undecoded coarse hits stay as candidates; a decoded hit at a finer level replaces them.
+        found = merge_regions([*found, *_detect_at_scale(search, scale)], settings.tile_iou_threshold)
+        if found and all(region.decoded for region in found):
+            if scale < 1.0 and settings.pyramid_full_pass:
+                rest = _detect_full(_blank_regions(image, found))
+                found = merge_regions([*found, *rest], settings.tile_iou_threshold)
+            return found
+    return found
+
+
+def _detection_scales(options: ProcessingOptions) -> Optional[List[float]]:
+    mode = options.detection_mode or settings.detection_mode
+    if mode != "pyramid":
+        return None
+    return options.detection_scales or settings.detection_scales
+
+
+def hint_polygons(options: ProcessingOptions) -> List[np.ndarray]:
+    """Client hints as float32 polygons; two-point hints become axis-aligned boxes."""
+    polygons = []
+    for hint in options.hint_regions or []:
+        points = np.asarray(hint, dtype=np.float32).reshape(-1, 2)
+        if len(points) == 2:
+            (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+            points = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+        polygons.append(points)
+    return polygons
+
+
+def trusted_regions(options: ProcessingOptions) -> List[QRRegion]:
+    return [QRRegion(points=polygon) for polygon in hint_polygons(options)]
+
 
+def _detect_in_hints(image: np.ndarray, polygons: Sequence[np.ndarray]) -> List[QRRegion]:
+    height, width = image.shape[:2]
+    found: List[QRRegion] = []
+    for polygon in polygons:
+        (min_x, min_y), (max_x, max_y) = polygon.min(axis=0), polygon.max(axis=0)
+        padding = max(settings.hint_padding_min_pixels, settings.hint_padding_ratio * max(max_x - min_x, max_y - min_y))
+        x0, y0 = max(0, int(min_x - padding)), max(0, int(min_y - padding))
+        x1, y1 = min(width, int(max_x + padding) + 1), min(height, int(max_y + padding) + 1)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        for region in _detect_full(image[y0:y1, x0:x1]):
+            region.points = region.points + np.float32([x0, y0])
+            found.append(region)
+    # Overlapping hints can see the same code twice.
+    return merge_regions(found, settings.tile_iou_threshold) if len(polygons) > 1 else found
+
+
+def run_detection(image: np.ndarray, options: ProcessingOptions) -> DetectionResult:
+    """Pick the detection strategy for an image.
+
+    Trusted hints are returned as-is; other hints are searched first. Without
+    hints (or when they find nothing) large images are tiled, the rest use the
+    pyramid or a single full-resolution pass.
+    """
+    if options.hint_regions:
+        if options.trust_regions:
+            return DetectionResult(regions=trusted_regions(options), strategy="trusted")
+        regions = _detect_in_hints(image, hint_polygons(options))
+        if regions:
+            return DetectionResult(regions=regions, strategy="hinted")
+    if should_tile(image):
+        tiled = detect_tiled(image, _detect_full)
+        return DetectionResult(regions=tiled.regions, strategy="tiled", tiles=tiled.tiles)
+    scales = _detection_scales(options)
+    return DetectionResult(
+        regions=detect_qr_regions(image, scales),
+        strategy="pyramid" if scales else "full",
+    )
+
+
+def _detection_params(image: np.ndarray, options: ProcessingOptions) -> dict[str, Any]:
+    params = _strategy_params(image, options)
+    if options.hint_regions:
+        params["hints"] = options.hint_regions
+        params["hint_padding"] = [settings.hint_padding_ratio, settings.hint_padding_min_pixels]
+    return params
 
-def detect_qr_regions(image: np.ndarray) -> List[QRRegion]:
-    regions = _detect_with_pyzbar(image)
-    if regions:
-        return regions
-    return _detect_with_opencv(image)
 
+def _strategy_params(image: np.ndarray, options: ProcessingOptions) -> dict[str, Any]:
+    if should_tile(image):
+        return {
+            "strategy": "tiled",
+            "tile_size": settings.tile_size,
+            "tile_overlap": settings.tile_overlap,
+            "overview_side": settings.tile_overview_side,
+            "iou": settings.tile_iou_threshold,
+        }
+    scales = _detection_scales(options)
+    if scales:
+        return {
+            "strategy": "pyramid",
+            "scales": sorted(scales),
+            "min_side": settings.pyramid_min_side,
+            "full_pass": settings.pyramid_full_pass,
+        }
+    return {"strategy": "full"}
 
-def _ensure_rgba(image: Image.Image) -> Image.Image:
-    return image if image.mode == "RGBA" else image.convert("RGBA")
 
+def cached_detection(
+    image: np.ndarray,
+    options: ProcessingOptions,
+    content_digest: Optional[str],
+) -> Tuple[DetectionResult, bool]:
+    """Run :func:`run_detection`, reusing a cached result for the same image content."""
+    if content_digest is None or not detection_cache.enabled or options.trust_regions:
+        return run_detection(image, options), False
+    key = make_detection_key(content_digest, _detection_params(image, options))
+    cached = detection_cache.get(key)
+    if cached is not None:
+        return cached, True
+    detection = run_detection(image, options)
+    detection_cache.put(key, detection)
+    return detection, False
 
-def _parse_color(color: str, opacity: float) -> Tuple[int, int, int, int]:
-    if color.lower() == "transparent":
-        return (0, 0, 0, 0)
+
+def _read_source(data: ImageSource) -> bytes:
+    if isinstance(data, bytes):
+        return data
+    data.seek(0)
+    return data.read()
+
+
+def decode_image(data: ImageSource) -> np.ndarray:
+    """Decode into a single writable BGR buffer, falling back to Pillow for formats OpenCV lacks."""
+    return _decode_raw(_read_source(data))
+
+
+def _decode_raw(raw: bytes) -> np.ndarray:
+    pixels = cv2.imdecode(
+        np.frombuffer(raw, dtype=np.uint8),
+        cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION,
+    )
+    if pixels is not None:
+        return pixels
     try:
-        rgba = ImageColor.getcolor(color, "RGBA")
-    except ValueError as exc:
-        raise QRProcessingError(f"Unsupported color value: {color}") from exc
-    alpha = int(max(0.0, min(1.0, opacity)) * 255)
-    return (rgba[0], rgba[1], rgba[2], alpha if len(rgba) < 4 else int(rgba[3] * opacity))
-
-
-def _draw_region(draw: ImageDraw.ImageDraw, region: QRRegion, color: Tuple[int, int, int, int], shape: str) -> None:
-    points = region.points
-    min_x, min_y = np.min(points, axis=0)
-    max_x, max_y = np.max(points, axis=0)
-    bbox = [int(min_x), int(min_y), int(max_x), int(max_y)]
-    if shape == "ellipse":
-        draw.ellipse(bbox, fill=color)
-        return
-    draw.rectangle(bbox, fill=color)
-
-
-def mask_regions(image: Image.Image, regions: Iterable[QRRegion], options: ProcessingOptions) -> Image.Image:
-    rgba_image = _ensure_rgba(image)
-    overlay = Image.new("RGBA", rgba_image.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay, "RGBA")
-    color = _parse_color(options.fill_color, options.opacity)
-    for region in regions:
-        _draw_region(draw, region, color, options.shape)
-    composited = Image.alpha_composite(rgba_image, overlay)
-    if options.output_format == "JPEG":
-        return composited.convert("RGB")
-    return composited
+        with Image.open(io.BytesIO(raw)) as image:
+            rgb_image = image if image.mode == "RGB" else image.convert("RGB")
+            pixels = np.asarray(rgb_image)
+    except Exception as exc:
+        raise QRProcessingError("Invalid image data") from exc
+    return cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+
 
+def _process_multiframe(raw: bytes, container: str, options: ProcessingOptions, profiler: StageProfiler) -> ProcessingResult:
+    with profiler.stage("frames"):
+        encoded, stats = process_frames(raw, container, options, lambda gray: run_detection(gray, options).regions)
+    # Only frames that ran detection count as clean; tracked frames always carry regions.
+    passthrough = stats.max_regions == 0 and stats.keyframes == stats.frames and settings.encode_passthrough
+    return ProcessingResult(
+        data=raw if passthrough else encoded,
+        qr_count=stats.max_regions,
+        detection_strategy="keyframe",
+        timings_ms=profiler.timings_ms,
+        peak_bytes=profiler.peak_bytes,
+        passthrough=passthrough,
+        output_format=container,
+        frames=stats.frames,
+        keyframes=stats.keyframes,
+        audio_dropped=stats.audio_dropped and not passthrough,
+    )
 
-def process_image(data: bytes, filename: str, options: ProcessingOptions) -> Tuple[bytes, int]:
+
+def _decode_gray(raw: bytes) -> np.ndarray:
+    # Decoding straight to one channel skips the colour conversion and two thirds of the buffer.
+    gray = cv2.imdecode(
+        np.frombuffer(raw, dtype=np.uint8),
+        cv2.IMREAD_GRAYSCALE | cv2.IMREAD_IGNORE_ORIENTATION,
+    )
+    if gray is not None:
+        return gray
     try:
-        with Image.open(io.BytesIO(data)) as image:
-            rgb_image = image.convert("RGB")
+        with Image.open(io.BytesIO(raw)) as image:
+            return np.array(image.convert("L"))
     except Exception as exc:
         raise QRProcessingError("Invalid image data") from exc
 
-    cv_image = cv2.cvtColor(np.array(rgb_image), cv2.COLOR_RGB2BGR)
-    regions = detect_qr_regions(cv_image)
-    if not regions:
-        masked = rgb_image if options.output_format == "JPEG" else rgb_image.convert("RGBA")
-    else:
-        masked = mask_regions(rgb_image, regions, options)
-
-    buffer = io.BytesIO()
-    save_kwargs: dict[str, Any] = {"format": options.output_format}
-    if options.output_format == "JPEG":
-        save_kwargs["quality"] = 95
-    masked.save(buffer, **save_kwargs)
-    return buffer.getvalue(), len(regions)
+
+def detect_image(
+    data: ImageSource,
+    options: ProcessingOptions,
+    content_digest: Optional[str] = None,
+) -> DetectionReport:
+    """Run only the decode and detection stages; animations report their first frame."""
+    if content_digest is None and detection_cache.enabled and isinstance(data, bytes):
+        content_digest = compute_digest(data)
+
+    profiler = StageProfiler()
+    with profiler.stage("decode"):
+        gray = _decode_gray(_read_source(data))
+    with profiler.stage("detect"):
+        detection, detection_cached = cached_detection(gray, options, content_digest)
+    height, width = gray.shape[:2]
+    return DetectionReport(
+        regions=detection.regions,
+        width=width,
+        height=height,
+        detection_strategy=detection.strategy,
+        tiles=detection.tiles,
+        detection_cached=detection_cached,
+        timings_ms=profiler.timings_ms,
+    )
+
+
+def process_image(
+    data: ImageSource,
+    filename: str,
+    options: ProcessingOptions,
+    content_digest: Optional[str] = None,
+) -> ProcessingResult:
+    """Mask QR codes in an image; animations, multi-page TIFFs and MP4 clips keep their container."""
+    if content_digest is None and detection_cache.enabled and isinstance(data, bytes):
+        content_digest = compute_digest(data)
+
+    profiler = StageProfiler(track_memory=settings.profile_memory)
+    try:
+        with profiler.stage("decode"):
+            raw = _read_source(data)
+            container = multiframe_format(raw)
+            if container is None:
+                pixels = _decode_raw(raw)
+        if container is not None:
+            return _process_multiframe(raw, container, options, profiler)
+        with profiler.stage("detect"):
+            if options.trust_regions:
+                detection, detection_cached = DetectionResult(trusted_regions(options), "trusted"), False
+            else:
+                gray = cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY)
+                detection, detection_cached = cached_detection(gray, options, content_digest)
+                del gray
+        regions = detection.regions
+        passthrough = not regions and settings.encode_passthrough and sniff_format(raw) == options.output_format
+        with profiler.stage("mask"):
+            mask_regions(pixels, regions, options)
+        with profiler.stage("encode"):
+            tier = options.encode_tier or settings.encode_tier
+            encoded = raw if passthrough else encode_image(pixels, options.output_format, tier)
+    finally:
+        profiler.close()
+
+    return ProcessingResult(
+        data=encoded,
+        qr_count=len(regions),
+        detection_strategy=detection.strategy,
+        tiles=detection.tiles,
+        detection_cached=detection_cached,
+        timings_ms=profiler.timings_ms,
+        peak_bytes=profiler.peak_bytes,
+        passthrough=passthrough,
+    )
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from ..utils.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+@dataclass
+class QRRegion:
+    points: np.ndarray
+    data: Optional[str] = None
+
+    @property
+    def decoded(self) -> bool:
+        return bool(self.data)
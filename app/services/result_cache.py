@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Optional
+
+from ..config import settings
+from ..schemas import ProcessingOptions
+from .qr_processor import ProcessingResult
+from .tiling import TileTiming
+
+
+def _normalized_options(options: ProcessingOptions) -> str:
+    effective = options.copy(
+        update={
+            "detection_mode": options.detection_mode or settings.detection_mode,
+            "detection_scales": options.detection_scales or settings.detection_scales,
+            "encode_tier": options.encode_tier or settings.encode_tier,
+        },
+    )
+    return effective.json(sort_keys=True)
+
+
+def make_cache_key(content_digest: str, options: ProcessingOptions) -> str:
+    digest = hashlib.sha256(content_digest.encode())
+    digest.update(b"\0")
+    digest.update(settings.version.encode())
+    digest.update(b"\0")
+    digest.update(_normalized_options(options).encode())
+    return digest.hexdigest()
+
+
+def _result_size(result: ProcessingResult) -> int:
+    return len(result.data) + 64 * (len(result.tiles) + 1)
+
+
+class ResultCache:
+    """Two-tier LRU cache of processed outputs keyed by input bytes and options.
+
+    The memory tier holds up to ``memory_bytes`` of results; the optional disk
+    tier keeps up to ``disk_bytes`` under ``disk_dir`` and survives restarts.
+    """
+
+    def __init__(self, memory_bytes: int, disk_dir: Optional[Path] = None, disk_bytes: int = 0) -> None:
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir if disk_bytes > 0 else None
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, ProcessingResult]" = OrderedDict()
+        self._memory_used = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_used = 0
+        self._disk_loaded = False
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "ResultCache":
+        return cls(
+            memory_bytes=settings.result_cache_memory_bytes,
+            disk_dir=settings.storage_root / "cache" / "results",
+            disk_bytes=settings.result_cache_disk_bytes,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory_bytes > 0 or self.disk_dir is not None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used,
+            }
+
+    def get(self, key: str) -> Optional[ProcessingResult]:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return result
+            result = self._read_disk(key)
+            if result is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._store_memory(key, result)
+            return result
+
+    def put(self, key: str, result: ProcessingResult) -> None:
+        with self._lock:
+            self._store_memory(key, result)
+            self._write_disk(key, result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+
+    def _store_memory(self, key: str, result: ProcessingResult) -> None:
+        size = _result_size(result)
+        if size > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= _result_size(previous)
+        self._memory[key] = result
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= _result_size(evicted)
+            self._counters["memory_evictions"] += 1
+
+    def _load_disk_index(self) -> None:
+        if self._disk_loaded or self.disk_dir is None:
+            return
+        self._disk_loaded = True
+        if not self.disk_dir.exists():
+            return
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".bin"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[: -len(".bin")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+
+    def _read_disk(self, key: str) -> Optional[ProcessingResult]:
+        if self.disk_dir is None:
+            return None
+        self._load_disk_index()
+        if key not in self._disk:
+            return None
+        try:
+            meta = json.loads((self.disk_dir / f"{key}.json").read_text())
+            data = (self.disk_dir / f"{key}.bin").read_bytes()
+        except (OSError, ValueError):
+            self._drop_disk(key)
+            return None
+        self._disk.move_to_end(key)
+        return ProcessingResult(
+            data=data,
+            qr_count=meta["qr_count"],
+            detection_strategy=meta["detection_strategy"],
+            tiles=[TileTiming(**tile) for tile in meta["tiles"]],
+            detection_cached=meta.get("detection_cached", False),
+            passthrough=meta.get("passthrough", False),
+            output_format=meta.get("output_format"),
+            frames=meta.get("frames", 1),
+            keyframes=meta.get("keyframes", 0),
+            audio_dropped=meta.get("audio_dropped", False),
+        )
+
+    def _write_disk(self, key: str, result: ProcessingResult) -> None:
+        if self.disk_dir is None or len(result.data) > self.disk_bytes:
+            return
+        self._load_disk_index()
+        if key in self._disk:
+            self._disk.move_to_end(key)
+            return
+        meta = {
+            "qr_count": result.qr_count,
+            "detection_strategy": result.detection_strategy,
+            "tiles": [asdict(tile) for tile in result.tiles],
+            "detection_cached": result.detection_cached,
+            "passthrough": result.passthrough,
+            "output_format": result.output_format,
+            "frames": result.frames,
+            "keyframes": result.keyframes,
+            "audio_dropped": result.audio_dropped,
+        }
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            (self.disk_dir / f"{key}.json").write_text(json.dumps(meta))
+            temp_path = self.disk_dir / f"{key}.bin.tmp"
+            temp_path.write_bytes(result.data)
+            os.replace(temp_path, self.disk_dir / f"{key}.bin")
+        except OSError:
+            return
+        self._disk[key] = len(result.data)
+        self._disk_used += len(result.data)
+        while self._disk_used > self.disk_bytes:
+            evicted = next(iter(self._disk))
+            self._drop_disk(evicted)
+            self._counters["disk_evictions"] += 1
+
+    def _drop_disk(self, key: str) -> None:
+        size = self._disk.pop(key, 0)
+        self._disk_used -= size
+        if self.disk_dir is None:
+            return
+        for suffix in (".bin", ".json"):
+            try:
+                (self.disk_dir / f"{key}{suffix}").unlink()
+            except OSError:
+                continue
+
+
+result_cache = ResultCache.from_settings()
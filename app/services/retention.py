@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from sqlalchemy import String, delete, func, insert, select, tuple_, type_coerce
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import StorageObject, StoredFile
+from .jobs import JobQueue, job_queue
+from .storage import StorageKind, StorageService, storage
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionSweeper:
+    """Deletes stored objects that have not been stored again within the retention window,
+    along with finished jobs older than the window.
+
+    Candidates come from ``storage_objects`` (one row per object with its last
+    store time), so a sweep never walks the storage directories. Work is done in
+    batches of ``batch_size`` read straight off the ``last_stored_at`` index,
+    with a short pause in between to stay out of request traffic; each batch
+    resumes after the last key of the previous one, so objects that cannot be
+    removed yet are retried on the next sweep instead of this one.
+
+    Files from the old flat layout (``<root>/<kind>/<timestamp>_<name>``) are
+    not indexed; each sweep also removes up to ``batch_size`` expired ones until
+    none are left.
+    """
+
+    LEGACY_KINDS: tuple[StorageKind, ...] = ("uploads", "processed")
+
+    def __init__(
+        self,
+        storage: StorageService,
+        jobs: Optional[JobQueue],
+        session_factory: Callable[[], Session],
+        retention_hours: float,
+        interval: float,
+        batch_size: int,
+        batch_pause: float = 0.0,
+    ) -> None:
+        self.storage = storage
+        self.jobs = jobs
+        self.session_factory = session_factory
+        self.retention_hours = retention_hours
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sweep_lock = threading.Lock()
+        self._legacy_done = False
+        self._objects_backfilled = False
+        self._counters: dict[str, Any] = {
+            "runs": 0,
+            "files_reclaimed": 0,
+            "bytes_reclaimed": 0,
+            "skipped_in_use": 0,
+            "legacy_files_reclaimed": 0,
+            "mappings_pruned": 0,
+            "jobs_purged": 0,
+            "last_run_ms": None,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "RetentionSweeper":
+        return cls(
+            storage=storage,
+            jobs=job_queue,
+            session_factory=SessionLocal,
+            retention_hours=settings.temp_retention_hours,
+            interval=settings.retention_sweep_interval_seconds,
+            batch_size=settings.retention_batch_size,
+            batch_pause=settings.retention_batch_pause_seconds,
+        )
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="qr-cut-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        self._stopping.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join()
+
+    def trigger(self) -> None:
+        self._wake.set()
+
+    def sweep(self, now: Optional[datetime] = None) -> dict[str, int]:
+        """Reclaim every expired object now; returns files and bytes reclaimed."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(hours=self.retention_hours)
+        # Rows are written in batches; make sure recent stores are visible first.
+        self.storage.index_writer.flush()
+
+        reclaimed = {"files": 0, "bytes": 0}
+        started = time.perf_counter()
+        with self._sweep_lock:
+            if not self._objects_backfilled:
+                self._backfill_objects()
+            after: Optional[tuple[str, ...]] = None
+            while not self._stopping.is_set():
+                batch = self._expired_batch(cutoff, after)
+                for _, kind, digest, suffix in batch:
+                    self._reclaim(kind, digest, suffix, cutoff, reclaimed)
+                if len(batch) < self.batch_size:
+                    break
+                after = batch[-1]
+                if self.batch_pause:
+                    self._stopping.wait(self.batch_pause)
+            self._prune_mappings(cutoff)
+            if not self._legacy_done:
+                self._sweep_legacy(cutoff, reclaimed)
+            if self.jobs is not None:
+                self._counters["jobs_purged"] += self.jobs.purge(cutoff)
+            self._counters["runs"] += 1
+            self._counters["files_reclaimed"] += reclaimed["files"]
+            self._counters["bytes_reclaimed"] += reclaimed["bytes"]
+            self._counters["last_run_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return reclaimed
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._counters, "retention_hours": self.retention_hours}
+
+    def _backfill_objects(self) -> None:
+        """Seed ``storage_objects`` from ``stored_files`` on databases written before it existed."""
+        session = self.session_factory()
+        try:
+            if session.scalars(select(StorageObject.kind).limit(1)).first() is None:
+                key = (StoredFile.kind, StoredFile.digest, StoredFile.suffix)
+                rows = select(*key, func.max(StoredFile.size), func.max(StoredFile.created_at)).group_by(*key)
+                session.execute(
+                    insert(StorageObject).from_select(
+                        ["kind", "digest", "suffix", "size", "last_stored_at"],
+                        rows,
+                    ),
+                )
+                session.commit()
+        finally:
+            session.close()
+        self._objects_backfilled = True
+
+    @staticmethod
+    def _cutoff_text(cutoff: datetime) -> str:
+        # Store times are SQLite CURRENT_TIMESTAMP text in UTC.
+        return cutoff.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    def _expired_batch(self, cutoff: datetime, after: Optional[tuple[str, ...]]) -> list[tuple[str, ...]]:
+        # Compared as text so keys round-trip exactly between batches.
+        last_stored = type_coerce(StorageObject.last_stored_at, String)
+        key = (last_stored, StorageObject.kind, StorageObject.digest, StorageObject.suffix)
+        query = select(*key).where(last_stored < self._cutoff_text(cutoff)).order_by(*key).limit(self.batch_size)
+        if after is not None:
+            query = query.where(tuple_(*key) > tuple_(*after))
+        session = self.session_factory()
+        try:
+            return [tuple(row) for row in session.execute(query)]
+        finally:
+            session.close()
+
+    def _reclaim(self, kind: str, digest: str, suffix: str, cutoff: datetime, reclaimed: dict[str, int]) -> None:
+        try:
+            freed = self.storage.backend.remove(kind, digest, suffix, cutoff.timestamp())
+        except OSError:
+            logger.warning("Could not remove stored object %s/%s", kind, digest, exc_info=True)
+            return
+        if freed is None:
+            # Stored again after its last index row; the pending row will refresh it.
+            self._counters["skipped_in_use"] += 1
+            return
+        # Only rows older than the cutoff: a store racing the removal keeps its fresh rows.
+        cutoff_text = self._cutoff_text(cutoff)
+        session = self.session_factory()
+        try:
+            session.execute(
+                delete(StorageObject).where(
+                    StorageObject.kind == kind,
+                    StorageObject.digest == digest,
+                    StorageObject.suffix == suffix,
+                    type_coerce(StorageObject.last_stored_at, String) < cutoff_text,
+                ),
+            )
+            session.execute(
+                delete(StoredFile).where(
+                    StoredFile.kind == kind,
+                    StoredFile.digest == digest,
+                    StoredFile.suffix == suffix,
+                    type_coerce(StoredFile.created_at, String) < cutoff_text,
+                ),
+            )
+            session.commit()
+        finally:
+            session.close()
+        if freed:
+            reclaimed["files"] += 1
+            reclaimed["bytes"] += freed
+
+    def _prune_mappings(self, cutoff: datetime) -> None:
+        """Delete filename mappings older than the cutoff, including those of objects still in use.
+
+        Retention reads ``storage_objects``, so old mappings are only history; without
+        this an object stored again every window would gain rows forever.
+        """
+        stale = (
+            select(StoredFile.id)
+            .where(type_coerce(StoredFile.created_at, String) < self._cutoff_text(cutoff))
+            .limit(self.batch_size)
+            .scalar_subquery()
+        )
+        while not self._stopping.is_set():
+            session = self.session_factory()
+            try:
+                pruned = session.execute(delete(StoredFile).where(StoredFile.id.in_(stale))).rowcount
+                session.commit()
+            finally:
+                session.close()
+            self._counters["mappings_pruned"] += pruned
+            if pruned < self.batch_size:
+                break
+            if self.batch_pause:
+                self._stopping.wait(self.batch_pause)
+
+    def _sweep_legacy(self, cutoff: datetime, reclaimed: dict[str, int]) -> None:
+        root = getattr(self.storage.backend, "root", None)
+        if root is None:
+            self._legacy_done = True
+            return
+        removed = 0
+        remaining = False
+        for kind in self.LEGACY_KINDS:
+            try:
+                entries = list(os.scandir(root / kind))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                # Content-addressed objects live in shard directories; top-level files are legacy.
+                if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                    continue
+                if removed >= self.batch_size:
+                    remaining = True
+                    break
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                    if stat.st_mtime >= cutoff.timestamp():
+                        remaining = True
+                        continue
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+                except OSError:
+                    logger.warning("Could not remove legacy file %s", entry.path, exc_info=True)
+                    remaining = True
+                    continue
+                removed += 1
+                reclaimed["files"] += 1
+                reclaimed["bytes"] += stat.st_size
+        self._counters["legacy_files_reclaimed"] += removed
+        self._legacy_done = not remaining
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Retention sweep failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+retention_sweeper = RetentionSweeper.from_settings()
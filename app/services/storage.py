@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal, Optional
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import StorageObject, StoredFile
+from .ingestion import ImageSource
+from .log_writer import Row, BatchedRowWriter
+
+StorageKind = Literal["uploads", "processed"]
+
+
+@dataclass
+class StoredObject:
+    kind: str
+    digest: str
+    path: Path
+    size: int
+    deduplicated: bool
+
+
+class StorageBackend(ABC):
+    """Persists uploads and processed outputs; subclasses decide the layout."""
+
+    @abstractmethod
+    def put(self, kind: StorageKind, digest: str, suffix: str, source: ImageSource) -> StoredObject:
+        ...
+
+    @abstractmethod
+    def path_for(self, kind: StorageKind, digest: str, suffix: str) -> Path:
+        ...
+
+    @abstractmethod
+    def remove(self, kind: StorageKind, digest: str, suffix: str, unused_since: float) -> Optional[int]:
+        """Delete an object not stored again since ``unused_since``; returns bytes freed."""
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+class ContentAddressedStorage(StorageBackend):
+    """Stores each distinct payload once under ``<root>/<kind>/<aa>/<bb>/<digest>.<suffix>``.
+
+    Writes go to a temporary file in the target directory and are renamed into
+    place, so readers never see partial files. Re-storing an existing object only
+    refreshes its modification time, which keeps it alive for retention.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._counters = {"writes": 0, "deduplicated": 0, "bytes_written": 0, "bytes_deduplicated": 0}
+
+    def path_for(self, kind: StorageKind, digest: str, suffix: str) -> Path:
+        name = f"{digest}.{suffix}" if suffix else digest
+        return self.root / kind / digest[:2] / digest[2:4] / name
+
+    def put(self, kind: StorageKind, digest: str, suffix: str, source: ImageSource) -> StoredObject:
+        destination = self.path_for(kind, digest, suffix.lstrip(".").lower())
+        # Holding the lock across the existence check keeps the sweeper from
+        # deleting an object between the check and the mtime refresh.
+        with self._lock:
+            try:
+                size = destination.stat().st_size
+                os.utime(destination)
+                deduplicated = True
+            except FileNotFoundError:
+                deduplicated = False
+        if not deduplicated:
+            size = self._write_atomic(destination, source)
+
+        with self._lock:
+            if deduplicated:
+                self._counters["deduplicated"] += 1
+                self._counters["bytes_deduplicated"] += size
+            else:
+                self._counters["writes"] += 1
+                self._counters["bytes_written"] += size
+        return StoredObject(kind=kind, digest=digest, path=destination, size=size, deduplicated=deduplicated)
+
+    def remove(self, kind: StorageKind, digest: str, suffix: str, unused_since: float) -> Optional[int]:
+        path = self.path_for(kind, digest, suffix)
+        with self._lock:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return 0
+            if stat.st_mtime >= unused_since:
+                return None
+            path.unlink()
+        for shard in (path.parent, path.parent.parent):
+            try:
+                shard.rmdir()
+            except OSError:
+                break
+        return stat.st_size
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._counters)
+
+    @staticmethod
+    def _write_atomic(destination: Path, source: ImageSource) -> int:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        handle, temp_name = tempfile.mkstemp(dir=destination.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(handle, "wb") as target:
+                if isinstance(source, bytes):
+                    target.write(source)
+                else:
+                    source.seek(0)
+                    shutil.copyfileobj(source, target)
+                    source.seek(0)
+                size = target.tell()
+            os.replace(temp_name, destination)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        return size
+
+
+def write_index_rows(session: Session, rows: list[Row]) -> None:
+    """Record filename mappings and bump each object's last-stored time in one transaction."""
+    session.execute(insert(StoredFile), rows)
+    objects = {(row["kind"], row["digest"], row["suffix"]): row["size"] for row in rows}
+    upsert = sqlite_insert(StorageObject)
+    session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[StorageObject.kind, StorageObject.digest, StorageObject.suffix],
+            set_={"size": upsert.excluded.size, "last_stored_at": func.now()},
+        ),
+        [{"kind": kind, "digest": digest, "suffix": suffix, "size": size} for (kind, digest, suffix), size in objects.items()],
+    )
+
+
+class StorageService:
+    """Applies the persistence mode and records logical filenames for stored objects."""
+
+    def __init__(self, backend: StorageBackend, mode: str, index_writer: BatchedRowWriter) -> None:
+        self.backend = backend
+        self.mode = mode
+        self.index_writer = index_writer
+
+    @classmethod
+    def from_settings(cls) -> "StorageService":
+        return cls(
+            backend=ContentAddressedStorage(settings.storage_root),
+            mode=settings.persist_mode,
+            index_writer=BatchedRowWriter.from_settings(model=StoredFile, name="storage-index", write=write_index_rows),
+        )
+
+    def persists(self, kind: StorageKind) -> bool:
+        if self.mode == "off":
+            return False
+        return kind == "uploads" or self.mode == "both"
+
+    def store(
+        self,
+        kind: StorageKind,
+        filename: str,
+        digest: str,
+        suffix: str,
+        source: ImageSource,
+    ) -> Optional[StoredObject]:
+        if not self.persists(kind):
+            return None
+        stored = self.backend.put(kind, digest, suffix, source)
+        self.index_writer.submit(
+            [
+                {
+                    "filename": filename,
+                    "kind": kind,
+                    "digest": digest,
+                    "suffix": stored.path.suffix.lstrip("."),
+                    "size": stored.size,
+                },
+            ],
+        )
+        return stored
+
+    def start(self) -> None:
+        self.index_writer.start()
+
+    def stop(self) -> None:
+        self.index_writer.stop()
+
+    def stats(self) -> dict[str, Any]:
+        return {"mode": self.mode, **self.backend.stats(), "index": self.index_writer.stats()}
+
+
+storage = StorageService.from_settings()
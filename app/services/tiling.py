@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from ..config import settings
+from ..utils.lazy import lazy_import
+from .regions import QRRegion
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+Tile = Tuple[int, int, int, int]
+
+_tile_executor: Optional[ThreadPoolExecutor] = None
+_tile_executor_lock = threading.Lock()
+
+
+@dataclass
+class TileTiming:
+    x: int
+    y: int
+    width: int
+    height: int
+    duration_ms: float
+    regions: int
+
+
+@dataclass
+class TiledDetection:
+    regions: List[QRRegion]
+    tiles: List[TileTiming]
+
+
+def _get_tile_executor() -> ThreadPoolExecutor:
+    global _tile_executor
+    with _tile_executor_lock:
+        if _tile_executor is None:
+            workers = settings.tiling_workers or min(8, os.cpu_count() or 1)
+            _tile_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qr-cut-tile")
+        return _tile_executor
+
+
+def _axis_starts(length: int, tile_size: int, step: int) -> List[int]:
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)
+    return starts
+
+
+def iter_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Tile]:
+    """Split an image into overlapping ``(x, y, width, height)`` tiles covering every pixel."""
+    step = max(1, tile_size - overlap)
+    return [
+        (x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in _axis_starts(height, tile_size, step)
+        for x in _axis_starts(width, tile_size, step)
+    ]
+
+
+def _bounding_box(region: QRRegion) -> Tuple[float, float, float, float]:
+    min_x, min_y = np.min(region.points, axis=0)
+    max_x, max_y = np.max(region.points, axis=0)
+    return float(min_x), float(min_y), float(max_x), float(max_y)
+
+
+def _overlap_ratio(first: Tuple[float, ...], second: Tuple[float, ...]) -> float:
+    inter_w = min(first[2], second[2]) - max(first[0], second[0])
+    inter_h = min(first[3], second[3]) - max(first[1], second[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    intersection = inter_w * inter_h
+    area_first = (first[2] - first[0]) * (first[3] - first[1])
+    area_second = (second[2] - second[0]) * (second[3] - second[1])
+    union = area_first + area_second - intersection
+    iou = intersection / union if union > 0 else 0.0
+    # A partial hit clipped by a tile border sits inside the complete detection.
+    containment = intersection / min(area_first, area_second) if min(area_first, area_second) > 0 else 0.0
+    return max(iou, containment if containment > 0.9 else 0.0)
+
+
+def merge_regions(regions: Sequence[QRRegion], iou_threshold: float) -> List[QRRegion]:
+    """Suppress duplicate detections, preferring decoded and larger regions."""
+    boxes = [_bounding_box(region) for region in regions]
+    order = sorted(
+        range(len(regions)),
+        key=lambda index: (
+            regions[index].decoded,
+            (boxes[index][2] - boxes[index][0]) * (boxes[index][3] - boxes[index][1]),
+        ),
+        reverse=True,
+    )
+    kept: List[int] = []
+    for index in order:
+        if all(_overlap_ratio(boxes[index], boxes[other]) < iou_threshold for other in kept):
+            kept.append(index)
+    return [regions[index] for index in sorted(kept)]
+
+
+def should_tile(image: np.ndarray) -> bool:
+    return settings.tiling_min_pixels > 0 and image.shape[0] * image.shape[1] >= settings.tiling_min_pixels
+
+
+def _detect_overview(image: np.ndarray, detect: Callable[[np.ndarray], List[QRRegion]], side: int) -> List[QRRegion]:
+    scale = min(1.0, side / max(image.shape[0], image.shape[1]))
+    resized = image if scale >= 1.0 else cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    found = detect(np.ascontiguousarray(resized))
+    for region in found:
+        region.points = region.points / scale
+    return found
+
+
+def detect_tiled(
+    image: np.ndarray,
+    detect: Callable[[np.ndarray], List[QRRegion]],
+    tile_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    overview_side: Optional[int] = None,
+) -> TiledDetection:
+    """Run ``detect`` on overlapping tiles in parallel and merge the results.
+
+    A code wider than the overlap that crosses a seam is never whole inside any
+    tile, so a downscaled full-frame pass (longest side ``overview_side``, 0 to
+    disable) runs alongside the tiles and its regions are merged with theirs.
+    """
+    tile_size = tile_size or settings.tile_size
+    overlap = settings.tile_overlap if overlap is None else overlap
+    overview_side = settings.tile_overview_side if overview_side is None else overview_side
+    height, width = image.shape[:2]
+    tiles = iter_tiles(width, height, tile_size, overlap)
+
+    def run_tile(tile: Tile) -> Tuple[List[QRRegion], TileTiming]:
+        x, y, tile_w, tile_h = tile
+        started = time.perf_counter()
+        found = detect(np.ascontiguousarray(image[y : y + tile_h, x : x + tile_w]))
+        elapsed = (time.perf_counter() - started) * 1000
+        for region in found:
+            region.points = region.points + np.array([x, y], dtype=np.float32)
+        return found, TileTiming(x, y, tile_w, tile_h, round(elapsed, 3), len(found))
+
+    executor = _get_tile_executor()
+    overview = executor.submit(_detect_overview, image, detect, overview_side) if overview_side else None
+    results = list(executor.map(run_tile, tiles))
+    candidates = [region for found, _ in results for region in found]
+    if overview is not None:
+        candidates.extend(overview.result())
+    return TiledDetection(
+        regions=merge_regions(candidates, settings.tile_iou_threshold),
+        tiles=[timing for _, timing in results],
+    )
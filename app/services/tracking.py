@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from ..utils.lazy import lazy_import
+from .regions import QRRegion
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+
+def _lk_params() -> dict:
+    return {
+        "winSize": (21, 21),
+        "maxLevel": 3,
+        "criteria": (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+    }
+
+
+class RegionTracker:
+    """Carries QR regions from one grayscale frame to the next with sparse optical flow.
+
+    Each region is followed through corner features inside its bounding box,
+    checked with a forward-backward pass. ``track`` returns ``None`` once the
+    share of reliably tracked features for any region drops below
+    ``min_confidence``, which tells the caller to run full detection again.
+    """
+
+    def __init__(self, min_confidence: float = 0.6, max_features: int = 40, max_fb_error: float = 1.0) -> None:
+        self.min_confidence = min_confidence
+        self.max_features = max_features
+        self.max_fb_error = max_fb_error
+        self._previous: Optional[np.ndarray] = None
+        self._regions: List[QRRegion] = []
+
+    @property
+    def active(self) -> bool:
+        return self._previous is not None and bool(self._regions)
+
+    def reset(self, gray: np.ndarray, regions: List[QRRegion]) -> None:
+        self._previous = gray
+        self._regions = regions
+
+    def track(self, gray: np.ndarray) -> Optional[List[QRRegion]]:
+        if self._previous is None:
+            return None
+        tracked: List[QRRegion] = []
+        for region in self._regions:
+            moved = self._track_region(self._previous, gray, region)
+            if moved is None:
+                return None
+            tracked.append(moved)
+        self.reset(gray, tracked)
+        return tracked
+
+    def _features(self, gray: np.ndarray, region: QRRegion) -> np.ndarray:
+        corners = region.points.reshape(-1, 2).astype(np.float32)
+        height, width = gray.shape[:2]
+        x0, y0 = np.floor(corners.min(axis=0)).astype(int)
+        x1, y1 = np.ceil(corners.max(axis=0)).astype(int)
+        x0, y0, x1, y1 = max(x0, 0), max(y0, 0), min(x1, width), min(y1, height)
+        features = corners
+        if x1 - x0 >= 8 and y1 - y0 >= 8:
+            found = cv2.goodFeaturesToTrack(gray[y0:y1, x0:x1], self.max_features, 0.01, 3)
+            if found is not None:
+                features = np.vstack([corners, found.reshape(-1, 2) + np.float32([x0, y0])])
+        return features.reshape(-1, 1, 2)
+
+    def _track_region(self, previous: np.ndarray, gray: np.ndarray, region: QRRegion) -> Optional[QRRegion]:
+        features = self._features(previous, region)
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(previous, gray, features, None, **_lk_params())
+        if forward is None:
+            return None
+        backward, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, previous, forward, None, **_lk_params())
+        if backward is None:
+            return None
+        error = np.linalg.norm((features - backward).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < self.max_fb_error)
+        if good.sum() < 3 or good.mean() < self.min_confidence:
+            return None
+        transform, _ = cv2.estimateAffinePartial2D(features[good], forward[good])
+        if transform is None:
+            return None
+        points = cv2.transform(region.points.reshape(-1, 1, 2).astype(np.float32), transform).reshape(-1, 2)
+        return QRRegion(points=points, data=region.data)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, List, Optional
+
+from ..config import settings
+from ..schemas import ProcessingOptions
+from ..utils.lazy import lazy_import, load_all
+from .detectors import detector_chain, get_detector
+from .encoders import encode_image
+from .executor import ProcessingPool
+from .masking import mask_regions
+from .qr_processor import decode_image
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+WARMUP_FORMATS = ("PNG", "JPEG", "WEBP")
+
+
+def _synthetic_image() -> np.ndarray:
+    canvas = np.full((320, 320, 3), 255, dtype=np.uint8)
+    try:
+        code = cv2.QRCodeEncoder.create().encode("qr-cut warm-up")
+    except (AttributeError, cv2.error):  # pragma: no cover - OpenCV builds without the encoder
+        return canvas
+    code = cv2.resize(code, None, fx=6, fy=6, interpolation=cv2.INTER_NEAREST)
+    height, width = code.shape[:2]
+    canvas[40 : 40 + height, 40 : 40 + width] = code[..., None]
+    return canvas
+
+
+def warm_up_worker() -> float:
+    """Run one synthetic decode/detect/mask/encode on the calling worker; returns seconds taken.
+
+    Detector instances are per thread, so this has to run on every pool worker
+    to take their initialisation off the first real request.
+    """
+    started = time.perf_counter()
+    load_all()
+    raw = encode_image(_synthetic_image(), "PNG", "fast")
+    pixels = decode_image(raw)
+    gray = cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY)
+    regions = []
+    # Each backend directly, so warm-up neither short-circuits the chain nor skews its adaptive stats.
+    for name in detector_chain.names:
+        regions = regions or get_detector(name).detect(gray)
+    mask_regions(pixels, regions, ProcessingOptions())
+    for output_format in WARMUP_FORMATS:
+        encode_image(pixels, output_format, settings.encode_tier)
+    return time.perf_counter() - started
+
+
+class Warmup:
+    """Primes the processing pool at startup and tracks readiness for ``/health``.
+
+    ``blocking`` finishes warm-up before the app accepts requests, ``background``
+    serves liveness immediately and reports ready once it is done, and ``off``
+    is ready at once. A failed warm-up is logged and still ends in ready, since
+    it only affects first-request latency.
+    """
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.state = "ready" if mode == "off" else "pending"
+        self.seconds: Optional[float] = None
+        self.worker_seconds: List[float] = []
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @classmethod
+    def from_settings(cls) -> "Warmup":
+        return cls(mode=settings.warmup_mode)
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "failed")
+
+    async def start(self, pool: ProcessingPool) -> None:
+        if self.mode == "off" or self._task is not None:
+            return
+        if self.mode == "blocking":
+            await self.run(pool)
+        else:
+            self._task = asyncio.create_task(self.run(pool), name="qr-cut-warmup")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def run(self, pool: ProcessingPool) -> None:
+        self.state = "running"
+        started = time.perf_counter()
+        try:
+            # Import the heavy modules once up front so per-worker timings cover only detector and codec setup.
+            await asyncio.get_running_loop().run_in_executor(None, load_all)
+            workers = min(pool.workers, pool.max_in_flight)
+            self.worker_seconds = list(await asyncio.gather(*(pool.run(warm_up_worker) for _ in range(workers))))
+            self.state = "ready"
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception("Warm-up failed; serving without it")
+            self.error = str(exc)
+            self.state = "failed"
+        finally:
+            self.seconds = time.perf_counter() - started
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "state": self.state,
+            "ready": self.ready,
+            "seconds": round(self.seconds, 4) if self.seconds is not None else None,
+            "worker_seconds": [round(value, 4) for value in self.worker_seconds],
+            "error": self.error,
+        }
+
+
+warmup = Warmup.from_settings()
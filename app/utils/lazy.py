@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import importlib
+from types import ModuleType
+from typing import Any, Dict, List
+
+_proxies: Dict[str, "LazyModule"] = {}
+
+
+class LazyModule(ModuleType):
+    """Stands in for a module that is imported on first attribute access.
+
+    The real import goes through :func:`importlib.import_module`, whose module
+    locks keep concurrent first accesses from different threads safe.
+    Attribute writes are forwarded, so settings such as
+    ``Image.MAX_IMAGE_PIXELS`` land on the real module.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self) -> ModuleType:
+        module = object.__getattribute__(self, "_module")
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            object.__setattr__(self, "_module", module)
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return object.__getattribute__(self, "_module") is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._load(), name, value)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> Any:
+    """Return a proxy for module ``name`` that defers the import until it is used."""
+    proxy = _proxies.get(name)
+    if proxy is None:
+        proxy = _proxies[name] = LazyModule(name)
+    return proxy
+
+
+def load_all() -> List[str]:
+    """Import every module requested through :func:`lazy_import`; returns their names."""
+    for proxy in list(_proxies.values()):
+        proxy._load()
+    return sorted(_proxies)
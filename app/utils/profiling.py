@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def _start_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class StageProfiler:
+    """Records wall time and, optionally, peak traced allocations per pipeline stage.
+
+    Memory tracking uses :mod:`tracemalloc`, which sees NumPy and OpenCV buffers
+    but is process-wide, so concurrent requests inflate each other's peaks.
+    """
+
+    def __init__(self, track_memory: bool = False) -> None:
+        self.track_memory = track_memory
+        self.timings_ms: Dict[str, float] = {}
+        self.peak_bytes: Dict[str, int] = {}
+        if track_memory:
+            _start_tracing()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        baseline = 0
+        if self.track_memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings_ms[name] = round((time.perf_counter() - started) * 1000, 3)
+            if self.track_memory:
+                self.peak_bytes[name] = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+
+    def close(self) -> None:
+        if self.track_memory:
+            self.track_memory = False
+            _stop_tracing()
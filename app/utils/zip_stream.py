@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePath
+from typing import BinaryIO, Iterable, Iterator, List
+
+# Already-compressed formats gain nothing from deflate; store them as-is.
+STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".mp4", ".zip"}
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class ZipEntry:
+    filename: str
+    file: BinaryIO
+    size: int
+
+
+class _ChunkSink:
+    """Write-only, unseekable sink that lets zipfile emit data descriptors."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
+
+
+def compression_for(filename: str) -> int:
+    if PurePath(filename).suffix.lower() in STORED_SUFFIXES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def iter_zip(entries: Iterable[ZipEntry], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a ZIP archive incrementally, holding at most one chunk per entry in memory."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:  # type: ignore[arg-type]
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.filename, date_time=time.localtime()[:6])
+            info.compress_type = compression_for(entry.filename)
+            info.file_size = entry.size
+            entry.file.seek(0)
+            with archive.open(info, "w", force_zip64=entry.size >= zipfile.ZIP64_LIMIT) as target:
+                while True:
+                    block = entry.file.read(chunk_size)
+                    if not block:
+                        break
+                    target.write(block)
+                    pending = sink.drain()
+                    if pending:
+                        yield pending
+            pending = sink.drain()
+            if pending:
+                yield pending
+    pending = sink.drain()
+    if pending:
+        yield pending
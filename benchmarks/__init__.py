@@ -0,0 +1,4 @@
+"""Stage-level performance benchmarks for the QR masking pipeline.
+
+Run ``python -m benchmarks.run --help`` from the repository root.
+"""
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    min_delta_ms: float,
+) -> List[str]:
+    """Return a message per regression; empty when there is none.
+
+    A case regresses when it finds fewer QR codes than it expects (its
+    ``expected_found``, else every code rendered into it; a baseline that also
+    missed them does not excuse it), or when a stage is slower than ``baseline``
+    by more than ``tolerance`` and ``min_delta_ms``.
+    """
+    previous = {item["case"]["name"]: item for item in baseline.get("cases", [])}
+    regressions: List[str] = []
+    for item in current["cases"]:
+        name = item["case"]["name"]
+        expected = item["case"].get("expected_found")
+        if expected is None:
+            expected = item["case"].get("qr_count")
+        reference = previous.get(name)
+        if expected is not None and item["qr_found"] < expected:
+            regressions.append(f"{name}: found {item['qr_found']} of {expected} expected QR codes")
+        elif reference is not None and item["qr_found"] < reference["qr_found"]:
+            regressions.append(f"{name}: found {item['qr_found']} QR codes, baseline found {reference['qr_found']}")
+        if reference is None:
+            continue
+        for stage, values in item["stages"].items():
+            expected = reference["stages"].get(stage)
+            if expected is None:
+                continue
+            now, before = values["median_ms"], expected["median_ms"]
+            if now > before * (1 + tolerance) and now - before >= min_delta_ms:
+                regressions.append(f"{name}/{stage}: {now:.2f} ms vs baseline {before:.2f} ms (+{(now / before - 1):.0%})")
+    return regressions
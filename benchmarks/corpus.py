@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import qrcode
+
+
+@dataclass(frozen=True)
+class CorpusCase:
+    name: str
+    megapixels: float
+    qr_count: int
+    qr_box: int
+    rotation: float = 0.0
+    noise: float = 0.0
+    jpeg_quality: int = 0
+    seed: int = 0
+    # Codes the OpenCV detector is known to find at full resolution, when that is fewer than qr_count.
+    expected_found: Optional[int] = None
+
+    def describe(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+# "quick" stays under a few seconds per repeat and is what the stored baseline covers.
+# Module sizes and rotations are chosen so the OpenCV detector alone finds every
+# quick code; OpenCV misses some axis-aligned multi-code grids and large codes.
+CORPORA: Dict[str, List[CorpusCase]] = {
+    "quick": [
+        CorpusCase("0.3mp-single", 0.3, 1, 4),
+        CorpusCase("0.3mp-rotated-noisy", 0.3, 1, 5, rotation=17.0, noise=8.0, seed=1),
+        CorpusCase("2mp-four-jpeg", 2.0, 4, 6, rotation=10.0, jpeg_quality=80, seed=2),
+        CorpusCase("2mp-empty", 2.0, 0, 6, noise=4.0, seed=3),
+        CorpusCase("8mp-small-codes", 8.0, 3, 4, rotation=5.0, seed=4),
+    ],
+}
+CORPORA["full"] = CORPORA["quick"] + [
+    CorpusCase("12mp-eight-jpeg", 12.0, 8, 8, rotation=30.0, noise=6.0, jpeg_quality=70, seed=5),
+    CorpusCase("24mp-two", 24.0, 2, 10, rotation=10.0, seed=6),
+    CorpusCase("50mp-three-noisy", 50.0, 3, 14, rotation=45.0, noise=10.0, jpeg_quality=85, seed=7, expected_found=1),
+]
+
+
+def _dimensions(megapixels: float) -> tuple[int, int]:
+    # 3:2 landscape, the common camera aspect ratio.
+    height = int(math.sqrt(megapixels * 1_000_000 / 1.5))
+    return int(height * 1.5), height
+
+
+def _qr_code(payload: str, box_size: int) -> np.ndarray:
+    qr = qrcode.QRCode(box_size=box_size, border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return np.array(qr.make_image(fill_color="black", back_color="white").convert("L"))
+
+
+def _rotate(code: np.ndarray, degrees: float) -> np.ndarray:
+    if not degrees:
+        return code
+    height, width = code.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), degrees, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    bound_w, bound_h = int(height * sin + width * cos), int(height * cos + width * sin)
+    matrix[0, 2] += bound_w / 2 - width / 2
+    matrix[1, 2] += bound_h / 2 - height / 2
+    return cv2.warpAffine(code, matrix, (bound_w, bound_h), borderValue=255)
+
+
+def render_case(case: CorpusCase) -> np.ndarray:
+    """Render a case as a BGR buffer; identical inputs always give identical pixels."""
+    rng = np.random.default_rng(case.seed)
+    width, height = _dimensions(case.megapixels)
+    # A soft gradient background keeps encoders from collapsing the image to nothing.
+    gradient = np.linspace(180, 240, width, dtype=np.float32)
+    canvas = np.repeat(gradient[np.newaxis, :], height, axis=0).astype(np.uint8)
+    canvas = cv2.cvtColor(canvas, cv2.COLOR_GRAY2BGR)
+
+    columns = max(1, math.ceil(math.sqrt(case.qr_count)))
+    rows = max(1, math.ceil(case.qr_count / columns))
+    cell_w, cell_h = width // columns, height // rows
+    for index in range(case.qr_count):
+        code = _rotate(_qr_code(f"https://example.com/bench/{case.name}/{index}", case.qr_box), case.rotation)
+        code = code[: cell_h, : cell_w]
+        row, column = divmod(index, columns)
+        max_x, max_y = cell_w - code.shape[1], cell_h - code.shape[0]
+        x = column * cell_w + int(rng.integers(0, max_x + 1))
+        y = row * cell_h + int(rng.integers(0, max_y + 1))
+        canvas[y : y + code.shape[0], x : x + code.shape[1]] = code[:, :, np.newaxis]
+
+    if case.noise:
+        noise = rng.normal(0.0, case.noise, canvas.shape).astype(np.float32)
+        canvas = np.clip(canvas.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    return canvas
+
+
+def encode_case(case: CorpusCase) -> bytes:
+    """Encode a rendered case the way it would arrive as an upload (PNG, or JPEG with artifacts)."""
+    pixels = render_case(case)
+    if case.jpeg_quality:
+        ok, encoded = cv2.imencode(".jpg", pixels, [cv2.IMWRITE_JPEG_QUALITY, case.jpeg_quality])
+    else:
+        ok, encoded = cv2.imencode(".png", pixels, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    if not ok:
+        raise RuntimeError(f"Could not encode corpus case {case.name}")
+    return encoded.tobytes()
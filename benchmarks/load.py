@@ -0,0 +1,340 @@
+"""HTTP load test for ``/api/process`` across increasing concurrency levels.
+
+By default a local ``uvicorn app.main:app`` is started with throwaway storage
+and database paths, so runs are offline and isolated. Examples::
+
+    python -m benchmarks.load                                   # levels 1,2,4,8,16 for 10 s each
+    python -m benchmarks.load --levels 4,16,64 --duration 30 --batch-ratio 0.5
+    python -m benchmarks.load --env QR_CUT_PROCESSING_BACKEND=process --output process.json
+    python -m benchmarks.load --url http://127.0.0.1:8000      # target a running server
+
+Each level reports p50/p95/p99 latency, request and image throughput, error
+rate and the server's resident memory (including worker processes). The exit
+status is 1 when ``--max-error-rate`` or ``--max-p99-ms`` is exceeded at any level.
+
+All harness traffic comes from one address, which per-client admission would
+treat as a single client. Each worker therefore sends its own ``X-Load-Client``
+value, and the local server is started with ``QR_CUT_ADMISSION_CLIENT_HEADER``
+set to that header. Against ``--url``, configure the server the same way, or
+the per-client budget turns most requests into 429s. The global admission
+budget still applies, so 503s at high levels are real load shedding.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+from .corpus import CORPORA, encode_case
+
+PAYLOAD_CASES = ("0.3mp-single", "0.3mp-rotated-noisy", "2mp-four-jpeg")
+# The corpus repeats a handful of payloads, which would otherwise be served from cache.
+NO_CACHE_ENV = {"QR_CUT_RESULT_CACHE_MEMORY_BYTES": "0", "QR_CUT_DETECTION_CACHE_ENTRIES": "0"}
+CLIENT_HEADER = "X-Load-Client"
+# Lets every harness worker count as its own client for per-client admission budgets.
+CLIENT_ENV = {"QR_CUT_ADMISSION_CLIENT_HEADER": CLIENT_HEADER}
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile; ``fraction`` is in [0, 1]."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    requests: int = 0
+    images: int = 0
+    errors: int = 0
+    status_codes: Dict[str, int] = field(default_factory=dict)
+    duration_s: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    max_ms: float = 0.0
+    requests_per_s: float = 0.0
+    images_per_s: float = 0.0
+    error_rate: float = 0.0
+    rss_bytes: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+
+
+def summarize(
+    concurrency: int,
+    latencies_ms: List[float],
+    images: int,
+    status_codes: Dict[str, int],
+    duration_s: float,
+) -> LevelResult:
+    requests = sum(status_codes.values())
+    errors = sum(count for code, count in status_codes.items() if not code.startswith("2"))
+    return LevelResult(
+        concurrency=concurrency,
+        requests=requests,
+        images=images,
+        errors=errors,
+        status_codes=dict(sorted(status_codes.items())),
+        duration_s=round(duration_s, 3),
+        p50_ms=round(percentile(latencies_ms, 0.50), 2),
+        p95_ms=round(percentile(latencies_ms, 0.95), 2),
+        p99_ms=round(percentile(latencies_ms, 0.99), 2),
+        max_ms=round(max(latencies_ms, default=0.0), 2),
+        requests_per_s=round(requests / duration_s, 2) if duration_s else 0.0,
+        images_per_s=round(images / duration_s, 2) if duration_s else 0.0,
+        error_rate=round(errors / requests, 4) if requests else 0.0,
+    )
+
+
+def _process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            children = (task / "children").read_text().split()
+        except OSError:
+            continue
+        for child in children:
+            pids.extend(_process_tree(int(child)))
+    return pids
+
+
+def _status_kb(pid: int, key: str) -> int:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith(f"{key}:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def memory_usage(pid: Optional[int]) -> tuple[Optional[int], Optional[int]]:
+    """Current and peak resident bytes of ``pid`` plus its children; ``None`` off Linux."""
+    if pid is None or not Path(f"/proc/{pid}").exists():
+        return None, None
+    tree = _process_tree(pid)
+    return (
+        sum(_status_kb(member, "VmRSS") for member in tree) * 1024,
+        sum(_status_kb(member, "VmHWM") for member in tree) * 1024,
+    )
+
+
+class LocalServer:
+    """Runs ``uvicorn app.main:app`` in a subprocess with isolated storage."""
+
+    def __init__(self, env: Dict[str, str], workdir: Path) -> None:
+        self.env = env
+        self.workdir = workdir
+        self.port = self._free_port()
+        self.process: Optional[subprocess.Popen[bytes]] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            return probe.getsockname()[1]
+
+    def start(self, timeout: float = 60.0) -> None:
+        self.spawn()
+        self.wait_for("/health", timeout)
+
+    def spawn(self) -> None:
+        env = {
+            **os.environ,
+            "QR_CUT_STORAGE_ROOT": str(self.workdir / "storage"),
+            "QR_CUT_DATABASE_PATH": str(self.workdir / "data" / "app.db"),
+            **self.env,
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port)],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def wait_for(self, path: str, timeout: float = 60.0, interval: float = 0.2) -> None:
+        """Poll ``path`` until it answers 200."""
+        assert self.process is not None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.url}{path}", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(interval)
+        raise RuntimeError(f"Server did not answer {path} in time")
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+
+
+def _payloads() -> List[bytes]:
+    cases = {case.name: case for case in CORPORA["quick"]}
+    return [encode_case(cases[name]) for name in PAYLOAD_CASES]
+
+
+async def run_level(
+    url: str,
+    concurrency: int,
+    duration: float,
+    payloads: List[bytes],
+    batch_ratio: float,
+    batch_size: int,
+    seed: int,
+    server_pid: Optional[int],
+) -> LevelResult:
+    rng = random.Random(seed + concurrency)
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    images = 0
+    peak_rss: Optional[int] = None
+    deadline = time.monotonic() + duration
+
+    async def worker(client: httpx.AsyncClient, worker_index: int) -> None:
+        nonlocal images
+        headers = {CLIENT_HEADER: f"load-{worker_index}"}
+        while time.monotonic() < deadline:
+            count = batch_size if rng.random() < batch_ratio else 1
+            files = [("files", (f"load-{index}.png", rng.choice(payloads), "image/png")) for index in range(count)]
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/api/process", files=files, headers=headers)
+                await response.aread()
+                code = str(response.status_code)
+            except httpx.HTTPError as exc:
+                code = type(exc).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            status_codes[code] = status_codes.get(code, 0) + 1
+            if code.startswith("2"):
+                images += count
+
+    async def sample_memory() -> None:
+        nonlocal peak_rss
+        while time.monotonic() < deadline:
+            current, _ = memory_usage(server_pid)
+            if current is not None:
+                peak_rss = max(peak_rss or 0, current)
+            await asyncio.sleep(0.25)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(300.0), limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(sample_memory(), *(worker(client, index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(concurrency, latencies, images, status_codes, elapsed)
+    result.rss_bytes, hwm = memory_usage(server_pid)
+    result.peak_rss_bytes = max(filter(None, (peak_rss, hwm)), default=None)
+    return result
+
+
+def _print_level(result: LevelResult) -> None:
+    rss = f"{result.rss_bytes / 2**20:.0f} MiB" if result.rss_bytes is not None else "n/a"
+    print(
+        f"c={result.concurrency:<4} req={result.requests:<6} p50={result.p50_ms:>8.1f} p95={result.p95_ms:>8.1f} "
+        f"p99={result.p99_ms:>8.1f} ms  {result.requests_per_s:>7.2f} req/s  {result.images_per_s:>7.2f} img/s  "
+        f"err={result.error_rate:.2%}  rss={rss}",
+        file=sys.stderr,
+    )
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target an already running server instead of starting one.")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level.")
+    parser.add_argument("--batch-ratio", type=float, default=0.3, help="Share of requests that upload a batch.")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-caches", action="store_true", help="Leave the result and detection caches on.")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Server setting override.")
+    parser.add_argument("--output", type=Path, default=Path("load-results.json"))
+    parser.add_argument("--max-error-rate", type=float, default=None)
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    overrides = {
+        **CLIENT_ENV,
+        **({} if args.keep_caches else NO_CACHE_ENV),
+        **dict(item.split("=", 1) for item in args.env),
+    }
+    payloads = _payloads()
+
+    with tempfile.TemporaryDirectory(prefix="qr-cut-load-") as workdir:
+        server = None if args.url else LocalServer(overrides, Path(workdir))
+        if server is not None:
+            server.start()
+        url = args.url or server.url  # type: ignore[union-attr]
+        pid = server.process.pid if server is not None and server.process is not None else None
+        try:
+            results = []
+            for level in levels:
+                result = asyncio.run(
+                    run_level(url, level, args.duration, payloads, args.batch_ratio, args.batch_size, args.seed, pid),
+                )
+                _print_level(result)
+                results.append(result)
+        finally:
+            if server is not None:
+                server.stop()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "target": args.url or "local",
+        "settings": overrides,
+        "duration_per_level_s": args.duration,
+        "batch_ratio": args.batch_ratio,
+        "batch_size": args.batch_size,
+        "levels": [asdict(result) for result in results],
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    failed = False
+    for result in results:
+        if args.max_error_rate is not None and result.error_rate > args.max_error_rate:
+            print(f"FAIL c={result.concurrency}: error rate {result.error_rate:.2%}", file=sys.stderr)
+            failed = True
+        if args.max_p99_ms is not None and result.p99_ms > args.max_p99_ms:
+            print(f"FAIL c={result.concurrency}: p99 {result.p99_ms:.1f} ms", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
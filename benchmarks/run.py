@@ -0,0 +1,175 @@
+"""Benchmark each stage of ``qr_processor`` over a deterministic synthetic corpus.
+
+Examples::
+
+    python -m benchmarks.run                       # quick corpus, compare against benchmarks/baseline.json
+    python -m benchmarks.run --corpus full --output full.json --no-check
+    python -m benchmarks.run --update-baseline     # re-record the baseline on this machine
+
+The exit status is 1 when any stage is slower than the baseline by more than
+``--tolerance`` (and by at least ``--min-delta-ms``), or when a case finds fewer
+QR codes than it contains or than the baseline recorded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Caches would turn every repeat after the first into a lookup.
+os.environ.setdefault("QR_CUT_DETECTION_CACHE_ENTRIES", "0")
+os.environ.setdefault("QR_CUT_PROFILE_MEMORY", "false")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.schemas import ProcessingOptions  # noqa: E402
+from app.services.encoders import encode_image  # noqa: E402
+from app.services.masking import mask_regions  # noqa: E402
+from app.services.qr_processor import decode_image, process_image, run_detection  # noqa: E402
+
+from .compare import compare  # noqa: E402
+from .corpus import CORPORA, CorpusCase, encode_case  # noqa: E402
+
+SCHEMA_VERSION = 1
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+STAGES = ("decode", "detect", "mask", "encode", "process_image")
+
+
+def _time_ms(func: Callable[[], Any]) -> tuple[float, Any]:
+    started = time.perf_counter()
+    value = func()
+    return (time.perf_counter() - started) * 1000, value
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def _peak_bytes(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        return max(0, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_case(case: CorpusCase, options: ProcessingOptions, repeat: int, warmup: int) -> Dict[str, Any]:
+    raw = encode_case(case)
+    tier = options.encode_tier or settings.encode_tier
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    qr_found = 0
+
+    for iteration in range(warmup + repeat):
+        decode_ms, pixels = _time_ms(lambda: decode_image(raw))
+        gray = cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY)
+        detect_ms, detection = _time_ms(lambda: run_detection(gray, options))
+        target = np.array(pixels, copy=True)
+        mask_ms, _ = _time_ms(lambda: mask_regions(target, detection.regions, options))
+        encode_ms, _ = _time_ms(lambda: encode_image(target, options.output_format, tier))
+        full_ms, result = _time_ms(lambda: process_image(raw, f"{case.name}.bin", options))
+        if iteration < warmup:
+            continue
+        for stage, elapsed in zip(STAGES, (decode_ms, detect_ms, mask_ms, encode_ms, full_ms)):
+            samples[stage].append(elapsed)
+        qr_found = result.qr_count
+
+    return {
+        "case": case.describe(),
+        "input_bytes": len(raw),
+        "qr_found": qr_found,
+        "stages": {stage: _summary(values) for stage, values in samples.items()},
+        "peak_bytes": _peak_bytes(lambda: process_image(raw, f"{case.name}.bin", options)),
+    }
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "detector_backends": settings.detector_backends,
+        "detection_mode": settings.detection_mode,
+        "encode_tier": settings.encode_tier,
+    }
+
+
+def run_suite(cases: List[CorpusCase], options: ProcessingOptions, repeat: int, warmup: int) -> Dict[str, Any]:
+    results = []
+    for case in cases:
+        result = bench_case(case, options, repeat, warmup)
+        stages = ", ".join(f"{stage} {values['median_ms']:.1f}" for stage, values in result["stages"].items())
+        print(f"{case.name:<24} qr={result['qr_found']} {stages} ms", file=sys.stderr)
+        results.append(result)
+    return {
+        "schema": SCHEMA_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": _environment(),
+        "options": json.loads(options.json()),
+        "repeat": repeat,
+        "cases": results,
+    }
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", choices=sorted(CORPORA), default="quick")
+    parser.add_argument("--case", action="append", default=[], help="Only run cases whose name contains this text.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per stage.")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore slowdowns smaller than this.")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to --baseline.")
+    parser.add_argument("--no-check", action="store_true", help="Skip the baseline comparison.")
+    parser.add_argument("--output-format", default="PNG", choices=["PNG", "JPEG", "WEBP"])
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    cases = [case for case in CORPORA[args.corpus] if not args.case or any(part in case.name for part in args.case)]
+    if not cases:
+        print("No corpus cases selected.", file=sys.stderr)
+        return 2
+
+    options = ProcessingOptions(output_format=args.output_format)
+    results = run_suite(cases, options, repeat=max(1, args.repeat), warmup=max(0, args.warmup))
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Updated baseline {args.baseline}", file=sys.stderr)
+        return 0
+    if args.no_check or not args.baseline.exists():
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance, args.min_delta_ms)
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Measure cold-start cost: import time, time to live/ready, and first-request latency.
+
+Each warm-up mode is started in a fresh local ``uvicorn`` with isolated storage
+and the caches disabled. Examples::
+
+    python -m benchmarks.startup                          # modes off,background; 3 runs each
+    python -m benchmarks.startup --modes off,blocking,background --runs 5
+    python -m benchmarks.startup --env QR_CUT_PROCESSING_BACKEND=process
+
+Per mode it reports the median over runs of: seconds from spawn until
+``/health/live`` and ``/health`` answer, the latency of the first
+``/api/process`` request, and the median latency of the requests after it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from .load import NO_CACHE_ENV, LocalServer, _payloads
+
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+
+
+def import_seconds(runs: int) -> float:
+    """Median wall time of ``import app.main`` in a fresh interpreter."""
+    samples = [
+        float(subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], capture_output=True, text=True, check=True).stdout)
+        for _ in range(runs)
+    ]
+    return statistics.median(samples)
+
+
+def _request_ms(client: httpx.Client, url: str, payload: bytes) -> float:
+    started = time.perf_counter()
+    response = client.post(f"{url}/api/process", files=[("files", ("startup.png", payload, "image/png"))])
+    elapsed = (time.perf_counter() - started) * 1000
+    response.raise_for_status()
+    return elapsed
+
+
+def measure_start(mode: str, env: Dict[str, str], payload: bytes, requests: int) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="qr-cut-startup-") as workdir:
+        server = LocalServer({**env, "QR_CUT_WARMUP_MODE": mode}, Path(workdir))
+        started = time.perf_counter()
+        server.spawn()
+        try:
+            server.wait_for("/health/live", interval=0.01)
+            live_s = time.perf_counter() - started
+            server.wait_for("/health", interval=0.01)
+            ready_s = time.perf_counter() - started
+            with httpx.Client(timeout=120.0) as client:
+                first_ms = _request_ms(client, server.url, payload)
+                steady = [_request_ms(client, server.url, payload) for _ in range(requests)]
+        finally:
+            server.stop()
+    return {
+        "live_s": live_s,
+        "ready_s": ready_s,
+        "first_request_ms": first_ms,
+        "steady_request_ms": statistics.median(steady),
+    }
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="off,background", help="Comma-separated QR_CUT_WARMUP_MODE values.")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per mode.")
+    parser.add_argument("--requests", type=int, default=10, help="Requests after the first, for the steady state.")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Server setting override.")
+    parser.add_argument("--output", type=Path, default=Path("startup-results.json"))
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    env = {**NO_CACHE_ENV, **dict(item.split("=", 1) for item in args.env)}
+    payload = _payloads()[0]
+    runs = max(1, args.runs)
+
+    report: Dict[str, object] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "settings": env,
+        "runs": runs,
+        "import_s": round(import_seconds(runs), 4),
+        "modes": {},
+    }
+    print(f"import app.main {report['import_s'] * 1000:.0f} ms", file=sys.stderr)
+    for mode in [mode.strip() for mode in args.modes.split(",") if mode.strip()]:
+        samples = [measure_start(mode, env, payload, max(1, args.requests)) for _ in range(runs)]
+        summary = {key: round(statistics.median(sample[key] for sample in samples), 4) for key in samples[0]}
+        report["modes"][mode] = summary  # type: ignore[index]
+        print(
+            f"{mode:<10} live={summary['live_s']:.2f}s ready={summary['ready_s']:.2f}s "
+            f"first={summary['first_request_ms']:.1f}ms steady={summary['steady_request_ms']:.1f}ms",
+            file=sys.stderr,
+        )
+
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
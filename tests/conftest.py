@@ -11,13 +11,34 @@ from fastapi.testclient import TestClient
 
 MODULES_TO_RELOAD = [
     "app.config",
+    "app.utils.metrics",
     "app.database",
     "app.models",
     "app.utils.file_ops",
+    "app.services.detection_cache",
+    "app.services.ingestion",
+    "app.services.detectors",
+    "app.services.tiling",
+    "app.services.masking",
+    "app.services.tracking",
+    "app.services.multiframe",
     "app.services.qr_processor",
+    "app.services.executor",
+    "app.services.result_cache",
+    "app.services.log_writer",
+    "app.services.storage",
+    "app.services.batch",
+    "app.services.admission",
+    "app.services.jobs",
+    "app.services.retention",
+    "app.services.warmup",
     "app.routers.health",
+    "app.routers.metrics",
     "app.routers.processing",
+    "app.routers.detection",
+    "app.routers.jobs",
     "app.routers.logs",
+    "app.routers.stats",
     "app.main",
 ]
 
@@ -28,6 +49,8 @@ def client(tmp_path, monkeypatch: pytest.MonkeyPatch) -> Generator[TestClient, N
     db_path = tmp_path / "data" / "test.db"
     monkeypatch.setenv("QR_CUT_STORAGE_ROOT", str(storage_root))
     monkeypatch.setenv("QR_CUT_DATABASE_PATH", str(db_path))
+    # Finish warm-up inside startup so requests never race readiness.
+    monkeypatch.setenv("QR_CUT_WARMUP_MODE", "blocking")
 
     for module_name in MODULES_TO_RELOAD:
         if module_name in sys.modules:
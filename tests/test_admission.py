@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import io
+
+import pytest
+
+
+def _controller(**overrides):
+    from app.services.admission import AdmissionController
+
+    params = {
+        "enabled": True,
+        "max_requests": 2,
+        "max_cost": 10.0,
+        "client_max_requests": 2,
+        "client_max_cost": 8.0,
+        "queue_size": 1,
+        "queue_timeout": 0.2,
+        "retry_after": 1,
+    }
+    params.update(overrides)
+    return AdmissionController(**params)
+
+
+def test_cost_is_estimated_from_header_dimensions():
+    from app.services.admission import estimate_cost
+    from app.services.ingestion import IngestedUpload
+
+    image = IngestedUpload(filename="a.png", source=io.BytesIO(), size=10, digest="a", width=2000, height=1000, format="PNG")
+    video = IngestedUpload(filename="b.mp4", source=io.BytesIO(), size=1_000_000, digest="b", format="MP4")
+    tiny = IngestedUpload(filename="c.png", source=io.BytesIO(), size=10, digest="c", width=10, height=10, format="PNG")
+
+    assert estimate_cost([image, video, tiny]) == pytest.approx(2.0 + 4.0 + 0.1)
+
+
+def test_client_budget_rejects_with_429():
+    from app.services.admission import AdmissionRejectedError
+
+    controller = _controller()
+
+    async def scenario():
+        await controller.acquire("a", 6.0)
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            await controller.acquire("a", 3.0)
+        await controller.acquire("b", 3.0)
+        return excinfo.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.retry_after == 1
+    assert controller.stats()["rejected_client"] == 1
+    assert controller.stats()["active_requests"] == 2
+
+
+def test_global_budget_queues_then_sheds_with_503():
+    from app.services.admission import AdmissionRejectedError
+
+    controller = _controller(max_requests=1)
+
+    async def scenario():
+        await controller.acquire("a", 1.0)
+        queued = asyncio.create_task(controller.acquire("b", 1.0))
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+        with pytest.raises(AdmissionRejectedError) as full:
+            await controller.acquire("c", 1.0)
+        controller.release("a", 1.0)
+        await queued
+        with pytest.raises(AdmissionRejectedError) as timed_out:
+            await controller.acquire("d", 1.0)
+        return full.value, timed_out.value
+
+    full, timed_out = asyncio.run(scenario())
+    assert (full.status_code, timed_out.status_code) == (503, 503)
+    stats = controller.stats()
+    assert stats["rejected_queue_full"] == 1
+    assert stats["rejected_timeout"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["active_requests"] == 1
+    assert stats["clients"] == 1
+
+
+def test_oversized_request_runs_on_idle_server():
+    controller = _controller(max_cost=1.0, client_max_cost=1.0)
+
+    async def scenario():
+        async with controller.admit("a", 50.0):
+            return controller.stats()["active_cost"]
+
+    assert asyncio.run(scenario()) == 50.0
+    assert controller.stats()["active_requests"] == 0
+
+
+def test_process_endpoint_sheds_over_budget_clients(client, monkeypatch):
+    from test_processing import _make_qr_bytes
+
+    from app.config import settings
+    from app.services.admission import admission_controller
+
+    monkeypatch.setattr(settings, "admission_client_header", "X-Client-Id")
+    admission_controller.client_max_requests = 1
+    admission_controller._charge("tenant-a", 1.0)
+    files = [("files", ("qr.png", _make_qr_bytes("shed"), "image/png"))]
+
+    response = client.post("/api/process", files=files, headers={"X-Client-Id": "tenant-a"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+
+    response = client.post("/api/process", files=files, headers={"X-Client-Id": "tenant-b"})
+    assert response.status_code == 200
+
+    stats = client.get("/api/stats").json()["admission"]
+    assert stats["rejected_client"] == 1
+    assert stats["admitted"] == 1
+    assert 'qr_cut_admission_rejections_total{reason="client"} 1' in client.get("/metrics").text
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def test_corpus_is_deterministic():
+    from benchmarks.corpus import CorpusCase, render_case
+
+    case = CorpusCase("tiny", 0.05, 2, 2, rotation=10.0, noise=5.0, seed=3)
+    first, second = render_case(case), render_case(case)
+
+    assert first.shape[1] > first.shape[0]
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, render_case(CorpusCase("tiny", 0.05, 2, 2, rotation=10.0, noise=5.0, seed=4)))
+
+
+def test_compare_flags_slower_stages_and_lost_detections():
+    from benchmarks.compare import compare
+
+    def result(decode_ms: float, detect_ms: float, qr_found: int, qr_count: int = 2, expected=None) -> dict:
+        return {
+            "cases": [
+                {
+                    "case": {"name": "case", "qr_count": qr_count, "expected_found": expected},
+                    "qr_found": qr_found,
+                    "stages": {"decode": {"median_ms": decode_ms}, "detect": {"median_ms": detect_ms}},
+                },
+            ],
+        }
+
+    baseline = result(decode_ms=10.0, detect_ms=100.0, qr_found=2)
+
+    assert compare(result(11.0, 120.0, 2), baseline, tolerance=0.25, min_delta_ms=2.0) == []
+    # 40% slower, but below the absolute noise floor.
+    assert compare(result(14.0, 100.0, 2), baseline, tolerance=0.25, min_delta_ms=5.0) == []
+
+    regressions = compare(result(10.0, 150.0, 1), baseline, tolerance=0.25, min_delta_ms=2.0)
+    assert len(regressions) == 2
+    assert any("case/detect" in message for message in regressions)
+    assert any("found 1 of 2 expected QR codes" in message for message in regressions)
+
+    # Missing codes the corpus contains is a regression even when the baseline missed them too.
+    short_baseline = result(decode_ms=10.0, detect_ms=100.0, qr_found=1, qr_count=3)
+    assert compare(result(10.0, 100.0, 1, qr_count=3), short_baseline, tolerance=0.25, min_delta_ms=2.0) == [
+        "case: found 1 of 3 expected QR codes",
+    ]
+    # A recorded per-case expectation replaces the rendered count.
+    assert compare(result(10.0, 100.0, 1, qr_count=3, expected=1), short_baseline, tolerance=0.25, min_delta_ms=2.0) == []
+
+
+def test_load_summary_percentiles_and_error_rate():
+    from benchmarks.load import percentile, summarize
+
+    latencies = [float(value) for value in range(1, 101)]
+    assert percentile(latencies, 0.50) == 50.0
+    assert percentile(latencies, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+    result = summarize(8, latencies, images=150, status_codes={"200": 95, "503": 4, "ReadTimeout": 1}, duration_s=10.0)
+    assert (result.requests, result.errors) == (100, 5)
+    assert result.error_rate == 0.05
+    assert result.requests_per_s == 10.0
+    assert result.images_per_s == 15.0
+    assert result.p95_ms == 95.0
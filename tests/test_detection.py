@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import cv2
+from test_processing import _make_qr_bytes
+from test_qr_processor import _make_qr_array, _place_on_canvas
+
+
+def test_detect_returns_regions_without_persisting(client):
+    code = _make_qr_array("https://example.com/detect", box_size=4)
+    canvas = _place_on_canvas(code, (400, 300), (120, 60))
+    image = cv2.imencode(".png", cv2.cvtColor(canvas, cv2.COLOR_RGB2BGR))[1].tobytes()
+
+    response = client.post(
+        "/api/detect",
+        files=[
+            ("files", ("canvas.png", image, "image/png")),
+            ("files", ("broken.png", b"not an image", "image/png")),
+        ],
+    )
+
+    assert response.status_code == 200
+    first, broken = response.json()["images"]
+    assert (first["width"], first["height"]) == (400, 300)
+    assert first["qr_count"] == 1
+    region = first["regions"][0]
+    assert region["data"] == "https://example.com/detect"
+    assert len(region["points"]) == 4
+    bbox = region["bbox"]
+    assert abs(bbox["x"] - 120 - 8) <= 3 and abs(bbox["y"] - 60 - 8) <= 3
+    assert abs(bbox["width"] - (code.shape[1] - 16)) <= 4
+    assert set(first["timings_ms"]) == {"decode", "detect"}
+    assert broken["error"] == "Invalid image data"
+
+    assert client.get("/api/logs").json() == []
+    assert client.get("/api/stats").json()["storage"]["writes"] == 0
+
+
+def test_detect_reuses_detection_cache(client):
+    image = _make_qr_bytes()
+
+    first = client.post("/api/detect", files=[("files", ("qr.png", image, "image/png"))]).json()["images"][0]
+    second = client.post("/api/detect", files=[("files", ("qr.png", image, "image/png"))]).json()["images"][0]
+
+    assert not first["detection_cached"]
+    assert second["detection_cached"]
+    assert second["regions"] == first["regions"]
+    assert client.post("/api/detect", files=[("files", ("x.png", b"", "image/png"))]).status_code == 400
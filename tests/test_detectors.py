@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+
+
+def _fake_backend(name: str, hits: bool, delay: float = 0.0):
+    from app.services.detectors import Detector
+    from app.services.regions import QRRegion
+
+    class FakeDetector(Detector):
+        def detect(self, image):
+            time.sleep(delay)
+            if not hits:
+                return []
+            return [QRRegion(points=np.zeros((4, 2), dtype=np.float32), data=name)]
+
+    FakeDetector.name = name
+    return FakeDetector
+
+
+def test_chain_stops_at_first_backend_with_regions(client, monkeypatch):
+    from app.services import detectors
+
+    monkeypatch.setitem(detectors.DETECTORS, "miss", _fake_backend("miss", hits=False))
+    monkeypatch.setitem(detectors.DETECTORS, "hit", _fake_backend("hit", hits=True))
+    chain = detectors.DetectorChain(["miss", "hit"], adaptive=False)
+
+    regions = chain.detect(np.zeros((10, 10), dtype=np.uint8))
+
+    assert [region.data for region in regions] == ["hit"]
+    stats = chain.stats()["backends"]
+    assert stats["miss"]["calls"] == 1 and stats["miss"]["hits"] == 0
+    assert stats["hit"]["calls"] == 1 and stats["hit"]["hits"] == 1
+
+
+def test_adaptive_chain_promotes_backend_that_finds_regions(client, monkeypatch):
+    from app.services import detectors
+
+    monkeypatch.setitem(detectors.DETECTORS, "slow_miss", _fake_backend("slow_miss", hits=False, delay=0.002))
+    monkeypatch.setitem(detectors.DETECTORS, "fast_hit", _fake_backend("fast_hit", hits=True))
+    chain = detectors.DetectorChain(["slow_miss", "fast_hit"], adaptive=True, min_samples=5)
+    image = np.zeros((10, 10), dtype=np.uint8)
+
+    for _ in range(5):
+        chain.detect(image)
+
+    assert chain.order() == ["fast_hit", "slow_miss"]
+    chain.detect(image)
+    assert chain.stats()["backends"]["slow_miss"]["calls"] == 5
+
+
+def test_detector_instances_are_reused_per_thread(client):
+    from app.services.detectors import get_detector
+
+    first = get_detector("opencv")
+    assert get_detector("opencv") is first
+
+    other: list[object] = []
+    thread = threading.Thread(target=lambda: other.append(get_detector("opencv")))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+
+def test_stats_endpoint_reports_detector_counters(client):
+    from test_processing import _make_qr_bytes
+
+    client.post("/api/process", files=[("files", ("qr.png", _make_qr_bytes(), "image/png"))])
+
+    detectors = client.get("/api/stats").json()["detectors"]
+    assert "opencv" in detectors["order"]
+    assert detectors["backends"]["opencv"]["hits"] >= 1
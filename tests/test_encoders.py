@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import io
+import json
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from test_processing import _make_qr_bytes
+
+
+def _blank_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color=(30, 120, 200)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_image_without_codes_passes_through_unchanged(client):
+    original = _blank_png()
+
+    response = client.post("/api/process", files=[("files", ("blank.png", original, "image/png"))])
+
+    assert response.status_code == 200
+    assert response.content == original
+    image = json.loads(response.headers["X-QR-Cut-Metadata"])["images"][0]
+    assert image["qr_count"] == 0
+    assert image["passthrough"] is True
+
+
+def test_passthrough_requires_matching_format(client):
+    response = client.post(
+        "/api/process",
+        data={"output_format": "JPEG"},
+        files=[("files", ("blank.png", _blank_png(), "image/png"))],
+    )
+
+    assert response.headers["content-type"] == "image/jpeg"
+    assert json.loads(response.headers["X-QR-Cut-Metadata"])["images"][0]["passthrough"] is False
+
+
+def test_webp_output_format(client):
+    response = client.post(
+        "/api/process",
+        data={"output_format": "webp", "encode_tier": "fast"},
+        files=[("files", ("qr.png", _make_qr_bytes(), "image/png"))],
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["content-disposition"].endswith('.webp"')
+    assert Image.open(io.BytesIO(response.content)).format == "WEBP"
+
+
+def test_encoder_tiers_trade_speed_for_size(client):
+    from app.services.encoders import encode_image, sniff_format
+
+    rng = np.random.default_rng(1)
+    pixels = np.repeat(rng.integers(0, 4, size=(256, 256, 1), dtype=np.uint8) * 60, 3, axis=2)
+
+    for output_format in ("PNG", "JPEG", "WEBP"):
+        fast = encode_image(pixels, output_format, "fast")
+        small = encode_image(pixels, output_format, "small")
+        assert sniff_format(fast) == sniff_format(small) == output_format
+        assert len(small) <= len(fast)
+        for encoded in (fast, small):
+            decoded = cv2.imdecode(np.frombuffer(encoded, dtype=np.uint8), cv2.IMREAD_COLOR)
+            assert decoded.shape == pixels.shape
+            # Lossy tiers still keep the four grey levels apart.
+            assert np.abs(decoded.astype(int) - pixels).mean() < 15
+
+    def fastest_ms(tier: str) -> float:
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            encode_image(np.tile(pixels, (2, 2, 1)), "WEBP", tier)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    # WebP tiers pick libwebp's method, so "fast" is faster and not just lower quality.
+    assert fastest_ms("fast") < fastest_ms("small")
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+def _current_thread_name() -> str:
+    return threading.current_thread().name
+
+
+def test_thread_pool_runs_work_off_the_event_loop():
+    from app.services.executor import ProcessingPool
+
+    pool = ProcessingPool(backend="thread", workers=2, max_in_flight=2, queue_size=4)
+
+    async def scenario() -> str:
+        return await pool.run(_current_thread_name)
+
+    try:
+        name = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert name.startswith("qr-cut-worker")
+
+
+def test_pool_rejects_work_when_queue_is_full():
+    from app.services.executor import PoolSaturatedError, ProcessingPool
+
+    pool = ProcessingPool(backend="thread", workers=1, max_in_flight=1, queue_size=1)
+
+    async def scenario() -> list[object]:
+        tasks = [asyncio.create_task(pool.run(time.sleep, 0.2)) for _ in range(3)]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert sum(isinstance(result, PoolSaturatedError) for result in results) == 1
+    assert pool.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_pool_backends_return_results(backend):
+    from app.services.executor import ProcessingPool
+
+    pool = ProcessingPool(backend=backend, workers=1, max_in_flight=1, queue_size=1)
+
+    async def scenario() -> int:
+        return await pool.run(pow, 2, 10)
+
+    try:
+        assert asyncio.run(scenario()) == 1024
+    finally:
+        pool.shutdown()
@@ -5,3 +5,29 @@ def test_health_endpoint(client):
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_health_reports_starting_until_warmup_finishes(client):
+    from app.services.warmup import warmup
+
+    stats = client.get("/api/stats").json()["warmup"]
+    assert stats["state"] == "ready"
+    assert stats["worker_seconds"]
+
+    warmup.state = "running"
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+    assert client.get("/health/live").status_code == 200
+
+
+def test_importing_app_defers_imaging_modules():
+    import subprocess
+    import sys
+
+    script = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('cv2', 'numpy', 'PIL.Image', 'pyzbar.pyzbar') if m in sys.modules))"
+    )
+    loaded = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == ""
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+
+import cv2
+import numpy as np
+import pytest
+from test_qr_processor import _make_qr_array, _place_on_canvas
+
+
+def _canvas_bgr() -> tuple[np.ndarray, np.ndarray]:
+    code = _make_qr_array("https://example.com/hint", box_size=4)
+    canvas = _place_on_canvas(code, (900, 600), (500, 300))
+    return cv2.cvtColor(canvas, cv2.COLOR_RGB2BGR), code
+
+
+def test_hints_restrict_detection_and_fall_back(client, monkeypatch):
+    from app.schemas import ProcessingOptions
+    from app.services import qr_processor
+
+    image, code = _canvas_bgr()
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    searched: list[tuple[int, int]] = []
+    detect_full = qr_processor._detect_full
+
+    def spy(region_image):
+        searched.append(region_image.shape[:2])
+        return detect_full(region_image)
+
+    monkeypatch.setattr(qr_processor, "_detect_full", spy)
+
+    hinted = qr_processor.run_detection(
+        gray,
+        ProcessingOptions(hint_regions=[[[510, 310], [500 + code.shape[1] - 10, 300 + code.shape[0] - 10]]]),
+    )
+    assert hinted.strategy == "hinted"
+    assert hinted.regions[0].data == "https://example.com/hint"
+    assert hinted.regions[0].points[:, 0].min() > 500
+    assert searched and all(height < 600 and width < 900 for height, width in searched)
+
+    missed = qr_processor.run_detection(gray, ProcessingOptions(hint_regions=[[[10, 10], [120, 120]]]))
+    assert missed.strategy in {"pyramid", "full"}
+    assert len(missed.regions) == 1
+
+
+def test_trusted_regions_mask_without_detection(client, monkeypatch):
+    from app.schemas import ProcessingOptions
+    from app.services import qr_processor
+
+    def fail(*args, **kwargs):
+        raise AssertionError("trusted regions must not run detection")
+
+    monkeypatch.setattr(qr_processor, "_detect_full", fail)
+    image, _ = _canvas_bgr()
+    raw = cv2.imencode(".png", image)[1].tobytes()
+
+    result = qr_processor.process_image(
+        raw,
+        "template.png",
+        ProcessingOptions(hint_regions=[[[100, 100], [200, 100], [200, 150], [100, 150]]], trust_regions=True),
+    )
+
+    output = cv2.imdecode(np.frombuffer(result.data, np.uint8), cv2.IMREAD_COLOR)
+    assert result.detection_strategy == "trusted"
+    assert result.qr_count == 1
+    assert output[100:150, 100:200].max() == 0
+    assert output[200:250, 100:200].min() > 0
+
+
+def test_process_endpoint_accepts_hint_form_fields(client):
+    image, _ = _canvas_bgr()
+    raw = cv2.imencode(".png", image)[1].tobytes()
+
+    response = client.post(
+        "/api/process",
+        data={"hint_regions": json.dumps([[[0, 0], [50, 50]]]), "trust_regions": "true"},
+        files=[("files", ("template.png", raw, "image/png"))],
+    )
+    assert response.status_code == 200
+    assert json.loads(response.headers["X-QR-Cut-Metadata"])["images"][0]["detection_strategy"] == "trusted"
+
+    bad = client.post("/api/process", data={"trust_regions": "true"}, files=[("files", ("t.png", raw, "image/png"))])
+    assert bad.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "hints",
+    [
+        "not json",
+        "[[[1, 2]]]",
+        "[[[1, 2, 3], [4, 5]]]",
+        "[[[0, 0], [NaN, 10]]]",
+        "[[[0, 0], [Infinity, 10]]]",
+        "[[[0, 0], [-Infinity, 10]]]",
+        "[[[0, 0], [1e300, 10]]]",
+    ],
+)
+def test_invalid_hints_are_rejected(hints):
+    from pydantic import ValidationError
+
+    from app.schemas import ProcessingOptions
+
+    with pytest.raises(ValidationError):
+        ProcessingOptions(hint_regions=hints)
+
+
+def test_non_finite_hints_are_rejected_by_the_endpoint(client):
+    image, _ = _canvas_bgr()
+    raw = cv2.imencode(".png", image)[1].tobytes()
+
+    response = client.post(
+        "/api/process",
+        data={"hint_regions": "[[[0, 0], [Infinity, 10]]]", "trust_regions": "true"},
+        files=[("files", ("template.png", raw, "image/png"))],
+    )
+    assert response.status_code == 422
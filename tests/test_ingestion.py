@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import io
+
+from PIL import Image
+
+from test_processing import _make_qr_bytes
+
+
+def _fail_if_called(*args, **kwargs):
+    raise AssertionError("over-limit uploads must be rejected before processing")
+
+
+def test_upload_over_byte_limit_is_rejected(client, monkeypatch):
+    from app.config import settings
+
+    image_bytes = _make_qr_bytes()
+    monkeypatch.setattr(settings, "max_upload_bytes", len(image_bytes) - 1)
+    monkeypatch.setattr("app.services.batch.process_image", _fail_if_called)
+
+    response = client.post("/api/process", files=[("files", ("qr.png", image_bytes, "image/png"))])
+
+    assert response.status_code == 413
+    assert "byte limit" in response.json()["detail"]
+
+
+def test_upload_over_pixel_limit_is_rejected_from_header(client, monkeypatch):
+    from app.config import settings
+
+    buffer = io.BytesIO()
+    Image.new("L", (4000, 3000), color=255).save(buffer, format="PNG")
+    monkeypatch.setattr(settings, "max_image_megapixels", 10.0)
+    monkeypatch.setattr("app.services.batch.process_image", _fail_if_called)
+
+    response = client.post(
+        "/api/process",
+        files=[
+            ("files", ("small.png", _make_qr_bytes(), "image/png")),
+            ("files", ("huge.png", buffer.getvalue(), "image/png")),
+        ],
+    )
+
+    assert response.status_code == 413
+    assert "12.0 MP" in response.json()["detail"]
+
+
+def test_ingest_upload_reads_header_without_decoding(client):
+    from app.services.ingestion import ingest_upload
+
+    stream = io.BytesIO(_make_qr_bytes())
+    upload = ingest_upload("qr.png", stream)
+
+    assert upload.valid
+    assert upload.format == "PNG"
+    assert upload.width == upload.height
+    assert upload.source is stream
+    assert stream.tell() == 0
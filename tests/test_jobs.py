@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import io
+import time
+import zipfile
+
+from test_logs import _flush_logs
+from test_processing import _make_qr_bytes
+
+
+def _wait_for(client, job_id: str, timeout: float = 15.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/api/jobs/{job_id}").json()
+        if status["status"] in {"completed", "failed"}:
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish: {status}")
+
+
+def test_job_processes_batch_in_background(client):
+    response = client.post(
+        "/api/jobs",
+        data={"output_format": "PNG"},
+        files=[
+            ("files", ("one.png", _make_qr_bytes("https://example.com/1"), "image/png")),
+            ("files", ("two.png", _make_qr_bytes("https://example.com/2"), "image/png")),
+            ("files", ("broken.png", b"not an image", "image/png")),
+        ],
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["total"] == 3
+    assert len(job["items"]) == 3
+
+    status = _wait_for(client, job["job_id"])
+    assert status["status"] == "completed"
+    assert (status["completed"], status["failed"]) == (2, 1)
+    assert status["items"][2]["result"]["error"] == "Invalid image data"
+    assert status["items"][0]["result"]["qr_count"] >= 1
+
+    result = client.get(status["result_url"])
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(result.content)) as archive:
+        assert len(archive.namelist()) == 2
+    _flush_logs()
+    assert len(client.get("/api/logs").json()) == 2
+
+
+def test_single_image_job_returns_image(client):
+    response = client.post("/api/jobs", files=[("files", ("qr.png", _make_qr_bytes(), "image/png"))])
+    status = _wait_for(client, response.json()["job_id"])
+
+    result = client.get(f"/api/jobs/{status['job_id']}/result")
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "image/png"
+    assert client.get("/api/jobs/missing").status_code == 404
+    assert client.get("/api/jobs/missing/result").status_code == 404
+
+
+def test_interrupted_job_resumes_after_restart(client):
+    from app.database import get_session
+    from app.models import Job
+    from app.schemas import ProcessingOptions
+    from app.services.jobs import job_queue
+
+    client.portal.call(job_queue.stop)
+    job_id = job_queue.submit([("qr.png", io.BytesIO(_make_qr_bytes()))], ProcessingOptions())
+    with get_session() as session:
+        session.get(Job, job_id).status = "running"
+        session.commit()
+    assert client.get(f"/api/jobs/{job_id}/result").status_code == 409
+
+    client.portal.call(job_queue.start)
+    assert _wait_for(client, job_id)["status"] == "completed"
+
+
+
+def test_jobs_with_a_live_lease_are_left_to_their_owner(client):
+    from datetime import datetime, timedelta
+
+    from app.database import get_session
+    from app.models import Job
+    from app.schemas import ProcessingOptions
+    from app.services.jobs import job_queue
+
+    client.portal.call(job_queue.stop)
+    job_id = job_queue.submit([("qr.png", io.BytesIO(_make_qr_bytes()))], ProcessingOptions())
+    with get_session() as session:
+        job = session.get(Job, job_id)
+        job.status, job.owner = "running", "other-process"
+        job.lease_expires_at = datetime.utcnow() + timedelta(minutes=5)
+        session.commit()
+
+    assert job_queue._claim() is None
+
+    with get_session() as session:
+        session.get(Job, job_id).lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        session.commit()
+    client.portal.call(job_queue.start)
+    assert _wait_for(client, job_id)["status"] == "completed"
+    with get_session() as session:
+        job = session.get(Job, job_id)
+        assert (job.owner, job.lease_expires_at) == (None, None)
+
+
+def test_saturated_pool_is_retried_with_backoff(client, monkeypatch):
+    from app.services import batch
+    from app.services.executor import PoolSaturatedError
+    from app.services.jobs import job_queue
+
+    run = batch.processing_pool.run
+    calls = []
+
+    async def saturated_twice(*args, **kwargs):
+        calls.append(args)
+        if len(calls) <= 2:
+            raise PoolSaturatedError("Processing queue is full, retry later.")
+        return await run(*args, **kwargs)
+
+    monkeypatch.setattr(batch.processing_pool, "run", saturated_twice)
+    monkeypatch.setattr(job_queue, "retry_backoff", 0.01)
+
+    response = client.post("/api/jobs", files=[("files", ("qr.png", _make_qr_bytes(), "image/png"))])
+    status = _wait_for(client, response.json()["job_id"])
+
+    assert status["status"] == "completed"
+    assert status["completed"] == 1
+    assert len(calls) == 3
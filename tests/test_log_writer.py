@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+
+from sqlalchemy import func, select, text
+
+
+def _row(index: int) -> dict:
+    return {
+        "original_filename": f"image-{index}.png",
+        "processed_filename": f"processed-{index}.png",
+        "qr_count": 1,
+        "fill_color": "#000000",
+        "fill_shape": "rectangle",
+        "opacity": 1.0,
+        "output_format": "PNG",
+    }
+
+
+def _count_rows() -> int:
+    from app.database import SessionLocal
+    from app.models import ProcessLog
+
+    with SessionLocal() as session:
+        return session.scalar(select(func.count()).select_from(ProcessLog))
+
+
+def test_rows_are_written_in_batches(client):
+    from app.database import SessionLocal
+    from app.models import ProcessLog
+    from app.services.log_writer import BatchedRowWriter
+
+    writer = BatchedRowWriter(SessionLocal, batch_size=3, flush_interval=60, model=ProcessLog)
+    writer.start()
+    try:
+        writer.submit([_row(0), _row(1)])
+        time.sleep(0.05)
+        assert _count_rows() == 0
+
+        writer.submit([_row(2)])
+        deadline = time.monotonic() + 2
+        while _count_rows() < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _count_rows() == 3
+    finally:
+        writer.stop()
+
+    assert writer.stats() == {"queued": 3, "written": 3, "failed": 0, "flushes": 1, "pending": 0}
+
+
+def test_pending_rows_flush_on_interval_and_stop(client):
+    from app.database import SessionLocal
+    from app.models import ProcessLog
+    from app.services.log_writer import BatchedRowWriter
+
+    writer = BatchedRowWriter(SessionLocal, batch_size=100, flush_interval=0.05, model=ProcessLog)
+    writer.submit([_row(0)])
+    deadline = time.monotonic() + 2
+    while _count_rows() < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _count_rows() == 1
+
+    writer.submit([_row(1)])
+    writer.stop()
+    assert _count_rows() == 2
+
+
+def test_sqlite_uses_wal_journal(client):
+    from app.database import engine
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+
+def _flush_logs() -> None:
+    """Write queued log rows now; the log endpoints read without forcing a flush."""
+    from app.services.log_writer import log_writer
+
+    log_writer.flush()
+
+
+def _seed(count: int) -> None:
+    from app.services.log_writer import log_writer
+
+    log_writer.submit(
+        {
+            "original_filename": f"{'scan' if index % 2 else 'photo'}_{index}.png",
+            "processed_filename": f"processed_{index}.png",
+            "qr_count": index % 3,
+            "fill_color": "#000000",
+            "fill_shape": "rectangle",
+            "opacity": 1.0,
+            "output_format": "PNG" if index % 2 else "JPEG",
+        }
+        for index in range(count)
+    )
+    log_writer.flush()
+
+
+def test_logs_paginate_with_cursor(client):
+    _seed(7)
+
+    first = client.get("/api/logs", params={"limit": 3})
+    assert first.status_code == 200
+    assert len(first.json()) == 3
+    cursor = first.headers["X-Next-Cursor"]
+
+    seen = [entry["id"] for entry in first.json()]
+    while cursor:
+        page = client.get("/api/logs", params={"limit": 3, "cursor": cursor})
+        seen.extend(entry["id"] for entry in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 7
+    assert client.get("/api/logs", params={"cursor": "nope"}).status_code == 400
+
+
+def test_logs_filters(client):
+    _seed(6)
+
+    scans = client.get("/api/logs", params={"filename_prefix": "scan_"}).json()
+    assert {entry["original_filename"] for entry in scans} == {"scan_1.png", "scan_3.png", "scan_5.png"}
+
+    jpeg_with_qr = client.get("/api/logs", params={"output_format": "jpeg", "min_qr": 1}).json()
+    assert all(entry["output_format"] == "JPEG" and entry["qr_count"] >= 1 for entry in jpeg_with_qr)
+    assert len(jpeg_with_qr) == 2
+
+    assert client.get("/api/logs", params={"since": "2999-01-01T00:00:00"}).json() == []
+    assert len(client.get("/api/logs", params={"until": "2999-01-01T00:00:00"}).json()) == 6
+
+
+def test_log_stats_aggregates_in_buckets(client):
+    _seed(6)
+
+    response = client.get("/api/logs/stats", params={"bucket": "day"})
+    assert response.status_code == 200
+    buckets = response.json()
+    assert sum(bucket["images"] for bucket in buckets) == 6
+    assert sum(bucket["qr_total"] for bucket in buckets) == 0 + 1 + 2 + 0 + 1 + 2
+    assert sum(bucket["images_with_qr"] for bucket in buckets) == 4
+    assert client.get("/api/logs/stats", params={"bucket": "week"}).status_code == 422
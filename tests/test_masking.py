@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+
+from test_processing import _make_qr_bytes
+
+
+def _checkerboard(size: int = 120) -> np.ndarray:
+    tiles = (np.indices((size, size)).sum(axis=0) // 4) % 2
+    return np.repeat((tiles * 255).astype(np.uint8)[:, :, None], 3, axis=2)
+
+
+def _diamond():
+    from app.services.qr_processor import QRRegion
+
+    return QRRegion(points=np.array([[60, 20], [100, 60], [60, 100], [20, 60]], dtype=np.float32))
+
+
+def test_polygon_shape_follows_rotated_corners(client):
+    from app.schemas import ProcessingOptions
+    from app.services.masking import mask_regions
+
+    pixels = np.full((120, 120, 3), 255, dtype=np.uint8)
+
+    mask_regions(pixels, [_diamond()], ProcessingOptions(shape="polygon"))
+
+    assert (pixels[60, 60] == 0).all()
+    assert (pixels[25, 25] == 255).all()
+    assert (pixels[95, 95] == 255).all()
+
+
+def test_blur_style_only_changes_the_region(client):
+    from app.schemas import ProcessingOptions
+    from app.services.masking import mask_regions
+
+    original = _checkerboard()
+    pixels = original.copy()
+
+    mask_regions(pixels, [_diamond()], ProcessingOptions(style="blur"))
+
+    inside = pixels[40:80, 40:80].astype(int)
+    assert inside.std() < original[40:80, 40:80].std() / 4
+    assert (pixels[:20] == original[:20]).all()
+    assert (pixels[:, 101:] == original[:, 101:]).all()
+
+
+def test_pixelate_style_uses_uniform_blocks(client):
+    from app.schemas import ProcessingOptions
+    from app.services.masking import mask_regions
+
+    pixels = np.random.default_rng(0).integers(0, 255, size=(120, 120, 3), dtype=np.uint8)
+
+    mask_regions(pixels, [_diamond()], ProcessingOptions(style="pixelate", pixel_size=10))
+
+    block = pixels[20:30, 20:30]
+    assert (block == block[0, 0]).all()
+
+
+def test_process_endpoint_accepts_mask_styles(client):
+    response = client.post(
+        "/api/process",
+        data={"style": "pixelate", "shape": "polygon", "output_format": "PNG"},
+        files=[("files", ("qr.png", _make_qr_bytes(), "image/png"))],
+    )
+
+    assert response.status_code == 200
+    assert json.loads(response.headers["X-QR-Cut-Metadata"])["images"][0]["qr_count"] == 1
+
+    invalid = client.post(
+        "/api/process",
+        data={"style": "smudge"},
+        files=[("files", ("qr.png", _make_qr_bytes(), "image/png"))],
+    )
+    assert invalid.status_code == 422
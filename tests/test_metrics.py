@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import re
+
+from test_logs import _flush_logs
+from test_processing import _make_qr_bytes
+
+
+def _sample(text: str, series: str) -> float:
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{series} missing from /metrics"
+    return float(match.group(1))
+
+
+def test_histogram_renders_cumulative_buckets():
+    from app.utils.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo.", ["stage"])
+    for value in (0.0004, 0.003, 0.003, 50.0):
+        histogram.observe(value, stage="decode")
+
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert _sample(text, 'demo_seconds_bucket{stage="decode",le="0.0005"}') == 1
+    assert _sample(text, 'demo_seconds_bucket{stage="decode",le="0.005"}') == 3
+    assert _sample(text, 'demo_seconds_bucket{stage="decode",le="+Inf"}') == 4
+    assert _sample(text, 'demo_seconds_count{stage="decode"}') == 4
+
+
+def test_metrics_endpoint_reports_pipeline_stages(client):
+    response = client.post(
+        "/api/process",
+        files=[
+            ("files", ("qr.png", _make_qr_bytes(), "image/png")),
+            ("files", ("broken.png", b"not an image", "image/png")),
+        ],
+    )
+    assert response.status_code == 200
+    response.read()
+    _flush_logs()
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = metrics.text
+    for stage in ("upload_read", "decode", "detect", "mask", "encode", "persist", "db_write", "zip"):
+        assert _sample(text, f'qr_cut_stage_seconds_count{{stage="{stage}"}}') >= 1
+    assert _sample(text, 'qr_cut_images_total{outcome="processed"}') == 1
+    assert _sample(text, 'qr_cut_errors_total{reason="invalid"}') == 1
+    assert _sample(text, "qr_cut_regions_total") >= 1
+    assert _sample(text, "qr_cut_bytes_in_total") > 0
+    assert _sample(text, "qr_cut_in_flight") == 0
+    assert re.search(r'^qr_cut_detector_seconds_count\{backend="\w+"\} \d+', text, re.MULTILINE)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import io
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image, ImageSequence
+from test_qr_processor import _make_qr_array, _place_on_canvas
+
+CANVAS = (320, 240)
+
+
+def _moving_frames(count: int) -> list[np.ndarray]:
+    code = _make_qr_array(box_size=4)
+    return [_place_on_canvas(code, CANVAS, (30 + 6 * index, 40 + 3 * index)) for index in range(count)]
+
+
+def _detected(frame_rgb: np.ndarray) -> int:
+    from app.services.detectors import detector_chain
+
+    return len(detector_chain.detect(cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2GRAY)))
+
+
+def test_tracker_follows_translation(client):
+    from app.services.detectors import detector_chain
+    from app.services.tracking import RegionTracker
+
+    first, second = (cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY) for frame in _moving_frames(2))
+    regions = detector_chain.detect(first)
+    assert regions
+
+    tracker = RegionTracker()
+    tracker.reset(first, regions)
+    tracked = tracker.track(second)
+
+    assert tracked is not None
+    shift = tracked[0].points.mean(axis=0) - regions[0].points.mean(axis=0)
+    assert np.allclose(shift, [6, 3], atol=1.0)
+
+
+def test_animated_gif_is_masked_on_every_frame(client):
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import process_image
+
+    frames = [Image.fromarray(frame) for frame in _moving_frames(8)]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=80, loop=0)
+
+    result = process_image(buffer.getvalue(), "clip.gif", ProcessingOptions(output_format="PNG"))
+
+    assert result.output_format == "GIF"
+    assert result.frames == 8
+    assert 1 <= result.keyframes < 8
+    assert result.qr_count == 1
+    with Image.open(io.BytesIO(result.data)) as output:
+        assert output.format == "GIF"
+        masked = [np.array(frame.convert("RGB")) for frame in ImageSequence.Iterator(output)]
+        assert output.info.get("duration") == 80
+    assert len(masked) == 8
+    assert all(_detected(frame) == 0 for frame in masked)
+
+
+def test_code_appearing_after_the_first_frame_is_masked(client):
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import process_image
+
+    blank = np.full((CANVAS[1], CANVAS[0], 3), 255, dtype=np.uint8)
+    frames = [Image.fromarray(frame) for frame in [blank, *_moving_frames(11)]]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=80, loop=0)
+
+    result = process_image(buffer.getvalue(), "late.gif", ProcessingOptions(output_format="PNG"))
+
+    assert not result.passthrough
+    assert result.frames == 12
+    assert result.keyframes < 12
+    with Image.open(io.BytesIO(result.data)) as output:
+        masked = [np.array(frame.convert("RGB")) for frame in ImageSequence.Iterator(output)]
+    assert len(masked) == 12
+    assert all(_detected(frame) == 0 for frame in masked)
+
+
+def test_mp4_clip_keeps_container(client):
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import process_image
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "clip.mp4"
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10, CANVAS)
+        for frame in _moving_frames(12):
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+        writer.release()
+        result = process_image(path.read_bytes(), "clip.mp4", ProcessingOptions())
+
+        output_path = Path(workdir) / "masked.mp4"
+        output_path.write_bytes(result.data)
+        capture = cv2.VideoCapture(str(output_path))
+        decoded = []
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            decoded.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        capture.release()
+
+    assert result.output_format == "MP4"
+    assert result.frames == 12 and result.keyframes < 12
+    assert result.audio_dropped is False
+    assert len(decoded) == 12
+    assert all(_detected(frame) == 0 for frame in decoded)
+
+
+def test_multipage_tiff_is_masked_page_by_page(client):
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import process_image
+
+    pages = [Image.fromarray(frame) for frame in _moving_frames(3)]
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format="TIFF", save_all=True, append_images=pages[1:])
+
+    result = process_image(buffer.getvalue(), "scan.tiff", ProcessingOptions())
+
+    assert result.output_format == "TIFF"
+    assert result.frames == 3
+    with Image.open(io.BytesIO(result.data)) as output:
+        assert output.n_frames == 3
+        assert output.info.get("compression") == "tiff_adobe_deflate"
+        masked = [np.array(page.convert("RGB")) for page in ImageSequence.Iterator(output)]
+    assert all(_detected(page) == 0 for page in masked)
+
+
+def test_audio_tracks_are_recognised_from_the_handler_box():
+    from app.services.multiframe import has_audio_track
+
+    def hdlr(handler: bytes) -> bytes:
+        return b"\x00\x00\x00\x21hdlr" + b"\x00" * 8 + handler + b"\x00" * 12
+
+    assert has_audio_track(b"\x00\x00\x00\x18ftypisom" + hdlr(b"vide") + hdlr(b"soun"))
+    assert not has_audio_track(b"\x00\x00\x00\x18ftypisom" + hdlr(b"vide"))
+
+
+def test_process_endpoint_returns_same_container(client):
+    import json
+
+    frames = [Image.fromarray(frame) for frame in _moving_frames(4)]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=100)
+
+    response = client.post("/api/process", files=[("files", ("clip.gif", buffer.getvalue(), "image/gif"))])
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/gif"
+    image = json.loads(response.headers["X-QR-Cut-Metadata"])["images"][0]
+    assert image["processed_filename"].endswith(".gif")
+    assert image["frames"] == 4
+    assert image["detection_strategy"] == "keyframe"
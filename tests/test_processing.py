@@ -8,6 +8,7 @@ from typing import cast
 
 import qrcode
 from PIL import Image
+from test_logs import _flush_logs
 
 
 def _make_qr_bytes(payload: str = "https://example.com") -> bytes:
@@ -41,6 +42,7 @@ def test_process_single_image_returns_masked_image_and_metadata(client):
     metadata = json.loads(response.headers["X-QR-Cut-Metadata"])
     assert metadata["images"], "Metadata should include processed images"
     assert metadata["images"][0]["qr_count"] >= 1
+    _flush_logs()
     logs_response = client.get("/api/logs")
     assert logs_response.status_code == 200
     logs = logs_response.json()
@@ -73,7 +75,72 @@ def test_process_multiple_images_returns_archive(client):
     with zipfile.ZipFile(archive_bytes) as archive:
         names = archive.namelist()
         assert len(names) == 2
+        assert all(archive.getinfo(name).compress_type == zipfile.ZIP_STORED for name in names)
 
     metadata = json.loads(response.headers["X-QR-Cut-Metadata"])
     assert metadata["archive"] is not None
     assert len(metadata["images"]) == 2
+
+
+def test_process_batch_reports_failed_images_without_aborting(client):
+    files = [
+        ("files", (f"qr{index}.png", _make_qr_bytes(f"https://example.com/{index}"), "image/png"))
+        for index in range(4)
+    ]
+    files.insert(2, ("files", ("broken.png", b"not an image", "image/png")))
+
+    response = client.post("/api/process", data={"output_format": "PNG"}, files=files)
+
+    assert response.status_code == 200
+    metadata = json.loads(response.headers["X-QR-Cut-Metadata"])
+    assert [item["original_filename"] for item in metadata["images"]] == [
+        "qr0.png",
+        "qr1.png",
+        "broken.png",
+        "qr2.png",
+        "qr3.png",
+    ]
+    assert metadata["images"][2]["error"] == "Invalid image data"
+    assert metadata["images"][2]["processed_filename"] is None
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert len(archive.namelist()) == 4
+
+    _flush_logs()
+    assert len(client.get("/api/logs").json()) == 4
+
+
+def test_unexpected_errors_fail_only_their_image(client, monkeypatch):
+    from app.services import batch
+
+    store = batch.storage.store
+
+    def flaky_store(kind, name, digest, suffix, data):
+        if "qr1" in name:
+            raise OSError("disk full")
+        return store(kind, name, digest, suffix, data)
+
+    monkeypatch.setattr(batch.storage, "store", flaky_store)
+    files = [
+        ("files", (f"qr{index}.png", _make_qr_bytes(f"https://example.com/{index}"), "image/png"))
+        for index in range(3)
+    ]
+
+    response = client.post("/api/process", files=files)
+
+    assert response.status_code == 200
+    images = json.loads(response.headers["X-QR-Cut-Metadata"])["images"]
+    assert [image["error"] is None for image in images] == [True, False, True]
+    assert "OSError" in images[1]["error"]
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert len(archive.namelist()) == 2
+
+
+def test_process_single_invalid_image_is_rejected(client):
+    response = client.post(
+        "/api/process",
+        files=[("files", ("broken.png", b"not an image", "image/png"))],
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Invalid image data"
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import io
+import json
+from typing import cast
+
+import cv2
+import numpy as np
+import qrcode
+from PIL import Image
+
+
+def _make_qr_array(payload: str = "https://example.com", box_size: int = 4) -> np.ndarray:
+    qr = qrcode.QRCode(box_size=box_size, border=2)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    pil_image = cast(Image.Image, qr.make_image(fill_color="black", back_color="white"))
+    return np.array(pil_image.convert("RGB"))
+
+
+def _place_on_canvas(code: np.ndarray, size: tuple[int, int], offset: tuple[int, int]) -> np.ndarray:
+    canvas = np.full((size[1], size[0], 3), 255, dtype=np.uint8)
+    x, y = offset
+    canvas[y : y + code.shape[0], x : x + code.shape[1]] = code
+    return canvas
+
+
+def test_pyramid_detection_maps_points_to_full_resolution(client):
+    from app.services.qr_processor import detect_qr_regions
+
+    code = _make_qr_array(box_size=12)
+    image = _place_on_canvas(code, (3000, 2000), (1700, 900))
+
+    regions = detect_qr_regions(image, scales=[0.25, 0.5])
+
+    assert len(regions) == 1
+    assert regions[0].data == "https://example.com"
+    min_x, min_y = regions[0].points.min(axis=0)
+    max_x, max_y = regions[0].points.max(axis=0)
+    assert abs(min_x - (1700 + 24)) < 12
+    assert abs(min_y - (900 + 24)) < 12
+    assert abs(max_x - (1700 + code.shape[1] - 24)) < 12
+    assert abs(max_y - (900 + code.shape[0] - 24)) < 12
+
+
+def test_pyramid_ladder_skips_scales_below_minimum_side(client):
+    from app.services.qr_processor import resolve_scale_ladder
+
+    assert resolve_scale_ladder((200, 300, 3), [0.25, 0.5]) == [1.0]
+    assert resolve_scale_ladder((3000, 4000, 3), [0.5, 0.25, 0.5]) == [0.25, 0.5, 1.0]
+
+
+def test_pyramid_escalates_to_full_resolution_for_small_codes(client):
+    from app.services.qr_processor import detect_qr_regions
+
+    code = _make_qr_array(box_size=3)
+    image = _place_on_canvas(code, (3200, 2400), (100, 100))
+
+    regions = detect_qr_regions(image, scales=[0.25])
+
+    assert len(regions) == 1
+    assert regions[0].decoded
+
+
+def test_pyramid_keeps_small_codes_next_to_large_ones(client, monkeypatch):
+    from app.config import settings
+    from app.services.qr_processor import _detect_at_scale, detect_qr_regions
+
+    image = _place_on_canvas(_make_qr_array("big-code", box_size=8), (1600, 1200), (100, 100))
+    small = _make_qr_array("small-code", box_size=3)
+    image[900 : 900 + small.shape[0], 1300 : 1300 + small.shape[1]] = small
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    # The coarse level alone decodes only the large code.
+    assert [region.data for region in _detect_at_scale(gray, 0.5)] == ["big-code"]
+
+    # By default the pyramid stops at the first level where everything decodes.
+    assert [region.data for region in detect_qr_regions(gray, scales=[0.5])] == ["big-code"]
+
+    monkeypatch.setattr(settings, "pyramid_full_pass", True)
+    regions = detect_qr_regions(gray, scales=[0.5])
+
+    assert sorted(region.data for region in regions) == ["big-code", "small-code"]
+
+
+def test_tiles_cover_image_with_overlap(client):
+    from app.services.tiling import iter_tiles
+
+    tiles = iter_tiles(2500, 1000, tile_size=1024, overlap=256)
+
+    assert {(x, y) for x, y, _, _ in tiles} == {(0, 0), (768, 0), (1476, 0)}
+    assert all(width == 1024 and height == 1000 for _, _, width, height in tiles)
+    assert max(x + width for x, _, width, _ in tiles) == 2500
+
+
+def test_tiled_detection_merges_codes_across_tile_borders(client, monkeypatch):
+    from app.config import settings
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import run_detection
+
+    monkeypatch.setattr(settings, "tiling_min_pixels", 1_000_000)
+    monkeypatch.setattr(settings, "tile_size", 640)
+    monkeypatch.setattr(settings, "tile_overlap", 240)
+    image = np.full((1400, 1800, 3), 255, dtype=np.uint8)
+    offsets = [(300, 300), (1000, 200), (500, 900)]
+    for index, (x, y) in enumerate(offsets):
+        code = _make_qr_array(f"https://example.com/{index}", box_size=4)
+        image[y : y + code.shape[0], x : x + code.shape[1]] = code
+
+    detection = run_detection(image, ProcessingOptions())
+
+    assert detection.strategy == "tiled"
+    assert sorted(region.data for region in detection.regions) == [
+        "https://example.com/0",
+        "https://example.com/1",
+        "https://example.com/2",
+    ]
+    assert len(detection.tiles) == 12
+    assert sum(tile.regions for tile in detection.tiles) > 3
+
+
+def test_tiled_detection_finds_codes_wider_than_the_overlap(client, monkeypatch):
+    from app.config import settings
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import _detect_full, run_detection
+    from app.services.tiling import detect_tiled
+
+    monkeypatch.setattr(settings, "tiling_min_pixels", 1_000_000)
+    monkeypatch.setattr(settings, "tile_size", 640)
+    monkeypatch.setattr(settings, "tile_overlap", 240)
+    monkeypatch.setattr(settings, "tile_overview_side", 900)
+    code = _make_qr_array("https://example.com/seam", box_size=16)
+    assert code.shape[0] > 400
+    image = _place_on_canvas(code, (1800, 1400), (300, 300))
+
+    assert detect_tiled(image, _detect_full, overview_side=0).regions == []
+    detection = run_detection(image, ProcessingOptions())
+
+    assert detection.strategy == "tiled"
+    assert [region.data for region in detection.regions] == ["https://example.com/seam"]
+
+
+def test_tiled_metadata_header_carries_a_tile_summary(client, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "tiling_min_pixels", 1_000_000)
+    monkeypatch.setattr(settings, "tile_size", 640)
+    buffer = io.BytesIO()
+    Image.fromarray(_place_on_canvas(_make_qr_array(), (1800, 1400), (100, 100))).save(buffer, format="PNG")
+
+    response = client.post("/api/process", files=[("files", ("large.png", buffer.getvalue(), "image/png"))])
+
+    tiles = json.loads(response.headers["X-QR-Cut-Metadata"])["images"][0]["tiles"]
+    assert set(tiles) == {"count", "total_ms", "max_ms"}
+    assert tiles["max_ms"] <= tiles["total_ms"]
+    assert f"qr_cut_tile_seconds_count {tiles['count']}" in client.get("/metrics").text
+
+
+def test_mask_regions_only_touches_region_bounding_box(client):
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import QRRegion, mask_regions
+
+    pixels = np.full((100, 120, 3), 200, dtype=np.uint8)
+    region = QRRegion(points=np.array([[10, 20], [49, 20], [49, 59], [10, 59]], dtype=np.float32))
+
+    result = mask_regions(pixels, [region], ProcessingOptions(fill_color="#ff0000", opacity=0.5))
+
+    assert result is pixels
+    assert np.abs(pixels[20:60, 10:50].astype(int) - [100, 100, 228]).max() <= 1
+    untouched = np.ones(pixels.shape[:2], dtype=bool)
+    untouched[20:60, 10:50] = False
+    assert (pixels[untouched] == 200).all()
+
+
+def test_ellipse_mask_leaves_bounding_box_corners(client):
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import QRRegion, mask_regions
+
+    pixels = np.full((100, 100, 3), 255, dtype=np.uint8)
+    region = QRRegion(points=np.array([[0, 0], [99, 0], [99, 99], [0, 99]], dtype=np.float32))
+
+    mask_regions(pixels, [region], ProcessingOptions(shape="ellipse"))
+
+    assert (pixels[50, 50] == 0).all()
+    assert (pixels[0, 0] == 255).all()
+
+
+def test_process_image_reports_stage_timings_and_peak_memory(client, monkeypatch):
+    from app.config import settings
+    from app.schemas import ProcessingOptions
+    from app.services.qr_processor import decode_image, process_image
+
+    monkeypatch.setattr(settings, "profile_memory", True)
+    source = Image.fromarray(_place_on_canvas(_make_qr_array(), (800, 600), (100, 100)))
+    buffer = io.BytesIO()
+    source.save(buffer, format="GIF")
+
+    result = process_image(buffer.getvalue(), "qr.gif", ProcessingOptions(output_format="JPEG"))
+
+    assert result.qr_count == 1
+    assert set(result.timings_ms) == {"decode", "detect", "mask", "encode"}
+    assert set(result.peak_bytes) == {"decode", "detect", "mask", "encode"}
+    assert result.peak_bytes["decode"] >= 800 * 600 * 3
+    assert result.peak_bytes["detect"] >= 800 * 600
+    assert result.peak_bytes["mask"] < 800 * 600
+    assert decode_image(result.data).shape == (600, 800, 3)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+
+from test_logs import _flush_logs
+from test_processing import _make_qr_bytes
+
+
+def _post(client, image_bytes: bytes, fill_color: str = "#000000"):
+    return client.post(
+        "/api/process",
+        data={"fill_color": fill_color, "output_format": "PNG"},
+        files=[("files", ("qr.png", image_bytes, "image/png"))],
+    )
+
+
+def test_repeated_upload_is_served_from_cache(client, monkeypatch):
+    image_bytes = _make_qr_bytes()
+    first = _post(client, image_bytes)
+
+    def fail_if_called(*args, **kwargs):
+        raise AssertionError("process_image should not run on a cache hit")
+
+    monkeypatch.setattr("app.services.batch.process_image", fail_if_called)
+    second = _post(client, image_bytes)
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert json.loads(first.headers["X-QR-Cut-Metadata"])["images"][0]["cached"] is False
+    assert json.loads(second.headers["X-QR-Cut-Metadata"])["images"][0]["cached"] is True
+    assert client.get("/api/stats").json()["result_cache"]["memory_hits"] == 1
+    _flush_logs()
+    assert len(client.get("/api/logs").json()) == 2
+
+
+def test_cache_key_depends_on_options(client):
+    image_bytes = _make_qr_bytes()
+    _post(client, image_bytes, fill_color="#000000")
+    response = _post(client, image_bytes, fill_color="#ff0000")
+
+    assert json.loads(response.headers["X-QR-Cut-Metadata"])["images"][0]["cached"] is False
+    assert client.get("/api/stats").json()["result_cache"]["misses"] == 2
+
+
+def test_memory_tier_evicts_least_recently_used(client):
+    from app.services.qr_processor import ProcessingResult
+    from app.services.result_cache import ResultCache
+
+    cache = ResultCache(memory_bytes=400)
+    for key in ("a", "b", "c"):
+        cache.put(key, ProcessingResult(data=b"x" * 100, qr_count=1, detection_strategy="full"))
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["memory_evictions"] == 1
+
+
+def test_disk_tier_survives_new_instance(client, tmp_path):
+    from app.services.qr_processor import ProcessingResult
+    from app.services.result_cache import ResultCache
+
+    cache_dir = tmp_path / "cache"
+    cache = ResultCache(memory_bytes=0, disk_dir=cache_dir, disk_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.put(key, ProcessingResult(data=key.encode() * 100, qr_count=2, detection_strategy="full"))
+
+    reopened = ResultCache(memory_bytes=0, disk_dir=cache_dir, disk_bytes=250)
+    restored = reopened.get("c")
+
+    assert restored is not None and restored.data == b"c" * 100 and restored.qr_count == 2
+    assert reopened.get("a") is None
+    assert reopened.stats()["disk_hits"] == 1
+    assert cache.stats()["disk_evictions"] == 1
+
+
+def test_restyling_reuses_cached_detection(client, monkeypatch):
+    image_bytes = _make_qr_bytes()
+    first = _post(client, image_bytes, fill_color="#000000")
+
+    def fail_if_called(*args, **kwargs):
+        raise AssertionError("detection should be served from the cache")
+
+    monkeypatch.setattr("app.services.qr_processor.run_detection", fail_if_called)
+    second = _post(client, image_bytes, fill_color="#ff0000")
+
+    assert second.status_code == 200
+    assert second.content != first.content
+    first_image = json.loads(first.headers["X-QR-Cut-Metadata"])["images"][0]
+    second_image = json.loads(second.headers["X-QR-Cut-Metadata"])["images"][0]
+    assert first_image["detection_cached"] is False
+    assert second_image["detection_cached"] is True
+    assert second_image["cached"] is False
+    assert second_image["qr_count"] == first_image["qr_count"]
+    assert client.get("/api/stats").json()["detection_cache"]["hits"] == 1
+
+
+def test_detection_cache_expires_and_bounds_entries(client):
+    from app.services.detection_cache import DetectionCache
+
+    now = [0.0]
+    cache = DetectionCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", "first")
+    cache.put("b", "second")
+    cache.put("c", "third")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "second"
+    now[0] = 11.0
+    assert cache.get("c") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "expirations": 1, "evictions": 1, "entries": 1}
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+
+def _stored_paths(root):
+    return [path for path in root.rglob("*") if path.is_file()]
+
+
+def test_sweep_keeps_fresh_objects_and_reclaims_expired(client):
+    from test_processing import _make_qr_bytes
+
+    from app.config import settings
+    from app.database import get_session
+    from app.models import StoredFile
+    from app.services.retention import retention_sweeper
+
+    response = client.post("/api/process", files=[("files", ("qr.png", _make_qr_bytes(), "image/png"))])
+    assert response.status_code == 200
+    stored = _stored_paths(settings.storage_root / "uploads") + _stored_paths(settings.storage_root / "processed")
+    assert len(stored) == 2
+
+    assert retention_sweeper.sweep() == {"files": 0, "bytes": 0}
+
+    total_bytes = sum(path.stat().st_size for path in stored)
+    later = datetime.now(timezone.utc) + timedelta(hours=settings.temp_retention_hours + 1)
+    reclaimed = retention_sweeper.sweep(now=later)
+    assert reclaimed == {"files": 2, "bytes": total_bytes}
+    assert not any(path.exists() for path in stored)
+    with get_session() as session:
+        assert session.query(StoredFile).count() == 0
+
+    stats = client.get("/api/stats").json()["retention"]
+    assert stats["files_reclaimed"] == 2
+    assert stats["bytes_reclaimed"] == reclaimed["bytes"]
+
+
+def test_sweep_works_in_batches(client):
+    from app.services.retention import retention_sweeper
+    from app.services.storage import storage
+
+    for index in range(5):
+        storage.store("uploads", f"file-{index}.png", f"{index:02d}digest", "png", b"x" * 10)
+
+    retention_sweeper.batch_size = 2
+    later = datetime.now(timezone.utc) + timedelta(days=30)
+    assert retention_sweeper.sweep(now=later) == {"files": 5, "bytes": 50}
+
+
+def test_sweep_moves_past_objects_it_cannot_remove(client, monkeypatch):
+    from app.services.retention import retention_sweeper
+    from app.services.storage import storage
+
+    for index in range(5):
+        storage.store("uploads", f"file-{index}.png", f"{index:02d}digest", "png", b"x" * 10)
+
+    remove = storage.backend.remove
+
+    def flaky_remove(kind, digest, suffix, unused_since):
+        if digest == "00digest":
+            raise OSError("busy")
+        if digest == "01digest":
+            return None
+        return remove(kind, digest, suffix, unused_since)
+
+    monkeypatch.setattr(storage.backend, "remove", flaky_remove)
+    retention_sweeper.batch_size = 2
+    later = datetime.now(timezone.utc) + timedelta(days=30)
+    assert retention_sweeper.sweep(now=later) == {"files": 3, "bytes": 30}
+    assert retention_sweeper.stats()["skipped_in_use"] == 1
+
+    monkeypatch.setattr(storage.backend, "remove", remove)
+    assert retention_sweeper.sweep(now=later) == {"files": 2, "bytes": 20}
+
+
+def test_sweep_removes_expired_legacy_flat_files(client):
+    import os
+
+    from app.config import settings
+    from app.services.retention import retention_sweeper
+
+    retention_sweeper.stop()  # keep the background sweep from racing the assertions
+    old = datetime.now(timezone.utc) - timedelta(hours=settings.temp_retention_hours + 1)
+    legacy = []
+    for kind, name in (("uploads", "20250930080824_g4fnibqg_a.jpg"), ("processed", "20250930080824_bij7mnhm_a.png")):
+        path = settings.storage_root / kind / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"y" * 7)
+        os.utime(path, (old.timestamp(), old.timestamp()))
+        legacy.append(path)
+    fresh = settings.storage_root / "uploads" / "20991231000000_fresh_b.jpg"
+    fresh.write_bytes(b"z")
+
+    # The startup sweep already saw an empty tree; legacy files predate startup in practice.
+    retention_sweeper._legacy_done = False
+    retention_sweeper.batch_size = 1
+    assert retention_sweeper.sweep() == {"files": 1, "bytes": 7}
+    assert retention_sweeper.sweep() == {"files": 1, "bytes": 7}
+    assert not any(path.exists() for path in legacy)
+    assert fresh.exists()
+    assert retention_sweeper.stats()["legacy_files_reclaimed"] == 2
+
+    fresh.unlink()
+    retention_sweeper.sweep()
+    assert retention_sweeper._legacy_done
+
+
+def test_objects_keep_one_retention_row_and_are_backfilled(client):
+    from app.database import get_session
+    from app.models import StorageObject
+    from app.services.retention import retention_sweeper
+    from app.services.storage import storage
+
+    for index in range(3):
+        storage.store("uploads", f"hot-{index}.png", "aahot", "png", b"x" * 10)
+    storage.index_writer.flush()
+    with get_session() as session:
+        assert session.query(StorageObject).count() == 1
+        # Databases written before storage_objects existed only have the filename mappings.
+        session.query(StorageObject).delete()
+        session.commit()
+
+    retention_sweeper._objects_backfilled = False
+    later = datetime.now(timezone.utc) + timedelta(days=30)
+    assert retention_sweeper.sweep(now=later) == {"files": 1, "bytes": 10}
+    with get_session() as session:
+        assert session.query(StorageObject).count() == 0
+
+
+def test_sweep_prunes_old_mappings_of_objects_still_in_use(client):
+    from app.database import get_session
+    from app.models import StoredFile
+    from app.services.retention import retention_sweeper
+    from app.services.storage import storage
+
+    for index in range(3):
+        storage.store("uploads", f"hot-{index}.png", "aahot", "png", b"x" * 10)
+    storage.index_writer.flush()
+    with get_session() as session:
+        for row in session.query(StoredFile).all():
+            row.created_at = datetime(2000, 1, 1)
+        session.commit()
+
+    # The object itself was stored just now, so only its old mapping rows go.
+    assert retention_sweeper.sweep() == {"files": 0, "bytes": 0}
+    with get_session() as session:
+        assert session.query(StoredFile).count() == 0
+    assert retention_sweeper.stats()["mappings_pruned"] == 3
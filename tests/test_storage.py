@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import io
+
+
+def test_content_addressed_storage_deduplicates(tmp_path):
+    from app.services.storage import ContentAddressedStorage
+
+    backend = ContentAddressedStorage(tmp_path)
+    first = backend.put("uploads", "abcdef0123", "PNG", b"payload")
+    second = backend.put("uploads", "abcdef0123", "png", io.BytesIO(b"payload"))
+
+    assert first.path == tmp_path / "uploads" / "ab" / "cd" / "abcdef0123.png"
+    assert first.path.read_bytes() == b"payload"
+    assert not first.deduplicated and second.deduplicated
+    assert not list(first.path.parent.glob(".tmp-*"))
+    assert backend.stats() == {"writes": 1, "deduplicated": 1, "bytes_written": 7, "bytes_deduplicated": 7}
+
+
+def test_repeat_uploads_are_stored_once(client):
+    from test_processing import _make_qr_bytes
+
+    from app.config import settings
+    from app.database import get_session
+    from app.models import StoredFile
+    from app.services.storage import storage
+
+    image = _make_qr_bytes()
+    for _ in range(2):
+        response = client.post("/api/process", files=[("files", ("qr.png", image, "image/png"))])
+        assert response.status_code == 200
+
+    storage.index_writer.flush()
+    with get_session() as session:
+        rows = session.query(StoredFile).all()
+    assert len(rows) == 4
+    assert len({(row.kind, row.digest) for row in rows}) == 2
+    assert len([path for path in (settings.storage_root / "uploads").rglob("*") if path.is_file()]) == 1
+    assert client.get("/api/stats").json()["storage"]["deduplicated"] == 2
+
+
+def test_persist_mode_originals_skips_processed(client):
+    from test_processing import _make_qr_bytes
+
+    from app.services.storage import storage
+
+    storage.mode = "originals"
+    response = client.post("/api/process", files=[("files", ("qr.png", _make_qr_bytes(), "image/png"))])
+    assert response.status_code == 200
+    assert storage.persists("uploads") and not storage.persists("processed")
+    assert not list((storage.backend.root / "processed").rglob("*.png"))
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import io
+import zipfile
+
+from app.utils.zip_stream import ZipEntry, iter_zip
+
+
+def test_iter_zip_streams_readable_archive_with_stored_images():
+    png_bytes = b"\x89PNG" + bytes(range(256)) * 1000
+    text_bytes = b"hello world\n" * 1000
+    entries = [
+        ZipEntry("a.png", io.BytesIO(png_bytes), len(png_bytes)),
+        ZipEntry("notes.txt", io.BytesIO(text_bytes), len(text_bytes)),
+    ]
+
+    chunks = list(iter_zip(entries, chunk_size=4096))
+
+    assert len(chunks) > 2
+    assert max(len(chunk) for chunk in chunks) < 64 * 1024
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.namelist() == ["a.png", "notes.txt"]
+        assert archive.getinfo("a.png").compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("notes.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read("a.png") == png_bytes
+        assert archive.read("notes.txt") == text_bytes
+        assert archive.testzip() is None